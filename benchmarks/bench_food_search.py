@@ -0,0 +1,154 @@
+"""
+Food search benchmark against a local fake USDA server.
+
+Starts an aiohttp server that mimics GET /foods/search (with a fixed
+artificial latency and a request counter), points USDA_BASE_URL at it and
+replays the same workload twice:
+
+- direct: NutritionBot.search_usda(), one USDA request per search (old path)
+- cached: NutritionBot.search_food(), normalized-query cache + single-flight
+
+Searches arrive in concurrent waves and pick queries from a skewed popularity
+list, typed with random case and spacing. Reports upstream requests, p50/p95
+latency, and the cache counters (hit rate, coalesced callers).
+
+Usage:
+    python benchmarks/bench_food_search.py [--searches 2000] [--wave 50] [--latency 0.2]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "bot"))
+
+PORT = 18765
+
+# Throwaway database and the fake server, before anything imports the bot modules
+_tmp_dir = tempfile.mkdtemp(prefix="gymbot_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_tmp_dir) / 'bench.db'}"
+os.environ["USDA_BASE_URL"] = f"http://127.0.0.1:{PORT}"
+os.environ["FOOD_DB_PATH"] = str(Path(_tmp_dir) / "foods.db")     # no offline database: misses go to the fake server
+
+from bot.core.database import init_db, close_db  # noqa: E402
+from bot.core.http import http_client  # noqa: E402
+from bot.features.dev7_nutrition_tracking.services import NutritionBot  # noqa: E402
+from bot.features.dev7_nutrition_tracking.search_cache import search_cache  # noqa: E402
+
+QUERIES = [
+    "chicken breast", "rice", "banana", "egg", "oats", "salmon", "broccoli", "apple",
+    "greek yogurt", "peanut butter", "sweet potato", "beef", "milk", "almonds", "tuna",
+    "avocado", "cottage cheese", "bread", "pasta", "spinach", "turkey", "quinoa", "lentils",
+    "cheddar cheese", "orange", "potato", "tofu", "shrimp", "blueberries", "olive oil",
+]
+
+
+class FakeUSDA:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.requests = 0
+
+    async def search(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        query = request.query["query"]
+        size = int(request.query.get("pageSize", 5))
+        foods = [
+            {"fdcId": abs(hash((query, i))) % 10**6, "description": f"{query.title()}, variant {i}",
+             "dataType": "SR Legacy", "foodNutrients": [{"nutrientId": 1008, "value": 100 + i}]}
+            for i in range(size)
+        ]
+        return web.json_response({"totalHits": size, "foods": foods})
+
+
+def typed(query: str, rng: random.Random) -> str:
+    """The same query as different users type it"""
+    words = [word.capitalize() if rng.random() < 0.3 else word for word in query.split()]
+    text = ("  " if rng.random() < 0.2 else " ").join(words)
+    return text.upper() if rng.random() < 0.05 else text
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def replay(search, workload: list[list[str]]) -> list[float]:
+    latencies = []
+
+    async def one(query: str):
+        started = time.perf_counter()
+        foods = await search(query)
+        assert foods, query
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    for wave in workload:
+        await asyncio.gather(*(one(query) for query in wave))
+    return latencies
+
+
+def report(name: str, latencies: list[float], requests: int, elapsed: float):
+    print(f"{name:7s} {len(latencies):6,} searches  {requests:6,} USDA requests  "
+          f"p50={statistics.median(latencies):7.1f} ms  p95={percentile(latencies, 95):7.1f} ms  "
+          f"total={elapsed:6.1f} s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--searches", type=int, default=2000)
+    parser.add_argument("--wave", type=int, default=50, help="concurrent searches per wave")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake USDA response time in seconds")
+    args = parser.parse_args()
+
+    init_db()
+    usda = FakeUSDA(args.latency)
+    app = web.Application()
+    app.router.add_get("/foods/search", usda.search)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", PORT).start()
+
+    rng = random.Random(21)
+    weights = [1 / rank for rank in range(1, len(QUERIES) + 1)]     # Zipf-like popularity
+    picks = [typed(query, rng) for query in rng.choices(QUERIES, weights, k=args.searches)]
+    workload = [picks[i:i + args.wave] for i in range(0, len(picks), args.wave)]
+
+    bot = NutritionBot()
+    try:
+        started = time.perf_counter()
+        latencies = await replay(bot.search_usda, workload)
+        report("direct", latencies, usda.requests, time.perf_counter() - started)
+
+        usda.requests = 0
+        started = time.perf_counter()
+        latencies = await replay(bot.search_food, workload)
+        report("cached", latencies, usda.requests, time.perf_counter() - started)
+
+        stats = search_cache.stats()
+        print(f"  memory hit rate {stats['hit_rate']:.1%}, total hit rate {stats['total_hit_rate']:.1%}, "
+              f"{stats['coalesced']:,} searches joined an in-flight request, {stats['db_hits']} database hits")
+
+        # Restart: memory is empty, the database tier still answers
+        search_cache.memory.clear()
+        usda.requests = 0
+        started = time.perf_counter()
+        latencies = await replay(bot.search_food, workload[:5])
+        report("restart", latencies, usda.requests, time.perf_counter() - started)
+    finally:
+        await bot.close()
+        await http_client.stop()
+        await runner.cleanup()
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,167 @@
+"""
+Handler latency benchmark: sync SQLAlchemy sessions vs. the async (aiosqlite) layer.
+
+Fires N concurrent fake updates at the event loop (a mix of cheap read-only
+commands and /log writes) and reports p50/p95/p99 latency per update, plus
+the event-loop stall seen by a 1 ms heartbeat task running alongside - that
+stall is what every other user (polling, timers, reminders) waits through.
+The "sync" run uses the old blocking get_session() code path, the "async" run
+uses the ported services from dev1_workout_tracking.
+
+Usage:
+    python benchmarks/bench_handler_latency.py [--updates 200] [--write-ratio 0.2]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "bot"))
+
+# Point the bot at a throwaway database before anything imports bot.core.database
+_tmp_dir = tempfile.mkdtemp(prefix="gymbot_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_tmp_dir) / 'bench.db'}"
+
+from bot.core.database import init_db, get_session, async_engine  # noqa: E402
+from bot.core.models import User, Workout  # noqa: E402
+from bot.features.dev1_workout_tracking import services  # noqa: E402
+
+USERS = 50
+REPLY_LATENCY = 0.005  # simulated Telegram round trip for message.answer()
+
+
+# ==========================================
+# OLD (BLOCKING) CODE PATH
+# ==========================================
+
+def sync_get_lang(telegram_id: int) -> str:
+    with get_session() as session:
+        user = session.query(User).filter_by(telegram_id=telegram_id).first()
+        return user.language if user and user.language else "en"
+
+
+def sync_log_workout(telegram_id: int, exercise: str, sets: int, reps: int, weight: float):
+    with get_session() as session:
+        session.add(Workout(
+            user_id=telegram_id, exercise=exercise, sets=sets, reps=reps, weight=weight,
+            created_at=datetime.now(timezone.utc)
+        ))
+        session.commit()
+        session.query(Workout).filter(
+            Workout.user_id == telegram_id, Workout.exercise.ilike(exercise)
+        ).all()
+    with get_session() as session:
+        user = session.query(User).filter_by(telegram_id=telegram_id).first()
+        user.workout_count += 1
+
+
+async def sync_handler(telegram_id: int, is_write: bool):
+    lang = sync_get_lang(telegram_id)
+    if is_write:
+        sync_log_workout(telegram_id, "BenchPress", 3, 10, 60.0)
+    await asyncio.sleep(REPLY_LATENCY)
+    return lang
+
+
+# ==========================================
+# NEW (ASYNC) CODE PATH
+# ==========================================
+
+async def async_handler(telegram_id: int, is_write: bool):
+    lang = await services.get_lang(telegram_id)
+    if is_write:
+        await services.log_workout(telegram_id, "BenchPress", 3, 10, 60.0)
+    await asyncio.sleep(REPLY_LATENCY)
+    return lang
+
+
+# ==========================================
+# HARNESS
+# ==========================================
+
+def seed():
+    init_db()
+    with get_session() as session:
+        for telegram_id in range(1, USERS + 1):
+            session.add(User(telegram_id=telegram_id, language="en"))
+        session.flush()
+        for i in range(USERS * 20):
+            session.add(Workout(
+                user_id=i % USERS + 1, exercise="BenchPress", sets=3, reps=8, weight=50.0
+            ))
+
+
+async def heartbeat(stalls: list[float], stop: asyncio.Event):
+    """Measure how late a 1 ms sleep wakes up while handlers are running"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        stalls.append((time.perf_counter() - started - 0.001) * 1000)
+
+
+async def run(handler, updates: int, write_ratio: float) -> tuple[list[float], list[float]]:
+    rng = random.Random(42)
+    plan = [(rng.randint(1, USERS), rng.random() < write_ratio) for _ in range(updates)]
+    latencies: list[float] = []
+    stalls: list[float] = []
+
+    async def one(telegram_id: int, is_write: bool):
+        started = time.perf_counter()
+        await handler(telegram_id, is_write)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(heartbeat(stalls, stop))
+    await asyncio.sleep(0)
+
+    # Every update is received at the same instant, like a burst from long polling
+    await asyncio.gather(*(one(uid, w) for uid, w in plan))
+    stop.set()
+    await probe
+    return latencies, stalls
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def report(name: str, latencies: list[float], stalls: list[float], wall: float):
+    print(
+        f"{name:<6} updates={len(latencies):<5} wall={wall * 1000:8.1f} ms  "
+        f"p50={statistics.median(latencies):8.1f} ms  "
+        f"p95={percentile(latencies, 95):8.1f} ms  "
+        f"p99={percentile(latencies, 99):8.1f} ms  "
+        f"max loop stall={max(stalls, default=0.0):8.1f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=200)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    seed()
+
+    for name, handler in (("sync", sync_handler), ("async", async_handler)):
+        # Warm-up so connection setup is not part of the measurement
+        await run(handler, 10, args.write_ratio)
+        started = time.perf_counter()
+        latencies, stalls = await run(handler, args.updates, args.write_ratio)
+        report(name, latencies, stalls, time.perf_counter() - started)
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
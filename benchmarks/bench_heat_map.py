@@ -0,0 +1,138 @@
+"""
+Heat map render benchmark: NumPy + bare matplotlib vs the old pandas/seaborn renderer.
+
+Each renderer runs in its own fresh interpreter (like a chart worker) and reports:
+- import time of the libraries it needs
+- median render time of a full 12x4 heat map to PNG
+- peak RSS of the process afterwards
+
+The seaborn baseline is the renderer the bot used before; it needs pandas and
+seaborn installed (they are no longer in requirements.txt) and is skipped otherwise.
+
+Usage:
+    python benchmarks/bench_heat_map.py [--repeat 20]
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+
+
+def sample_data() -> dict[int, list[int]]:
+    """A full year of workout counts, like a regular user's heat map"""
+    rng = random.Random(7)
+    return {month: [rng.randint(0, 6) for _ in range(4)] for month in range(1, 13)}
+
+
+def load_numpy_renderer():
+    # Load charts.py on its own: the package __init__ would pull in aiogram and the database
+    import importlib.util
+
+    path = ROOT_DIR / "bot" / "features" / "dev3_progress_stats" / "charts.py"
+    spec = importlib.util.spec_from_file_location("charts", path)
+    charts = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(charts)
+    charts.warm_up()
+    return charts.render_heat_map
+
+
+def load_seaborn_renderer():
+    """The pandas/seaborn renderer as it was before the NumPy rewrite"""
+    import calendar
+    from io import BytesIO
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import pandas as pd
+    import seaborn as sns
+    from matplotlib.figure import Figure
+
+    def render_heat_map(heatmap_data: dict[int, list[int]]) -> bytes:
+        df = pd.DataFrame.from_dict(
+            heatmap_data,
+            orient="index",
+            columns=["Week 1", "Week 2", "Week 3", "Week 4"]
+        )
+        df = df.sort_index()
+        df.index = df.index.map(lambda m: calendar.month_abbr[m])
+
+        fig = Figure(figsize=(10, 8))
+        ax = fig.add_subplot()
+        sns.heatmap(df, annot=True, cmap="YlOrRd", cbar=True, fmt="d", ax=ax)
+        ax.set_title("Workout Frequency per Month/Week")
+        ax.set_xlabel("Week of Month")
+        ax.set_ylabel("Month")
+
+        buffer = BytesIO()
+        fig.savefig(buffer, format="png")
+        return buffer.getvalue()
+
+    return render_heat_map
+
+
+LOADERS = {"numpy": load_numpy_renderer, "seaborn": load_seaborn_renderer}
+
+
+def run_worker(name: str, repeat: int):
+    """Runs inside the child interpreter: measure one renderer and print JSON"""
+    import resource
+    import statistics
+    import time
+
+    started = time.perf_counter()
+    try:
+        renderer = LOADERS[name]()
+    except ImportError as e:
+        print(json.dumps({"skipped": str(e)}))
+        return
+    import_ms = (time.perf_counter() - started) * 1000
+
+    data = sample_data()
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(renderer(data))
+        timings.append((time.perf_counter() - started) * 1000)
+
+    print(json.dumps({
+        "import_ms": import_ms,
+        "render_ms": statistics.median(timings),
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "png_kb": size / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="renders per renderer")
+    parser.add_argument("--worker", choices=LOADERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.repeat)
+        return
+
+    print(f"heat map render, median of {args.repeat} renders")
+    print(f"{'renderer':<10} {'import':>10} {'render':>10} {'peak RSS':>10} {'PNG':>8}")
+    for name in LOADERS:
+        result = subprocess.run(
+            [sys.executable, __file__, "--worker", name, "--repeat", str(args.repeat)],
+            capture_output=True, text=True, check=True
+        )
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        if "skipped" in stats:
+            print(f"{name:<10} skipped ({stats['skipped']})")
+            continue
+        print(
+            f"{name:<10} {stats['import_ms']:8.1f}ms {stats['render_ms']:8.1f}ms "
+            f"{stats['rss_mb']:8.1f}MB {stats['png_kb']:6.1f}KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
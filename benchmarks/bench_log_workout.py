@@ -0,0 +1,124 @@
+"""
+/log micro-benchmark: two sessions / two commits vs. one transaction.
+
+The "legacy" path reproduces the previous log_workout(): insert + commit,
+personal record update, then increment_workout_count() in a second session
+with its own commit. The "single" path is the current services.log_workout(),
+where the insert, record update and counter increment share one commit.
+Each /log is awaited sequentially so the numbers reflect per-call cost
+(commits, fsyncs, pool checkouts) rather than lock contention.
+
+Usage:
+    python benchmarks/bench_log_workout.py [--logs 2000]
+    DB_PROFILE=default python benchmarks/bench_log_workout.py
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import event, select
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "bot"))
+
+# Point the bot at a throwaway database before anything imports bot.core.database
+_tmp_dir = tempfile.mkdtemp(prefix="gymbot_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_tmp_dir) / 'bench.db'}"
+
+from bot.core.database import DB_PROFILE, init_db, close_db, get_async_session, async_engine  # noqa: E402
+from bot.core.models import User, Workout, PersonalRecord  # noqa: E402
+from bot.features.dev1_workout_tracking import services  # noqa: E402
+
+EXERCISES = ("Bench Press", "Squat", "Deadlift", "Overhead Press")
+
+commits = 0
+
+
+@event.listens_for(async_engine.sync_engine, "commit")
+def _count_commit(conn):
+    global commits
+    commits += 1
+
+
+# ==========================================
+# OLD CODE PATH (two sessions, two commits)
+# ==========================================
+
+async def legacy_increment_workout_count(telegram_id: int):
+    async with get_async_session() as session:
+        result = await session.execute(select(User).filter_by(telegram_id=telegram_id))
+        user = result.scalars().first()
+        if user:
+            user.workout_count += 1
+            await session.commit()
+
+
+async def legacy_log_workout(telegram_id: int, exercise: str, sets: int, reps: int, weight: float):
+    async with get_async_session() as session:
+        workout = Workout(
+            user_id=telegram_id, exercise=exercise, sets=sets, reps=reps, weight=weight,
+            created_at=datetime.now(timezone.utc)
+        )
+        session.add(workout)
+        await session.commit()
+        await session.refresh(workout)
+
+        new_orm = services.calculate_one_rep_max(weight, reps)
+        exercise_key = services.normalize_exercise_key(exercise)
+        record = await session.get(PersonalRecord, (telegram_id, exercise_key))
+        prev_orm = record.best_orm if record else 0.0
+        if record is None:
+            session.add(PersonalRecord(
+                user_id=telegram_id, exercise_key=exercise_key, exercise=exercise,
+                best_orm=new_orm, weight=weight, reps=reps, workout_id=workout.workout_id
+            ))
+        elif new_orm > record.best_orm:
+            record.best_orm = new_orm
+        await session.commit()
+
+    await legacy_increment_workout_count(telegram_id)
+    return workout, new_orm, prev_orm
+
+
+# ==========================================
+# HARNESS
+# ==========================================
+
+async def run(log_func, telegram_id: int, logs: int) -> tuple[float, int]:
+    global commits
+    commits = 0
+    started = time.perf_counter()
+    for i in range(logs):
+        await log_func(telegram_id, EXERCISES[i % len(EXERCISES)], 3, 5 + i % 5, 60.0 + i % 40)
+    return time.perf_counter() - started, commits
+
+
+async def main(logs: int):
+    init_db()
+    await services.get_or_create_user(1, "legacy")
+    await services.get_or_create_user(2, "single")
+
+    # Warm up the pool and the statement cache
+    await run(legacy_log_workout, 1, 20)
+    await run(services.log_workout, 2, 20)
+
+    print(f"profile={DB_PROFILE}, {logs} sequential /log calls\n")
+    print(f"{'path':<8}{'logs/sec':>10}{'ms/log':>10}{'commits/log':>13}")
+    for name, func, telegram_id in (("legacy", legacy_log_workout, 1), ("single", services.log_workout, 2)):
+        elapsed, n_commits = await run(func, telegram_id, logs)
+        print(f"{name:<8}{logs / elapsed:>10.0f}{elapsed / logs * 1000:>10.2f}{n_commits / logs:>13.1f}")
+
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs", type=int, default=2000, help="sequential /log calls per path")
+    args = parser.parse_args()
+    asyncio.run(main(args.logs))
@@ -0,0 +1,156 @@
+"""
+Reminder scheduler benchmark: memory and CPU with a million weekly reminders.
+
+Measures the bucketed ReminderScheduler against the old approach of one
+sleeping asyncio task per (user, weekday):
+
+- memory:   traced allocations for N reminders (scheduler) and M sleeping tasks (old)
+- add:      time to register N reminders
+- update:   reschedule + cancel throughput on random reminders
+- idle CPU: process time burned by the dispatcher while nothing is due
+- dispatch: time to fire one bucket of reminders due at the same minute,
+            and a burst of individually missed reminders, with a no-op callback
+
+Usage:
+    python benchmarks/bench_reminder_scheduler.py [--reminders 1000000] [--tasks 100000]
+"""
+import argparse
+import asyncio
+import gc
+import importlib.util
+import random
+import time
+import tracemalloc
+from datetime import time as dtime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# Load scheduler.py on its own: the package __init__ would pull in aiogram and the database
+_spec = importlib.util.spec_from_file_location(
+    "scheduler", ROOT_DIR / "bot" / "features" / "dev8_training_notification" / "scheduler.py"
+)
+scheduler_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(scheduler_module)
+ReminderScheduler = scheduler_module.ReminderScheduler
+week_minute = scheduler_module.week_minute
+next_fire_at = scheduler_module.next_fire_at
+
+
+def random_schedule(rng: random.Random) -> tuple[int, dtime, int, int]:
+    return (rng.randrange(7), dtime(rng.randrange(24), rng.choice((0, 15, 30, 45))),
+            rng.choice((15, 30, 60, 120)), rng.randrange(-5, 6))
+
+
+async def old_reminder_loop(weekday: int, train_time: dtime, reminder_minutes: int):
+    """Stand-in for the old per-schedule task: sleeps until the next reminder, forever"""
+    while True:
+        await asyncio.sleep(86400)
+
+
+async def bench_tasks(count: int) -> float:
+    """Traced MB held by `count` sleeping reminder tasks"""
+    rng = random.Random(1)
+    gc.collect()
+    tracemalloc.start()
+    tasks = [asyncio.create_task(old_reminder_loop(*random_schedule(rng)[:3])) for _ in range(count)]
+    await asyncio.sleep(0)    # let every task reach its sleep
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return current / 2**20
+
+
+async def bench_scheduler(count: int, updates: int, idle_seconds: float, burst: int):
+    rng = random.Random(1)
+
+    async def noop(reminders, next_at):
+        pass
+
+    schedules = [random_schedule(rng) for _ in range(count)]
+
+    # Memory under tracemalloc, timing on a second build without tracing overhead
+    gc.collect()
+    tracemalloc.start()
+    scheduler = ReminderScheduler()
+    reminders = [scheduler.add(i, *schedule) for i, schedule in enumerate(schedules)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del scheduler, reminders
+    gc.collect()
+
+    scheduler = ReminderScheduler()
+    started = time.perf_counter()
+    reminders = [scheduler.add(i, *schedule) for i, schedule in enumerate(schedules)]
+    add_seconds = time.perf_counter() - started
+
+    print(f"scheduler, {count:,} reminders")
+    print(f"  memory:    {current / 2**20:8.1f} MB ({current / count:.0f} B per reminder)")
+    print(f"  add:       {add_seconds:8.2f} s ({add_seconds / count * 1e6:.2f} us per reminder)")
+
+    started = time.perf_counter()
+    for _ in range(updates):
+        i = rng.randrange(count)
+        reminders[i] = scheduler.reschedule(reminders[i], *random_schedule(rng))
+    for i in rng.sample(range(count), updates):
+        scheduler.cancel(reminders[i])
+    update_seconds = time.perf_counter() - started
+    print(f"  update:    {update_seconds / (2 * updates) * 1e6:8.2f} us per reschedule/cancel ({2 * updates:,} ops)")
+
+    await scheduler.start(noop)
+    await asyncio.sleep(0.1)
+    cpu_started = time.process_time()
+    await asyncio.sleep(idle_seconds)
+    idle_cpu = time.process_time() - cpu_started
+    print(f"  idle CPU:  {idle_cpu * 1000:8.1f} ms over {idle_seconds:.0f} s")
+
+    # Missed reminders (restored after downtime) are fired one by one
+    due_at = time.time()
+    for i in range(burst):
+        scheduler.add(count + i, *random_schedule(rng), fire_at=due_at)
+    started = time.perf_counter()
+    while scheduler.fired < burst:
+        await asyncio.sleep(0.01)
+    dispatch_seconds = time.perf_counter() - started
+    print(f"  missed:    {dispatch_seconds:8.2f} s for {burst:,} individually due reminders "
+          f"({burst / dispatch_seconds:,.0f}/s)")
+    await scheduler.stop()
+
+    # Popular slot: `burst` reminders in one bucket, clock moved to its fire time
+    now = [time.time()]
+    scheduler = ReminderScheduler(clock=lambda: now[0])
+    for i in range(burst):
+        scheduler.add(i, 0, dtime(18, 0), 30)
+    now[0] = next_fire_at(week_minute(0, dtime(18, 0), 30), now[0])
+    started = time.perf_counter()
+    await scheduler.start(noop)
+    while scheduler.fired < burst:
+        await asyncio.sleep(0.001)
+    dispatch_seconds = time.perf_counter() - started
+    print(f"  bucket:    {dispatch_seconds * 1000:8.1f} ms to hand {burst:,} reminders due at once to the sender")
+    await scheduler.stop()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reminders", type=int, default=1_000_000, help="reminders in the scheduler")
+    parser.add_argument("--tasks", type=int, default=100_000, help="sleeping tasks for the old approach (0 to skip)")
+    parser.add_argument("--updates", type=int, default=100_000, help="reschedules and cancels to time")
+    parser.add_argument("--idle", type=float, default=5.0, help="seconds to measure idle CPU")
+    parser.add_argument("--burst", type=int, default=100_000, help="due reminders to dispatch")
+    args = parser.parse_args()
+
+    if args.tasks:
+        mb = await bench_tasks(args.tasks)
+        print(f"task per schedule, {args.tasks:,} tasks")
+        print(f"  memory:    {mb:8.1f} MB ({mb * 2**20 / args.tasks:.0f} B per task, "
+              f"~{mb * args.reminders / args.tasks:,.0f} MB extrapolated to {args.reminders:,})")
+
+    await bench_scheduler(args.reminders, args.updates, args.idle, args.burst)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+"""
+Rest timer benchmark: 100k concurrent timers on the timing wheel.
+
+Compares the shared TimerWheel with the old approach of one
+asyncio.sleep(total_seconds) task per running timer:
+
+- memory:   traced allocations for N wheel entries and N sleeping tasks
+- schedule: cost of starting (and restarting) a timer
+- cancel:   cost of stopping a timer
+- ticking:  simulated run until every timer has expired - cost per tick and
+            the largest number of timers expiring within one tick
+
+Usage:
+    python benchmarks/bench_rest_timers.py [--timers 100000] [--max-duration 600]
+"""
+import argparse
+import asyncio
+import gc
+import importlib.util
+import random
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# Load timer_wheel.py on its own: the package __init__ would pull in aiogram and the database
+_spec = importlib.util.spec_from_file_location(
+    "timer_wheel", ROOT_DIR / "bot" / "features" / "dev5_rest_timers" / "timer_wheel.py"
+)
+timer_wheel = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(timer_wheel)
+TimerWheel = timer_wheel.TimerWheel
+
+
+async def bench_tasks(durations: list[int]) -> float:
+    """Traced MB held by one sleeping task per timer"""
+    async def notify(seconds: int):
+        await asyncio.sleep(seconds)
+
+    gc.collect()
+    tracemalloc.start()
+    tasks = [asyncio.create_task(notify(seconds)) for seconds in durations]
+    await asyncio.sleep(0)    # let every task reach its sleep
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return current / 2**20
+
+
+def bench_wheel(durations: list[int], rng: random.Random):
+    count = len(durations)
+    start = int(time.time())
+
+    gc.collect()
+    tracemalloc.start()
+    wheel = TimerWheel(start)
+    for user_id, seconds in enumerate(durations):
+        wheel.schedule(user_id, start + seconds)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"timer wheel, {count:,} timers")
+    print(f"  memory:    {current / 2**20:8.1f} MB ({current / count:.0f} B per timer)")
+
+    wheel = TimerWheel(start)
+    started = time.perf_counter()
+    for user_id, seconds in enumerate(durations):
+        wheel.schedule(user_id, start + seconds)
+    elapsed = time.perf_counter() - started
+    print(f"  schedule:  {elapsed / count * 1e6:8.2f} us per timer")
+
+    restarted = rng.sample(range(count), count // 10)
+    started = time.perf_counter()
+    for user_id in restarted:
+        wheel.schedule(user_id, start + durations[user_id])
+    elapsed = time.perf_counter() - started
+    print(f"  restart:   {elapsed / len(restarted) * 1e6:8.2f} us per timer ({len(restarted):,} restarts)")
+
+    cancelled = rng.sample(range(count), count // 10)
+    started = time.perf_counter()
+    for user_id in cancelled:
+        wheel.cancel(user_id)
+    elapsed = time.perf_counter() - started
+    print(f"  cancel:    {elapsed / len(cancelled) * 1e6:8.2f} us per timer ({len(cancelled):,} cancels)")
+
+    ticks = 0
+    expired = 0
+    busiest = 0
+    started = time.perf_counter()
+    while len(wheel):
+        ticks += 1
+        fired = wheel.advance(start + ticks)
+        expired += len(fired)
+        busiest = max(busiest, len(fired))
+    elapsed = time.perf_counter() - started
+    print(f"  ticking:   {elapsed / ticks * 1e6:8.1f} us per tick over {ticks:,} ticks, "
+          f"{expired:,} expired, at most {busiest:,} in one tick")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--timers", type=int, default=100_000, help="concurrent timers")
+    parser.add_argument("--max-duration", type=int, default=600, help="longest timer in seconds")
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    durations = [rng.randint(30, args.max_duration) for _ in range(args.timers)]
+
+    mb = await bench_tasks(durations)
+    print(f"task per timer, {args.timers:,} tasks")
+    print(f"  memory:    {mb:8.1f} MB ({mb * 2**20 / args.timers:.0f} B per task)")
+
+    bench_wheel(durations, rng)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
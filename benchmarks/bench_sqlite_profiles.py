@@ -0,0 +1,119 @@
+"""
+SQLite tuning profile benchmark: concurrent /log write throughput.
+
+Runs the same write-heavy workload once per DB_PROFILE (default, wal,
+production). Every profile gets a fresh subprocess and a fresh database file,
+because the PRAGMAs are attached when bot.core.database is imported.
+C concurrent "users" each log K workouts through the async services; the
+script reports logs/sec, per-write p50/p99 and failed writes for each profile.
+A profile whose run crashes is reported as failed, the others still run.
+
+Usage:
+    python benchmarks/bench_sqlite_profiles.py [--concurrency 20] [--writes 50]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+PROFILES = ("default", "wal", "production")
+
+
+def run_profile(concurrency: int, writes: int):
+    """Executed in the child process: DB_PROFILE/DATABASE_URL are already set"""
+    # Without DATABASE_URL the writes would go to the bot's own data/gymbot.db
+    if not os.environ.get("DATABASE_URL") or not os.environ.get("DB_PROFILE"):
+        sys.exit("--child needs DATABASE_URL and DB_PROFILE; run the script without --child")
+
+    import asyncio
+    import statistics
+    import time
+
+    sys.path.insert(0, str(ROOT_DIR))
+    sys.path.insert(0, str(ROOT_DIR / "bot"))
+
+    from sqlalchemy.exc import OperationalError
+
+    from bot.core.database import init_db, close_db
+    from bot.features.dev1_workout_tracking import services
+
+    errors: list[str] = []
+
+    async def worker(telegram_id: int, latencies: list[float]):
+        for i in range(writes):
+            started = time.perf_counter()
+            try:
+                await services.log_workout(telegram_id, f"Exercise {i % 5}", 3, 10, 50.0 + i)
+            except OperationalError as e:
+                errors.append(str(e.orig))      # e.g. "database is locked"; counted, not fatal
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    async def run():
+        init_db()
+        for n in range(concurrency):
+            await services.get_or_create_user(1000 + n, f"bench{n}", "Bench", None)
+
+        latencies: list[float] = []
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(1000 + n, latencies) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        await close_db()
+
+        latencies.sort()
+        return {
+            "writes": len(latencies),
+            "errors": len(errors),
+            "first_error": errors[0] if errors else None,
+            "per_sec": len(latencies) / elapsed,
+            "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+            "p99_ms": latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000 if latencies else 0.0,
+        }
+
+    print(json.dumps(asyncio.run(run())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent users writing")
+    parser.add_argument("--writes", type=int, default=50, help="workouts logged per user")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_profile(args.concurrency, args.writes)
+        return
+
+    print(f"{args.concurrency} concurrent users x {args.writes} /log writes\n")
+    print(f"{'profile':<12}{'logs/sec':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for profile in PROFILES:
+        tmp_dir = tempfile.mkdtemp(prefix=f"gymbot_{profile}_")
+        env = {
+            **os.environ,
+            "DB_PROFILE": profile,
+            "DATABASE_URL": f"sqlite:///{Path(tmp_dir) / 'bench.db'}",
+            "BOT_TOKEN": os.environ.get("BOT_TOKEN", "0:bench"),
+        }
+        result = subprocess.run(
+            [sys.executable, __file__, "--child",
+             "--concurrency", str(args.concurrency), "--writes", str(args.writes)],
+            env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            error = (result.stderr.strip().splitlines() or ["no output"])[-1]
+            print(f"{profile:<12}failed: {error}")
+            continue
+
+        stats = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{profile:<12}{stats['per_sec']:>10.0f}{stats['p50_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+              f"{stats['errors']:>8}")
+        if stats["first_error"]:
+            print(f"{'':<12}first error: {stats['first_error']}")
+
+
+if __name__ == "__main__":
+    main()
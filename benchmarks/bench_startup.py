@@ -0,0 +1,98 @@
+"""
+Startup benchmark: import time and baseline memory of the bot process.
+
+Imports bot.main in fresh interpreters (nothing else - no polling) and reports:
+- wall time of the import
+- cumulative import time of bot.main from `python -X importtime`
+- peak RSS after the import
+- the heaviest imported modules, and whether the analytics stack
+  (matplotlib / pandas / seaborn / numpy) was loaded at all
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 10]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+HEAVY_MODULES = ("matplotlib", "pandas", "seaborn", "numpy")
+
+PROBE = f"""
+import json, resource, sys, time
+started = time.perf_counter()
+import bot.main
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "wall_ms": elapsed * 1000,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+# import time: self [us] | cumulative | imported package
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def run_probe(env: dict) -> tuple[dict, list[tuple[int, int, str]]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((int(cumulative_us), len(indent), name))
+    return stats, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to average over")
+    parser.add_argument("--top", type=int, default=10, help="heaviest top-level imports to list")
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "BOT_TOKEN": os.environ.get("BOT_TOKEN", "0:bench"),
+        "DATABASE_URL": f"sqlite:///{Path(tempfile.mkdtemp(prefix='gymbot_bench_')) / 'bench.db'}",
+        "PYTHONPATH": os.pathsep.join([str(ROOT_DIR), str(ROOT_DIR / "bot")]),
+    }
+
+    runs = [run_probe(env) for _ in range(args.runs)]
+    wall = statistics.median(stats["wall_ms"] for stats, _ in runs)
+    rss = statistics.median(stats["rss_mb"] for stats, _ in runs)
+    bot_main_ms = statistics.median(
+        next(cumulative for cumulative, _, name in modules if name == "bot.main") / 1000
+        for _, modules in runs
+    )
+
+    print(f"import bot.main, median of {args.runs} runs")
+    print(f"  wall time:        {wall:8.1f} ms")
+    print(f"  -X importtime:    {bot_main_ms:8.1f} ms (cumulative bot.main)")
+    print(f"  peak RSS:         {rss:8.1f} MB")
+    print(f"  analytics loaded: {', '.join(runs[-1][0]['heavy']) or 'none'}")
+
+    # Heaviest third-party / feature packages from the last run (top-level entries only)
+    _, modules = runs[-1]
+    outermost = min(indent for _, indent, _ in modules)
+    top_level = sorted(
+        ((cumulative, name) for cumulative, indent, name in modules if indent <= outermost + 2),
+        reverse=True
+    )
+    print("\nheaviest imports (cumulative ms):")
+    for cumulative, name in top_level[:args.top]:
+        print(f"  {cumulative / 1000:8.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Statistics query benchmark on a synthetic heavy user.
+
+Seeds one user with N workouts (default 100k, ~3 years of history) and times
+the statistics aggregations three ways:
+
+- python: the old approach - load every Workout row as an ORM object and
+  aggregate in a Python loop
+- sql:    GROUP BY over the workouts table returning plain tuples
+          (the fallback used before the rollup is backfilled)
+- rollup: the same helpers reading workout_daily_stats
+
+Usage:
+    python benchmarks/bench_stats_queries.py [--rows 100000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from sqlalchemy import insert
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "bot"))
+
+# Point the bot at a throwaway database before anything imports bot.core.database
+_tmp_dir = tempfile.mkdtemp(prefix="gymbot_bench_")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_tmp_dir) / 'bench.db'}"
+
+from bot.core.database import init_db, close_db, engine, get_session, get_async_session  # noqa: E402
+from bot.core.models import User, Workout  # noqa: E402
+from bot.features.dev1_workout_tracking.services import rebuild_daily_stats  # noqa: E402
+from bot.features.dev3_progress_stats.muscle_groups import exercise_to_muscle  # noqa: E402
+from bot.features.dev3_progress_stats.utils_funcs import (  # noqa: E402
+    compute_weekly_volume,
+    compute_muscle_group_stats,
+    get_daily_workout_counts,
+)
+
+USER_ID = 1
+EXERCISES = list(exercise_to_muscle)[:20] + ["Custom Move"]
+
+
+def seed(rows: int):
+    init_db()
+    rng = random.Random(7)
+    start = datetime.now(timezone.utc) - timedelta(days=3 * 365)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"telegram_id": USER_ID}])
+        conn.execute(insert(Workout), [
+            {
+                "user_id": USER_ID,
+                "exercise": rng.choice(EXERCISES),
+                "sets": rng.randint(1, 5),
+                "reps": rng.randint(1, 15),
+                "weight": rng.uniform(10, 150),
+                "created_at": start + timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60)),
+            }
+            for _ in range(rows)
+        ])
+
+
+# ==========================================
+# OLD CODE PATH (ORM rows + Python loops)
+# ==========================================
+
+def python_weekly_volume() -> dict:
+    weekly_volume = defaultdict(int)
+    with get_session() as session:
+        for w in session.query(Workout).filter(Workout.user_id == USER_ID).all():
+            week_start = (w.created_at - timedelta(days=w.created_at.weekday())).date()
+            weekly_volume[week_start] += w.sets * w.reps * w.weight
+    return weekly_volume
+
+
+def python_muscle_group_stats() -> dict:
+    muscle_volume = defaultdict(lambda: defaultdict(int))
+    with get_session() as session:
+        for w in session.query(Workout).filter(Workout.user_id == USER_ID).all():
+            muscle = exercise_to_muscle.get(w.exercise, "Other")
+            muscle_volume[muscle][w.created_at.date()] += w.sets * w.reps * w.weight
+    return muscle_volume
+
+
+def python_daily_counts() -> dict:
+    counts = defaultdict(int)
+    with get_session() as session:
+        for w in session.query(Workout).filter(Workout.user_id == USER_ID).all():
+            counts[w.created_at.date()] += 1
+    return counts
+
+
+# ==========================================
+# HARNESS
+# ==========================================
+
+async def timed(func, repeat: int) -> float:
+    """Median wall time in ms"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        if asyncio.iscoroutine(result):
+            await result
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def with_session(helper, **kwargs):
+    async def run():
+        async with get_async_session() as session:
+            return await helper(USER_ID, session, **kwargs)
+    return run
+
+
+async def main(rows: int, repeat: int):
+    seed(rows)
+    now = datetime.now(timezone.utc)
+    cases = [
+        ("weekly volume", python_weekly_volume, with_session(compute_weekly_volume)),
+        ("muscle groups", python_muscle_group_stats, with_session(compute_muscle_group_stats, current_time=now)),
+        ("daily counts", python_daily_counts, with_session(get_daily_workout_counts)),
+    ]
+
+    sql_ms = {name: await timed(helper, repeat) for name, _, helper in cases}
+    started = time.perf_counter()
+    await rebuild_daily_stats()
+    rebuild_ms = (time.perf_counter() - started) * 1000
+    rollup_ms = {name: await timed(helper, repeat) for name, _, helper in cases}
+
+    print(f"{rows} workouts for one user, median of {repeat} runs (ms)\n")
+    print(f"{'aggregate':<16}{'python':>10}{'sql':>10}{'rollup':>10}")
+    for name, python_func, _ in cases:
+        python_ms = await timed(python_func, repeat)
+        print(f"{name:<16}{python_ms:>10.1f}{sql_ms[name]:>10.1f}{rollup_ms[name]:>10.1f}")
+    print(f"\none-off rollup rebuild: {rebuild_ms:.0f} ms")
+
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic workouts to seed")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
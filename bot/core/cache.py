@@ -0,0 +1,178 @@
+"""
+In-process caches shared by all features.
+Bounded LRU with per-entry TTL and hit/miss counters, plus single-flight
+request coalescing for cache misses.
+"""
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable
+
+# User cache settings (can be overridden from .env)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "900"))
+
+
+class TTLCache:
+    """
+    Least-recently-used cache where every entry also expires after `ttl` seconds.
+
+    Usage:
+        cache = TTLCache(maxsize=1000, ttl=60)
+        cache.set("key", value)
+        value = cache.get("key")
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return cached value (and mark it recently used) or `default`"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Like get(), but without touching LRU order or counters"""
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= self._clock():
+            return default
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        """Insert or replace a value, evicting the least recently used entry if full"""
+        self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key (invalidation) and return its value"""
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def expire(self) -> int:
+        """Drop every expired entry now instead of on its next access; returns how many"""
+        now = self._clock()
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+        for key in expired:
+            del self._data[key]
+        return len(expired)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the
+    coroutine, everyone arriving while it is in flight awaits the same result.
+    A caller that is cancelled does not cancel the shared call.
+
+    Usage:
+        flights = SingleFlight()
+        value = await flights.do(key, lambda: fetch(key))
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0     # callers that joined an in-flight call
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is None:
+            self.calls += 1
+            future = asyncio.ensure_future(factory())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every caller was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            "inflight": len(self._calls),
+            "calls": self.calls,
+            "shared": self.shared,
+        }
+
+
+# ============================================================================
+# USER PROFILE CACHE
+# ============================================================================
+
+@dataclass(slots=True)
+class CachedUser:
+    """Lightweight, session-independent copy of the fields read on every update"""
+    telegram_id: int
+    language: str = "en"
+    timezone_offset: int = 0
+    username: str | None = None
+    first_name: str | None = None
+    last_name: str | None = None
+
+    @classmethod
+    def from_model(cls, user) -> "CachedUser":
+        """Build from a bot.core.models.User row"""
+        return cls(
+            telegram_id=user.telegram_id,
+            language=user.language or "en",
+            timezone_offset=user.timezone_offset or 0,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name
+        )
+
+
+# telegram_id -> CachedUser
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
@@ -2,10 +2,17 @@
 Centralized database management.
 Single entry point for all features.
 """
-from sqlalchemy import create_engine
+import asyncio
+import os
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import await_only
 from sqlalchemy.orm import sessionmaker, Session
-from contextlib import contextmanager
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from contextlib import contextmanager, asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 from .models import Base
 
 # Path to unified database
@@ -15,13 +22,129 @@ DB_PATH = BASE_DIR / "data" / "gymbot.db"
 # Create database folder if it doesn't exist
 DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
+# DATABASE_URL from .env overrides the default SQLite file
+DATABASE_URL = os.getenv("DATABASE_URL") or f"sqlite:///{DB_PATH}"
+
+
+def make_async_url(url: str) -> str:
+    """Swap the sync SQLite driver for aiosqlite (sqlite:/// -> sqlite+aiosqlite:///)"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = make_async_url(DATABASE_URL)
+
+# SQLite tuning profiles, selected with DB_PROFILE in .env.
+# Every PRAGMA is applied to each new pooled connection.
+SQLITE_PROFILES: dict[str, dict[str, str | int]] = {
+    # SQLite defaults: rollback journal, synchronous=FULL
+    "default": {},
+    # WAL without relaxing durability
+    "wal": {
+        "journal_mode": "WAL",
+        "busy_timeout": 5000,
+    },
+    # Readers never block the writer, one fsync per checkpoint instead of per commit
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,          # ms to wait for the write lock instead of failing
+        "mmap_size": 134217728,        # 128 MB memory-mapped reads
+        "cache_size": -16384,          # 16 MB page cache per connection (negative = KiB)
+        "temp_store": "MEMORY",
+    },
+}
+DB_PROFILE = os.getenv("DB_PROFILE", "production")
+if DB_PROFILE not in SQLITE_PROFILES:
+    raise ValueError(f"Unknown DB_PROFILE '{DB_PROFILE}', expected one of: {', '.join(SQLITE_PROFILES)}")
+
+# Connection pool (shared by the threaded sync path and the async path)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+def apply_sqlite_profile(target: Engine, profile: str = DB_PROFILE):
+    """Register a connect hook that applies the profile PRAGMAs to every new connection"""
+    pragmas = SQLITE_PROFILES[profile]
+    if target.dialect.name != "sqlite" or not pragmas:
+        return
+
+    @event.listens_for(target, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+# SQLite allows one writer at a time. A write transaction of the async engine stays open for
+# several awaits (INSERT, record lookup, rollup upsert, commit), so two of them on pooled
+# connections can run into each other: when both have read the database, SQLite reports
+# "database is locked" at once instead of waiting busy_timeout. Write transactions are
+# therefore serialized in-process: the first INSERT/UPDATE/DELETE of a transaction takes
+# the lock, its commit or rollback releases it. Reads never wait for it.
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+_write_lock = asyncio.Lock()
+
+
+def serialize_sqlite_writes(target: Engine):
+    """Register hooks that hold _write_lock from the first write of a transaction to its end"""
+    if target.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(target, "before_cursor_execute")
+    def _acquire_write_lock(conn, cursor, statement, parameters, context, executemany):
+        if conn.info.get("write_lock") or not statement.lstrip().upper().startswith(WRITE_STATEMENTS):
+            return
+        # Runs inside the greenlet of an AsyncSession call, so the lock can be awaited here
+        await_only(_write_lock.acquire())
+        conn.info["write_lock"] = True
+
+    def _release_write_lock(info: dict):
+        if info.pop("write_lock", False):
+            _write_lock.release()
+
+    @event.listens_for(target, "commit")
+    def _release_on_commit(conn):
+        _release_write_lock(conn.info)
+
+    @event.listens_for(target, "rollback")
+    def _release_on_rollback(conn):
+        _release_write_lock(conn.info)
+
+    @event.listens_for(target, "reset")
+    def _release_on_reset(dbapi_connection, connection_record, reset_state):
+        # Connection returned to the pool without commit/rollback through SQLAlchemy
+        _release_write_lock(connection_record.info)
+
+
 # Create database engine
 engine = create_engine(
-    f"sqlite:///{DB_PATH}",
+    DATABASE_URL,
     echo=False,  # Disable SQL logs
     future=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
     connect_args={"check_same_thread": False}
 )
+apply_sqlite_profile(engine)
+
+# Async engine for handlers running inside the aiogram event loop.
+# aiosqlite defaults to NullPool (new connection + thread per session), so pool explicitly.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT
+)
+apply_sqlite_profile(async_engine.sync_engine)
+serialize_sqlite_writes(async_engine.sync_engine)
 
 # Session factory
 SessionLocal = sessionmaker(
@@ -31,11 +154,53 @@ SessionLocal = sessionmaker(
     expire_on_commit=False
 )
 
+# Async session factory
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+def add_missing_columns(target: Engine = engine) -> list[str]:
+    """
+    Add nullable columns (and their indexes) that were added to the models
+    after a table was created - create_all() only creates missing tables.
+    Returns the added columns as "table.column".
+    """
+    added = []
+    with target.begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            missing = [column for column in table.columns if column.name not in existing]
+            for column in missing:
+                if not column.nullable:
+                    raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} automatically")
+                column_type = column.type.compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append(f"{table.name}.{column.name}")
+            if missing:
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+    return added
+
 
 def init_db():
-    """Initialize database (create all tables)"""
+    """Initialize database (create missing tables and columns)"""
     Base.metadata.create_all(bind=engine)
-    print(f"✅ Database initialized: {DB_PATH}")
+    for column in add_missing_columns():
+        print(f"✅ Added column {column}")
+    print(f"✅ Database initialized: {engine.url.database}")
+
+
+async def close_db():
+    """Close pooled connections (aiosqlite worker threads) on shutdown"""
+    await async_engine.dispose()
+    engine.dispose()
 
 
 @contextmanager
@@ -56,4 +221,26 @@ def get_session() -> Session:
         print(f"❌ Database error: {e}")
         raise
     finally:
-        session.close()
\ No newline at end of file
+        session.close()
+
+
+@asynccontextmanager
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    """
+    Async context manager for safe session handling.
+    Does not block the event loop while SQLite is busy.
+
+    Usage:
+        async with get_async_session() as session:
+            result = await session.execute(select(User))
+    """
+    session = AsyncSessionLocal()
+    try:
+        yield session
+        await session.commit()
+    except Exception as e:
+        await session.rollback()
+        print(f"❌ Database error: {e}")
+        raise
+    finally:
+        await session.close()
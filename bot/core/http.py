@@ -0,0 +1,147 @@
+"""
+Shared HTTP client for outgoing API calls (USDA FoodData Central, ...).
+
+One aiohttp session for the whole process, opened on dispatcher startup and
+closed on shutdown (bot/main.py):
+
+- TCPConnector with keep-alive, a DNS cache and per-host connection limits,
+  so bursts reuse a bounded set of connections instead of opening new ones
+- total / connect timeouts: a slow upstream cannot hold a handler forever
+- 429 and 5xx responses and network errors are retried with full-jitter
+  exponential backoff (Retry-After is honoured when the server sends it)
+- request, retry and error counters are exposed through stats()
+"""
+import asyncio
+import logging
+import os
+import random
+from typing import Any
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Settings (can be overridden from .env)
+HTTP_TOTAL_TIMEOUT = float(os.getenv("HTTP_TOTAL_TIMEOUT", "15"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "10"))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "30"))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "10"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HttpClient:
+    """
+    Usage:
+        await http_client.start()
+        status, data = await http_client.request_json("GET", url, params={...})
+        await http_client.stop()
+    """
+
+    def __init__(self, total_timeout: float = HTTP_TOTAL_TIMEOUT, connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+                 limit: int = HTTP_POOL_LIMIT, limit_per_host: int = HTTP_POOL_LIMIT_PER_HOST,
+                 keepalive: float = HTTP_KEEPALIVE, dns_ttl: int = HTTP_DNS_TTL,
+                 max_retries: int = HTTP_MAX_RETRIES, backoff_base: float = HTTP_BACKOFF_BASE,
+                 backoff_max: float = HTTP_BACKOFF_MAX):
+        self.timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive = keepalive
+        self.dns_ttl = dns_ttl
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._session: aiohttp.ClientSession | None = None
+
+        # Metrics
+        self.requests = 0
+        self.retried = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._session is not None and not self._session.closed
+
+    async def start(self):
+        if self.running:
+            return
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_ttl
+        )
+        self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    async def stop(self):
+        """Close the session and its pooled connections"""
+        if self._session is None:
+            return
+        session, self._session = self._session, None
+        await session.close()
+
+    async def session(self) -> aiohttp.ClientSession:
+        """The shared session (started on first use outside the bot, e.g. in scripts)"""
+        if not self.running:
+            await self.start()
+        return self._session
+
+    async def request_json(self, method: str, url: str, **kwargs) -> tuple[int, Any]:
+        """
+        Send a request and decode the JSON body of a 200 response.
+        Returns (status, data); data is None for other statuses.
+
+        429 / 5xx responses and network errors are retried; the final status
+        is returned, the final network error is raised.
+        """
+        session = await self.session()
+        attempt = 0
+        while True:
+            attempt += 1
+            self.requests += 1
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if response.status == 200:
+                        return response.status, await response.json()
+                    if response.status not in RETRY_STATUSES or attempt > self.max_retries:
+                        self.failed += 1
+                        return response.status, None
+                    delay = self._retry_after(response) or self._backoff(attempt)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt > self.max_retries:
+                    self.failed += 1
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"⚠️ {method} {url} failed ({e!r}), retrying in {delay:.1f}s")
+
+            self.retried += 1
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: uniform in [0, min(max, base * 2**attempt)]"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _retry_after(self, response: aiohttp.ClientResponse) -> float | None:
+        try:
+            return min(self.backoff_max, float(response.headers["Retry-After"]))
+        except (KeyError, ValueError):
+            return None
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            "running": self.running,
+            "requests": self.requests,
+            "retried": self.retried,
+            "failed": self.failed,
+        }
+
+
+# Shared instance, started/stopped from bot/main.py
+http_client = HttpClient()
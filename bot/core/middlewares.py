@@ -0,0 +1,45 @@
+"""
+Dispatcher-level middlewares shared by all features.
+"""
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User as TelegramUser
+
+from bot.features.dev1_workout_tracking.services import resolve_user
+
+
+class UserMiddleware(BaseMiddleware):
+    """
+    Resolves the sender once per update and injects it into handler data.
+
+    Handlers can simply declare the arguments they need:
+        async def handler(message: Message, lang: str): ...
+        async def handler(message: Message, user: CachedUser): ...
+
+    Register as an outer middleware on updates:
+        dp.update.outer_middleware(UserMiddleware())
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any]
+    ) -> Any:
+        from_user: TelegramUser | None = data.get("event_from_user")
+
+        if from_user is None or from_user.is_bot:
+            data["lang"] = "en"
+            return await handler(event, data)
+
+        # Cached profile when nothing changed, otherwise one get-or-create
+        user = await resolve_user(
+            telegram_id=from_user.id,
+            username=from_user.username,
+            first_name=from_user.first_name,
+            last_name=from_user.last_name
+        )
+        data["user"] = user
+        data["lang"] = user.language or "en"
+        return await handler(event, data)
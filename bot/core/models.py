@@ -84,6 +84,11 @@ class User(Base):
         back_populates="user",
         cascade="all, delete-orphan"
     )
+    personal_records: Mapped[list["PersonalRecord"]] = relationship(
+        "PersonalRecord",
+        back_populates="user",
+        cascade="all, delete-orphan"
+    )
 
     def __repr__(self):
         return f"<User(user_id={self.user_id}, telegram_id={self.telegram_id}, username={self.username})>"
@@ -146,6 +151,73 @@ class Workout(Base):
 
     def __repr__(self):
         return f"<Workout(workout_id={self.workout_id}, exercise={self.exercise}, {self.sets}x{self.reps}x{self.weight}kg)>"
+
+
+class PersonalRecord(Base):
+    """Best estimated 1RM per user and exercise, maintained on every /log"""
+    __tablename__ = "personal_records"
+
+    # Composite primary key: one row per (user, normalized exercise name)
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.user_id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    exercise_key: Mapped[str] = mapped_column(String(100), primary_key=True)
+
+    # Exercise name as the user last typed it (for display)
+    exercise: Mapped[str] = mapped_column(String(100), nullable=False)
+
+    # Record set
+    best_orm: Mapped[float] = mapped_column(Float, nullable=False)
+    weight: Mapped[float] = mapped_column(Float, nullable=False)
+    reps: Mapped[int] = mapped_column(Integer, nullable=False)
+    workout_id: Mapped[int | None] = mapped_column(
+        Integer,
+        ForeignKey("workouts.workout_id", ondelete="SET NULL"),
+        nullable=True
+    )
+
+    # Timestamp
+    achieved_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+    # Relationships
+    user: Mapped["User"] = relationship("User", back_populates="personal_records")
+
+    def __repr__(self):
+        return f"<PersonalRecord(user_id={self.user_id}, exercise_key={self.exercise_key}, best_orm={self.best_orm:.1f})>"
+
+
+# ============================================================================
+# PROGRESS STATISTICS MODELS - Dev3 feature
+# ============================================================================
+
+class WorkoutDailyStat(Base):
+    """Per-user daily rollup by muscle group, updated on every /log"""
+    __tablename__ = "workout_daily_stats"
+
+    # Composite primary key: one row per (user, UTC day, muscle group)
+    user_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("users.user_id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    day: Mapped[date_type] = mapped_column(Date, primary_key=True)
+    muscle_group: Mapped[str] = mapped_column(String(50), primary_key=True)
+
+    # Aggregates
+    volume: Mapped[float] = mapped_column(Float, default=0)        # sum(sets * reps * weight)
+    set_count: Mapped[int] = mapped_column(Integer, default=0)     # sum(sets)
+    entry_count: Mapped[int] = mapped_column(Integer, default=0)   # number of logged exercises
+    best_orm: Mapped[float] = mapped_column(Float, default=0)      # best estimated 1RM that day
+
+    def __repr__(self):
+        return f"<WorkoutDailyStat(user_id={self.user_id}, day={self.day}, muscle_group={self.muscle_group}, volume={self.volume})>"
+
+
 # ============================================================================
 # EXERCISE LIBRARY MODELS - Dev2 feature
 # ============================================================================
@@ -287,6 +359,29 @@ class TimerPreset(Base):
     def __repr__(self):
         return f"<TimerPreset(timer_preset_id={self.timer_preset_id}, name={self.name}, {self.hours}h {self.minutes}m {self.seconds}s)>"
     
+
+
+class RunningTimer(Base):
+    """Rest timers that are currently running, so they survive a restart"""
+    __tablename__ = "running_timers"
+
+    # Telegram user id - one running timer per user
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    message_id: Mapped[int | None] = mapped_column(Integer, nullable=True)  # "Timer started" message with the stop button
+    lang: Mapped[str] = mapped_column(String(10), default="en")
+
+    duration: Mapped[int] = mapped_column(Integer, nullable=False)  # seconds
+    ends_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True, nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+    def __repr__(self):
+        return f"<RunningTimer(user_id={self.user_id}, duration={self.duration}s, ends_at={self.ends_at})>"
+
     # ============================================================================
 # NUTRITION TRACKING MODELS - Dev7 feature
 # ============================================================================
@@ -365,6 +460,25 @@ class FoodCache(Base):
         return f"<FoodCache(food_cache_id={self.food_cache_id}, fdc_id={self.fdc_id}, name={self.name})>"
 
 
+class FoodSearchCache(Base):
+    """Cached USDA search results, keyed by the normalized query"""
+    __tablename__ = "food_search_cache"
+
+    query_key: Mapped[str] = mapped_column(String(300), primary_key=True)
+
+    # [{"fdcId": ..., "description": ...}, ...] in USDA's ranking order
+    results: Mapped[list] = mapped_column(JSON, nullable=False)
+
+    cached_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        index=True
+    )
+
+    def __repr__(self):
+        return f"<FoodSearchCache(query_key={self.query_key}, results={len(self.results)})>"
+
+
 class NutritionMeal(Base):
     """Daily meal log entries"""
     __tablename__ = "nutrition_meals"
@@ -441,6 +555,9 @@ class TrainingNotification(Base):
     hour: Mapped[int] = mapped_column(Integer, nullable=False)  # 0-23
     minute: Mapped[int] = mapped_column(Integer, nullable=False)  # 0-59
     reminder_minutes: Mapped[int] = mapped_column(Integer, nullable=False)  # Minutes before training
+
+    # Next reminder (UTC), kept up to date by the reminder scheduler so startup can reuse it
+    next_fire_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(
@@ -460,6 +577,7 @@ class TrainingNotification(Base):
     __table_args__ = (
         Index('idx_user_notifications', 'user_id'),
         Index('idx_weekday', 'weekday'),
+        Index('idx_notification_next_fire', 'next_fire_at'),
     )
     
     def get_time(self) -> time_type:
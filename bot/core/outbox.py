@@ -0,0 +1,300 @@
+"""
+Outbound message queue shared by all features.
+
+Background notifications (training reminders, rest timer completions) are not
+sent directly but queued here, so that a burst - e.g. every Monday 18:00
+reminder at once - is spread out within Telegram's limits instead of ending in
+a wall of 429 errors:
+
+- a global token bucket (OUTBOX_RATE messages per second)
+- a per-chat limit (OUTBOX_CHAT_RATE per second, bursts of OUTBOX_CHAT_BURST)
+- priority lanes: timer completions go out before reminders
+- TelegramRetryAfter pauses the whole queue for `retry_after` and re-queues the
+  message; network / server errors are retried with backoff
+- queue depth, wait time and error counters are exposed through stats()
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from enum import IntEnum
+from typing import Any, Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+
+logger = logging.getLogger(__name__)
+
+# Settings (can be overridden from .env)
+OUTBOX_RATE = float(os.getenv("OUTBOX_RATE", "25"))              # Telegram allows ~30 msg/s per bot
+OUTBOX_BURST = int(os.getenv("OUTBOX_BURST", "25"))
+OUTBOX_CHAT_RATE = float(os.getenv("OUTBOX_CHAT_RATE", "1"))     # ~1 msg/s per chat
+OUTBOX_CHAT_BURST = int(os.getenv("OUTBOX_CHAT_BURST", "3"))
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "16"))  # requests in flight
+OUTBOX_MAX_QUEUE = int(os.getenv("OUTBOX_MAX_QUEUE", "100000"))
+OUTBOX_MAX_RETRIES = int(os.getenv("OUTBOX_MAX_RETRIES", "3"))
+
+
+class Priority(IntEnum):
+    """Queue lanes, lower value goes out first"""
+    TIMER = 0
+    REMINDER = 1
+
+
+class OutboxFull(Exception):
+    """Too many messages are already queued"""
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second, at most `capacity` stored.
+
+    Usage:
+        bucket = TokenBucket(rate=30, capacity=30)
+        wait = bucket.reserve(time.monotonic())    # seconds until the token is usable
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def reserve(self, now: float) -> float:
+        """Take one token (possibly going into debt) and return how long to wait for it"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def idle(self, now: float) -> bool:
+        """True once the bucket would be full again (safe to forget)"""
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class _Job:
+    __slots__ = ("chat_id", "factory", "priority", "future", "enqueued_at", "attempts")
+
+    def __init__(self, chat_id: int, factory: Callable[[], Awaitable[Any]], priority: Priority,
+                 future: asyncio.Future, enqueued_at: float):
+        self.chat_id = chat_id
+        self.factory = factory
+        self.priority = priority
+        self.future = future
+        self.enqueued_at = enqueued_at
+        self.attempts = 0
+
+
+class OutboundQueue:
+    """
+    Rate-limited priority queue of Telegram API calls served by one dispatcher task.
+
+    Usage:
+        await outbox.start()
+        await outbox.send_message(bot, chat_id, "text", priority=Priority.REMINDER)
+        await outbox.submit(chat_id, lambda: bot.edit_message_reply_markup(...), Priority.TIMER)
+        await outbox.stop()
+    """
+
+    def __init__(self, rate: float = OUTBOX_RATE, burst: int = OUTBOX_BURST,
+                 chat_rate: float = OUTBOX_CHAT_RATE, chat_burst: int = OUTBOX_CHAT_BURST,
+                 concurrency: int = OUTBOX_CONCURRENCY, max_queue: int = OUTBOX_MAX_QUEUE,
+                 max_retries: int = OUTBOX_MAX_RETRIES, clock: Callable[[], float] = time.monotonic):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self._clock = clock
+        self._global = TokenBucket(rate, burst, clock())
+        self._chats: dict[int, TokenBucket] = {}
+        # One heap per lane of (not_before, seq, job); not_before comes from the chat's bucket
+        self._lanes: list[list[tuple[float, int, _Job]]] = [[] for _ in Priority]
+        self._counter = itertools.count()
+        self._paused_until = 0.0
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._task: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+        # Metrics
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rate_limited = 0       # 429 responses
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self._lanes)
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+
+    def submit(self, chat_id: int, factory: Callable[[], Awaitable[Any]],
+               priority: Priority = Priority.REMINDER) -> asyncio.Future:
+        """
+        Queue an API call; `factory()` must return a new coroutine on every call
+        (it is called again on retry). The returned future resolves to its result.
+
+        Raises:
+            OutboxFull: queue limit reached
+        """
+        if len(self) >= self.max_queue:
+            self.rejected += 1
+            raise OutboxFull(f"{len(self)} messages already queued")
+
+        now = self._clock()
+        future = asyncio.get_running_loop().create_future()
+        job = _Job(chat_id, factory, priority, future, now)
+        self._push(job, now + self._reserve_chat(chat_id, now))
+        return future
+
+    async def send_message(self, bot: Bot, chat_id: int, text: str,
+                           priority: Priority = Priority.REMINDER, **kwargs):
+        """Queue bot.send_message(chat_id, text, **kwargs) and wait until it is sent"""
+        return await self.submit(chat_id, lambda: bot.send_message(chat_id, text, **kwargs), priority)
+
+    def _reserve_chat(self, chat_id: int, now: float) -> float:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Forget chats that went quiet before tracking a new one
+            if len(self._chats) >= 10000:
+                self._chats = {cid: b for cid, b in self._chats.items() if not b.idle(now)}
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst, now)
+        return bucket.reserve(now)
+
+    def _push(self, job: _Job, not_before: float):
+        heapq.heappush(self._lanes[job.priority], (not_before, next(self._counter), job))
+        self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Dispatcher
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="outbox")
+
+    async def stop(self):
+        """Stop the dispatcher; queued and in-flight messages are cancelled"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        for inflight in list(self._inflight):
+            inflight.cancel()
+        await asyncio.gather(task, *self._inflight, return_exceptions=True)
+
+        for lane in self._lanes:
+            for _, _, job in lane:
+                job.future.cancel()
+            lane.clear()
+
+    def _next_job(self, now: float) -> tuple[_Job | None, float | None]:
+        """Highest-priority job that is due, else (None, seconds until one is)"""
+        wait = None
+        for lane in self._lanes:
+            if not lane:
+                continue
+            not_before = lane[0][0]
+            if not_before <= now:
+                return heapq.heappop(lane)[2], None
+            wait = not_before - now if wait is None else min(wait, not_before - now)
+        return None, wait
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = self._clock()
+
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            job, wait = self._next_job(now)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            if job.future.done():       # caller gave up (cancelled)
+                continue
+
+            delay = self._global.reserve(now)
+            if delay:
+                await asyncio.sleep(delay)
+
+            await self._slots.acquire()
+            task = asyncio.create_task(self._send(job))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, job: _Job):
+        try:
+            job.attempts += 1
+            result = await job.factory()
+        except TelegramRetryAfter as e:
+            # Flood control applies to the whole bot: pause everything, keep the message
+            self.rate_limited += 1
+            self._paused_until = max(self._paused_until, self._clock() + e.retry_after)
+            logger.warning(f"⚠️ Telegram flood control, pausing outbox for {e.retry_after}s")
+            self._retry(job, e.retry_after, e)
+        except (TelegramNetworkError, TelegramServerError) as e:
+            self._retry(job, 2 ** job.attempts, e)
+        except asyncio.CancelledError:
+            job.future.cancel()
+            raise
+        except Exception as e:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.sent += 1
+            waited = self._clock() - job.enqueued_at
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._slots.release()
+
+    def _retry(self, job: _Job, delay: float, error: Exception):
+        if job.attempts > self.max_retries or job.future.done():
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(error)
+            return
+        self.retried += 1
+        self._push(job, self._clock() + delay)
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            "running": self.running,
+            "queued": {priority.name.lower(): len(self._lanes[priority]) for priority in Priority},
+            "inflight": len(self._inflight),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "rate_limited": self.rate_limited,
+            "rejected": self.rejected,
+            "paused_for": max(0.0, self._paused_until - self._clock()),
+            "avg_wait": self.total_wait / self.sent if self.sent else 0.0,
+            "max_wait": self.max_wait,
+        }
+
+
+# Shared instance used by background notifications, started/stopped from bot/main.py
+outbox = OutboundQueue()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Заполнение производных таблиц по существующей истории тренировок:
+личные рекорды (personal_records) и дневная сводка для статистики (workout_daily_stats).
+При запуске бота это делается автоматически (ensure_derived_tables), если сводка
+отстаёт от истории; скрипт нужен для ручного пересчёта.
+"""
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_derived_tables() -> tuple[int, int]:
+    """Создаёт таблицы (если их нет) и пересчитывает рекорды и дневную сводку"""
+    from bot.core.database import init_db, close_db
+    from bot.features.dev1_workout_tracking.services import (
+        rebuild_personal_records,
+        rebuild_daily_stats
+    )
+
+    init_db()
+    try:
+        logger.info("📦 Rebuilding personal records...")
+        records = await rebuild_personal_records()
+        logger.info(f"✅ Stored {records} personal records")
+
+        logger.info("📦 Rebuilding daily statistics...")
+        daily_rows = await rebuild_daily_stats()
+        logger.info(f"✅ Stored {daily_rows} daily statistics rows")
+        return records, daily_rows
+    finally:
+        await close_db()
+
+
+# ============================================================================
+# STANDALONE SCRIPT EXECUTION
+# ============================================================================
+
+if __name__ == "__main__":
+    """
+    Запуск вручную:
+    python -m bot.features.dev1_workout_tracking.backfill_records
+    """
+    import sys
+    from pathlib import Path
+
+    # Add project root to path
+    ROOT_DIR = Path(__file__).parent.parent.parent.parent
+    sys.path.insert(0, str(ROOT_DIR))
+    sys.path.insert(0, str(ROOT_DIR / "bot"))
+
+    logging.basicConfig(level=logging.INFO)
+    records, daily_rows = asyncio.run(backfill_derived_tables())
+    print(f"\n🏆 Personal records ready: {records}")
+    print(f"📊 Daily statistics rows ready: {daily_rows}")
@@ -6,39 +6,37 @@ from aiogram import Router
 from aiogram.types import Message
 from aiogram.filters import Command
 from datetime import datetime, date
+import html
 import re
 
 from localization.utils import t
 
 from .services import (
-    get_or_create_user,
     log_workout,
+    log_workouts_batch,
     get_today_workouts,
     get_workouts_by_date,
     get_training_days_by_year,
     get_user_profile,
-    ensure_aware_datetime,
-    get_lang
+    ensure_aware_datetime
 )
 
 router = Router(name="workout_tracking")
 
+# One line of a multi-line /log: "<exercise name> SxRxW"
+BATCH_LINE_PATTERN = re.compile(r"^(.+?)\s+(\d+)x(\d+)x(\d+(?:\.\d+)?)$")
+MAX_BATCH_LINES = 30
+
 
 @router.message(Command("log"))
-async def log_workout_handler(message: Message):
+async def log_workout_handler(message: Message, lang: str):
     """
     Logs a workout.
     Format: /log Exercise 3x10x50
+    Several exercises at once: one "Exercise 3x10x50" per line
     """
-    lang = get_lang(message.from_user.id)
-
-    # Create/update user
-    get_or_create_user(
-        telegram_id=message.from_user.id,
-        username=message.from_user.username,
-        first_name=message.from_user.first_name,
-        last_name=message.from_user.last_name
-    )
+    if "\n" in message.text.strip():
+        return await log_batch_handler(message, lang)
 
     # Parse command
     parts = message.text.strip().split(maxsplit=2)
@@ -69,7 +67,7 @@ async def log_workout_handler(message: Message):
 
     try:
         # Log workout
-        workout, new_orm, prev_orm = log_workout(
+        workout, new_orm, prev_orm = await log_workout(
             telegram_id=message.from_user.id,
             exercise=exercise,
             sets=sets,
@@ -99,13 +97,63 @@ async def log_workout_handler(message: Message):
         await message.answer(t("error_1", lang, error=e))
 
 
+async def log_batch_handler(message: Message, lang: str):
+    """
+    Multi-line /log: the whole session is saved in one transaction
+    and answered with a single message.
+    """
+    # Drop the command itself, keep everything after it (first line may already hold an exercise)
+    body = message.text.strip().split(maxsplit=1)[1]
+    lines = [line.strip() for line in body.splitlines() if line.strip()]
+
+    if len(lines) > MAX_BATCH_LINES:
+        return await message.answer(t("batch_too_many_lines", lang, max=MAX_BATCH_LINES))
+
+    entries = []
+    for number, line in enumerate(lines, start=1):
+        pattern = BATCH_LINE_PATTERN.match(line)
+        if not pattern:
+            return await message.answer(
+                t("batch_invalid_line", lang, number=number, line=html.escape(line)),
+                parse_mode="HTML"
+            )
+
+        exercise, sets, reps, weight = pattern.groups()
+        sets, reps, weight = int(sets), int(reps), float(weight)
+        if sets <= 0 or reps <= 0 or weight <= 0:
+            return await message.answer(
+                t("batch_invalid_line", lang, number=number, line=html.escape(line)),
+                parse_mode="HTML"
+            )
+        entries.append((exercise, sets, reps, weight))
+
+    try:
+        results = await log_workouts_batch(message.from_user.id, entries)
+    except Exception as e:
+        return await message.answer(t("error_1", lang, error=e))
+
+    logged = [
+        f"• <b>{html.escape(w.exercise)}</b> — {w.sets}x{w.reps}x{w.weight} kg"
+        for w, _, _ in results
+    ]
+    text = t("batch_logged", lang, count=len(results), workouts="\n".join(logged))
+
+    records = [
+        f"🏆 <b>{html.escape(w.exercise)}</b>: {new_orm:.1f} ({prev_orm:.1f})"
+        for w, new_orm, prev_orm in results
+        if new_orm > prev_orm and prev_orm > 0
+    ]
+    if records:
+        text += "\n\n" + t("batch_new_records", lang, records="\n".join(records))
+
+    await message.answer(text, parse_mode="HTML")
+
+
 @router.message(Command("today"))
-async def today(message: Message):
+async def today(message: Message, lang: str):
     """Shows today's workouts"""
-    lang = get_lang(message.from_user.id)
-
     try:
-        workouts = get_today_workouts(message.from_user.id)
+        workouts = await get_today_workouts(message.from_user.id)
 
         if not workouts:
             today_date = date.today()
@@ -131,13 +179,11 @@ async def today(message: Message):
 
 
 @router.message(Command("check_training"))
-async def check_training(message: Message):
+async def check_training(message: Message, lang: str):
     """
     Shows workouts for a specific date.
     Format: /check_training DD.MM.YYYY
     """
-    lang = get_lang(message.from_user.id)
-
     parts = message.text.split()
     if len(parts) != 2:
         return await message.answer(
@@ -158,7 +204,7 @@ async def check_training(message: Message):
 
     try:
         # Get workouts
-        workouts = get_workouts_by_date(message.from_user.id, target_date)
+        workouts = await get_workouts_by_date(message.from_user.id, target_date)
 
         if not workouts:
             return await message.answer(
@@ -182,13 +228,11 @@ async def check_training(message: Message):
 
 
 @router.message(Command("list_trainings"))
-async def list_trainings(message: Message):
+async def list_trainings(message: Message, lang: str):
     """
     Shows workout calendar for the year.
     Format: /list_trainings [year]
     """
-    lang = get_lang(message.from_user.id)
-
     parts = message.text.split()
 
     if len(parts) == 1:
@@ -211,7 +255,7 @@ async def list_trainings(message: Message):
 
     try:
         # Get data
-        monthly_data = get_training_days_by_year(message.from_user.id, year)
+        monthly_data = await get_training_days_by_year(message.from_user.id, year)
 
         if not monthly_data:
             return await message.answer(t("no_workout_records_year", lang, year=year))
@@ -248,12 +292,10 @@ async def list_trainings(message: Message):
 
 
 @router.message(Command("profile"))
-async def show_profile(message: Message):
+async def show_profile(message: Message, lang: str):
     """Shows user profile with complete statistics"""
-    lang = get_lang(message.from_user.id)
-
     try:
-        profile_data = get_user_profile(message.from_user.id)
+        profile_data = await get_user_profile(message.from_user.id)
 
         if not profile_data or not profile_data['user']:
             return await message.answer(
@@ -299,12 +341,10 @@ async def show_profile(message: Message):
 
 
 @router.message(Command("stats"))
-async def show_stats(message: Message):
+async def show_stats(message: Message, lang: str):
     """Shows brief workout statistics"""
-    lang = get_lang(message.from_user.id)
-
     try:
-        profile_data = get_user_profile(message.from_user.id)
+        profile_data = await get_user_profile(message.from_user.id)
 
         if not profile_data or profile_data['total_workouts'] == 0:
             return await message.answer(
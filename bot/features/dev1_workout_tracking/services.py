@@ -2,19 +2,22 @@
 Бизнес-логика для работы с тренировками и пользователями.
 Все операции с БД вынесены сюда из handlers.
 """
-from sqlalchemy import extract, func
+from sqlalchemy import case, delete, extract, func, insert, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from datetime import datetime, timezone, date, timedelta
 from typing import Optional
 
-from bot.core.models import User, Workout
-from bot.core.database import get_session
+from bot.core.models import User, Workout, PersonalRecord, WorkoutDailyStat
+from bot.core.database import get_async_session
+from bot.core.cache import CachedUser, user_cache
+from bot.features.dev3_progress_stats.muscle_groups import exercise_to_muscle
 
 
 # ==========================================
 # РАБОТА С ПОЛЬЗОВАТЕЛЯМИ
 # ==========================================
 
-def get_or_create_user(
+async def get_or_create_user(
     telegram_id: int,
     username: str | None = None,
     first_name: str | None = None,
@@ -23,56 +26,82 @@ def get_or_create_user(
     """
     Получает пользователя из БД или создаёт нового.
     Обновляет данные если они изменились.
+    Один UPSERT по telegram_id: первые апдейты нового пользователя приходят
+    параллельно (альбом, быстрые нажатия) и не должны падать на unique.
     """
-    with get_session() as session:
-        user = session.query(User).filter_by(telegram_id=telegram_id).first()
-        
-        if user:
-            # Обновляем данные если изменились
-            updated = False
-            if username and username != user.username:
-                user.username = username
-                updated = True
-            if first_name and first_name != user.first_name:
-                user.first_name = first_name
-                updated = True
-            if last_name and last_name != user.last_name:
-                user.last_name = last_name
-                updated = True
-            
-            if updated:
-                user.updated_at = datetime.now(timezone.utc)
-                session.commit()
-        else:
-            # Создаём нового пользователя
-            user = User(
-                telegram_id=telegram_id,
-                username=username,
-                first_name=first_name,
-                last_name=last_name
-            )
-            session.add(user)
-            session.commit()
+    stmt = sqlite_insert(User).values(
+        telegram_id=telegram_id,
+        username=username,
+        first_name=first_name,
+        last_name=last_name
+    )
+    # Пустые значения из Telegram не затирают сохранённые
+    changed = [
+        stmt.excluded[field].is_not(None) & getattr(User, field).is_distinct_from(stmt.excluded[field])
+        for field in ("username", "first_name", "last_name")
+    ]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["telegram_id"],
+        set_={
+            "username": func.coalesce(stmt.excluded.username, User.username),
+            "first_name": func.coalesce(stmt.excluded.first_name, User.first_name),
+            "last_name": func.coalesce(stmt.excluded.last_name, User.last_name),
+            "updated_at": datetime.now(timezone.utc)
+        },
+        where=or_(*changed)
+    )
+    
+    async with get_async_session() as session:
+        await session.execute(stmt)
+        result = await session.execute(select(User).filter_by(telegram_id=telegram_id))
+        user = result.scalars().one()
         
-        session.refresh(user)
+        user_cache.set(telegram_id, CachedUser.from_model(user))
         return user
 
 
-def get_user_profile(telegram_id: int) -> dict | None:
+async def resolve_user(
+    telegram_id: int,
+    username: str | None = None,
+    first_name: str | None = None,
+    last_name: str | None = None
+) -> CachedUser:
+    """
+    Возвращает профиль отправителя апдейта.
+    Если кэш актуален и данные из Telegram не изменились - без запросов к БД,
+    иначе одна операция get_or_create_user (все изменённые поля одним UPDATE).
+    """
+    cached = user_cache.get(telegram_id)
+    if cached is not None and not (
+        (username and username != cached.username)
+        or (first_name and first_name != cached.first_name)
+        or (last_name and last_name != cached.last_name)
+    ):
+        return cached
+
+    user = await get_or_create_user(telegram_id, username, first_name, last_name)
+    return CachedUser.from_model(user)
+
+
+async def get_user_profile(telegram_id: int) -> dict | None:
     """
     Получает полную информацию о пользователе + статистику.
     """
-    with get_session() as session:
-        user = session.query(User).filter_by(telegram_id=telegram_id).first()
+    async with get_async_session() as session:
+        result = await session.execute(select(User).filter_by(telegram_id=telegram_id))
+        user = result.scalars().first()
         if not user:
             return None
         
         # Статистика тренировок
-        workout_stats = session.query(
-            func.count(Workout.workout_id).label('total_workouts'),
-            func.max(Workout.created_at).label('last_workout'),
-            func.min(Workout.created_at).label('first_workout')
-        ).filter(Workout.user_id == telegram_id).first()
+        result = await session.execute(
+            select(
+                func.count(Workout.workout_id).label('total_workouts'),
+                func.max(Workout.created_at).label('last_workout'),
+                func.min(Workout.created_at).label('first_workout')
+            ).filter(Workout.user_id == telegram_id)
+        )
+        workout_stats = result.first()
         
         return {
             'user': user,
@@ -82,20 +111,11 @@ def get_user_profile(telegram_id: int) -> dict | None:
         }
 
 
-def increment_workout_count(telegram_id: int):
-    """Увеличивает счётчик тренировок пользователя"""
-    with get_session() as session:
-        user = session.query(User).filter_by(telegram_id=telegram_id).first()
-        if user:
-            user.workout_count += 1
-            session.commit()
-
-
 # ==========================================
 # РАБОТА С ТРЕНИРОВКАМИ
 # ==========================================
 
-def log_workout(
+async def log_workout(
     telegram_id: int,
     exercise: str,
     sets: int,
@@ -104,105 +124,153 @@ def log_workout(
 ) -> tuple[Workout, float, float]:
     """
     Логирует тренировку и возвращает данные о новом и предыдущем 1RM.
+    Запись, личный рекорд и счётчик тренировок обновляются одной транзакцией.
     
     Returns:
         (workout, new_orm, prev_orm)
     """
-    with get_session() as session:
-        # Создаём запись тренировки
-        workout = Workout(
-            user_id=telegram_id,
-            exercise=exercise,
-            sets=sets,
-            reps=reps,
-            weight=weight,
-            created_at=datetime.now(timezone.utc)
+    results = await log_workouts_batch(telegram_id, [(exercise, sets, reps, weight)])
+    return results[0]
+
+
+async def log_workouts_batch(
+    telegram_id: int,
+    entries: list[tuple[str, int, int, float]]
+) -> list[tuple[Workout, float, float]]:
+    """
+    Логирует несколько упражнений (exercise, sets, reps, weight) за одну транзакцию:
+    один INSERT (executemany), один запрос рекордов, один UPDATE счётчика, один коммит.
+    
+    prev_orm для каждой строки - лучший 1RM до неё, с учётом предыдущих строк пакета
+    (как если бы упражнения записывались по одному).
+    
+    Returns:
+        [(workout, new_orm, prev_orm), ...] в порядке entries
+    """
+    if not entries:
+        return []
+    
+    created_at = datetime.now(timezone.utc)
+    
+    async with get_async_session() as session:
+        # Пакетная вставка с RETURNING - получаем workout_id без повторных запросов
+        result = await session.scalars(
+            insert(Workout).returning(Workout, sort_by_parameter_order=True),
+            [
+                {
+                    "user_id": telegram_id,
+                    "exercise": exercise,
+                    "sets": sets,
+                    "reps": reps,
+                    "weight": weight,
+                    "created_at": created_at
+                }
+                for exercise, sets, reps, weight in entries
+            ]
         )
-        session.add(workout)
-        session.commit()
-        session.refresh(workout)
+        workouts = result.all()
         
-        # Вычисляем 1RM для нового сета
-        new_orm = calculate_one_rep_max(weight, reps)
-        
-        # Получаем предыдущий лучший 1RM
-        prev_workouts = (
-            session.query(Workout)
-            .filter(
-                Workout.user_id == telegram_id,
-                Workout.exercise.ilike(exercise),
-                Workout.workout_id != Workout.workout_id
+        # Текущие рекорды по всем упражнениям пакета - один запрос по первичному ключу
+        keys = {normalize_exercise_key(exercise) for exercise, _, _, _ in entries}
+        result = await session.execute(
+            select(PersonalRecord).filter(
+                PersonalRecord.user_id == telegram_id,
+                PersonalRecord.exercise_key.in_(keys)
             )
-            .all()
         )
+        records = {record.exercise_key: record for record in result.scalars()}
         
-        prev_orm = 0.0
-        if prev_workouts:
-            prev_orm = max(
-                calculate_one_rep_max(w.weight, w.reps) 
-                for w in prev_workouts
-            )
+        results = []
+        for workout in workouts:
+            new_orm = calculate_one_rep_max(workout.weight, workout.reps)
+            exercise_key = normalize_exercise_key(workout.exercise)
+            record = records.get(exercise_key)
+            prev_orm = record.best_orm if record else 0.0
+            
+            if record is None:
+                record = PersonalRecord(user_id=telegram_id, exercise_key=exercise_key)
+                session.add(record)
+                records[exercise_key] = record
+            if record.best_orm is None or new_orm > record.best_orm:
+                record.exercise = workout.exercise
+                record.best_orm = new_orm
+                record.weight = workout.weight
+                record.reps = workout.reps
+                record.workout_id = workout.workout_id
+                record.achieved_at = workout.created_at
+            
+            results.append((workout, new_orm, prev_orm))
+        
+        # Дневная сводка для статистики (dev3) - в той же транзакции
+        await update_daily_stats(session, telegram_id, workouts)
         
-        # Увеличиваем счётчик
-        increment_workout_count(telegram_id)
+        # Счётчик тренировок - атомарный UPDATE в той же транзакции
+        await session.execute(
+            update(User)
+            .where(User.telegram_id == telegram_id)
+            .values(workout_count=User.workout_count + len(workouts))
+        )
         
-        return workout, new_orm, prev_orm
+        # Один коммит (и один fsync) на всю операцию
+        await session.commit()
+    
+    return results
 
 
-def get_today_workouts(telegram_id: int) -> list[Workout]:
+async def get_today_workouts(telegram_id: int) -> list[Workout]:
     """Возвращает все тренировки за сегодня"""
-    with get_session() as session:
+    async with get_async_session() as session:
         today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
         tomorrow = today + timedelta(days=1)
         
-        workouts = (
-            session.query(Workout)
+        result = await session.execute(
+            select(Workout)
             .filter(
                 Workout.user_id == telegram_id,
                 Workout.created_at >= today,
                 Workout.created_at < tomorrow
             )
             .order_by(Workout.created_at.asc())
-            .all()
         )
+        workouts = result.scalars().all()
         
         return workouts
 
 
-def get_workouts_by_date(telegram_id: int, target_date: date) -> list[Workout]:
+async def get_workouts_by_date(telegram_id: int, target_date: date) -> list[Workout]:
     """Возвращает тренировки за конкретную дату"""
-    with get_session() as session:
+    async with get_async_session() as session:
         start_dt = datetime.combine(target_date, datetime.min.time()).replace(tzinfo=timezone.utc)
         end_dt = start_dt + timedelta(days=1)
         
-        workouts = (
-            session.query(Workout)
+        result = await session.execute(
+            select(Workout)
             .filter(
                 Workout.user_id == telegram_id,
                 Workout.created_at >= start_dt,
                 Workout.created_at < end_dt
             )
             .order_by(Workout.created_at.asc())
-            .all()
         )
+        workouts = result.scalars().all()
         
         return workouts
 
 
-def get_training_days_by_year(telegram_id: int, year: int) -> dict[int, list[int]]:
+async def get_training_days_by_year(telegram_id: int, year: int) -> dict[int, list[int]]:
     """
     Возвращает словарь: месяц -> список дней с тренировками.
     """
-    with get_session() as session:
-        workouts = (
-            session.query(Workout)
+    async with get_async_session() as session:
+        result = await session.execute(
+            select(Workout)
             .filter(
                 Workout.user_id == telegram_id,
                 extract('year', Workout.created_at) == year
             )
             .order_by(Workout.created_at.asc())
-            .all()
         )
+        workouts = result.scalars().all()
         
         if not workouts:
             return {}
@@ -224,27 +292,209 @@ def get_training_days_by_year(telegram_id: int, year: int) -> dict[int, list[int
         }
 
 
+async def update_daily_stats(session, telegram_id: int, workouts: list[Workout]):
+    """
+    Добавляет тренировки в дневную сводку workout_daily_stats
+    (пользователь, день UTC, группа мышц) одним UPSERT.
+    """
+    rollup: dict[tuple[date, str], dict] = {}
+    for workout in workouts:
+        key = (
+            ensure_aware_datetime(workout.created_at).astimezone(timezone.utc).date(),
+            exercise_to_muscle.get(workout.exercise, "Other")
+        )
+        row = rollup.setdefault(key, {
+            "user_id": telegram_id,
+            "day": key[0],
+            "muscle_group": key[1],
+            "volume": 0.0,
+            "set_count": 0,
+            "entry_count": 0,
+            "best_orm": 0.0
+        })
+        row["volume"] += workout.sets * workout.reps * workout.weight
+        row["set_count"] += workout.sets
+        row["entry_count"] += 1
+        row["best_orm"] = max(row["best_orm"], calculate_one_rep_max(workout.weight, workout.reps))
+    
+    if not rollup:
+        return
+    
+    # Атомарное увеличение существующих строк, без чтения перед записью
+    stmt = sqlite_insert(WorkoutDailyStat).values(list(rollup.values()))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "day", "muscle_group"],
+        set_={
+            "volume": WorkoutDailyStat.volume + stmt.excluded.volume,
+            "set_count": WorkoutDailyStat.set_count + stmt.excluded.set_count,
+            "entry_count": WorkoutDailyStat.entry_count + stmt.excluded.entry_count,
+            "best_orm": func.max(WorkoutDailyStat.best_orm, stmt.excluded.best_orm)
+        }
+    )
+    await session.execute(stmt)
+
+
+async def rebuild_daily_stats() -> int:
+    """
+    Пересчитывает дневную сводку workout_daily_stats по всей истории.
+    Агрегация по (пользователь, день, упражнение) выполняется в SQL,
+    в Python остаётся только сопоставление упражнения с группой мышц.
+    
+    Returns:
+        количество строк сводки
+    """
+    # Та же формула Brzycki, что и calculate_one_rep_max
+    orm = case(
+        ((Workout.reps == 1) | (Workout.reps > 36), Workout.weight),
+        else_=Workout.weight / (1.0278 - 0.0278 * Workout.reps)
+    )
+    day = func.date(Workout.created_at)
+    
+    rollup: dict[tuple[int, str, str], dict] = {}
+    async with get_async_session() as session:
+        result = await session.execute(
+            select(
+                Workout.user_id,
+                day,
+                Workout.exercise,
+                func.sum(Workout.sets * Workout.reps * Workout.weight),
+                func.sum(Workout.sets),
+                func.count(),
+                func.max(orm)
+            ).group_by(Workout.user_id, day, Workout.exercise)
+        )
+        for user_id, day_str, exercise, volume, set_count, entry_count, best_orm in result:
+            muscle = exercise_to_muscle.get(exercise, "Other")
+            row = rollup.setdefault((user_id, day_str, muscle), {
+                "user_id": user_id,
+                "day": date.fromisoformat(day_str),
+                "muscle_group": muscle,
+                "volume": 0.0,
+                "set_count": 0,
+                "entry_count": 0,
+                "best_orm": 0.0
+            })
+            row["volume"] += volume or 0.0
+            row["set_count"] += set_count or 0
+            row["entry_count"] += entry_count
+            row["best_orm"] = max(row["best_orm"], best_orm or 0.0)
+        
+        await session.execute(delete(WorkoutDailyStat))
+        if rollup:
+            await session.execute(insert(WorkoutDailyStat), list(rollup.values()))
+        await session.commit()
+    
+    return len(rollup)
+
+
+async def ensure_derived_tables() -> bool:
+    """
+    Проверяет при запуске, что дневная сводка покрывает все записанные тренировки,
+    и иначе пересчитывает сводку и личные рекорды.
+    Так история, записанная до появления таблиц, не пропадает из /statistics
+    после первого нового /log, даже если backfill_records никто не запускал.
+    
+    Returns:
+        True, если таблицы были пересчитаны
+    """
+    async with get_async_session() as session:
+        logged = await session.scalar(select(func.count()).select_from(Workout))
+        rolled_up = await session.scalar(select(func.coalesce(func.sum(WorkoutDailyStat.entry_count), 0)))
+    
+    if logged == rolled_up:
+        return False
+    
+    await rebuild_daily_stats()
+    await rebuild_personal_records()
+    return True
+
+
+async def rebuild_personal_records() -> int:
+    """
+    Пересчитывает таблицу личных рекордов по всей истории тренировок.
+    Используется для заполнения таблицы по уже существующим данным.
+    
+    Returns:
+        количество записанных рекордов
+    """
+    best: dict[tuple[int, str], Workout] = {}
+    
+    async with get_async_session() as session:
+        # Потоковое чтение, чтобы не держать всю историю в памяти
+        result = await session.stream(
+            select(Workout).order_by(Workout.created_at.asc()).execution_options(yield_per=1000)
+        )
+        async for workout in result.scalars():
+            key = (workout.user_id, normalize_exercise_key(workout.exercise))
+            current = best.get(key)
+            if current is None or (
+                calculate_one_rep_max(workout.weight, workout.reps)
+                > calculate_one_rep_max(current.weight, current.reps)
+            ):
+                best[key] = workout
+        
+        await session.execute(delete(PersonalRecord))
+        session.add_all(
+            PersonalRecord(
+                user_id=user_id,
+                exercise_key=exercise_key,
+                exercise=w.exercise,
+                best_orm=calculate_one_rep_max(w.weight, w.reps),
+                weight=w.weight,
+                reps=w.reps,
+                workout_id=w.workout_id,
+                achieved_at=w.created_at
+            )
+            for (user_id, exercise_key), w in best.items()
+        )
+        await session.commit()
+    
+    return len(best)
+
+
 # ==========================================
 # РАБОТА С ЯЗЫКОМ
 # ==========================================
 
-def get_lang(telegram_id: int) -> str:
-    """Получает язык пользователя из БД"""
-    with get_session() as session:
-        user = session.query(User).filter_by(telegram_id=telegram_id).first()
-        if user and user.language:
-            return user.language
-        return "en"  # По умолчанию английский
+async def get_cached_user(telegram_id: int) -> CachedUser | None:
+    """
+    Возвращает профиль пользователя из кэша.
+    При промахе читает из БД и кладёт результат в кэш.
+    """
+    cached = user_cache.get(telegram_id)
+    if cached is not None:
+        return cached
+
+    async with get_async_session() as session:
+        result = await session.execute(select(User).filter_by(telegram_id=telegram_id))
+        user = result.scalars().first()
+        if not user:
+            return None
+
+        cached = CachedUser.from_model(user)
+        user_cache.set(telegram_id, cached)
+        return cached
+
 
+async def get_lang(telegram_id: int) -> str:
+    """Получает язык пользователя (из кэша, при промахе из БД)"""
+    cached = await get_cached_user(telegram_id)
+    if cached and cached.language:
+        return cached.language
+    return "en"  # По умолчанию английский
 
-def set_user_language(telegram_id: int, language: str):
+
+async def set_user_language(telegram_id: int, language: str):
     """Устанавливает язык пользователя"""
-    with get_session() as session:
-        user = session.query(User).filter_by(telegram_id=telegram_id).first()
+    async with get_async_session() as session:
+        result = await session.execute(select(User).filter_by(telegram_id=telegram_id))
+        user = result.scalars().first()
         if user:
             user.language = language
             user.updated_at = datetime.now(timezone.utc)
-            session.commit()
+            await session.commit()
+            # Write-through: следующее сообщение сразу получит новый язык
+            user_cache.set(telegram_id, CachedUser.from_model(user))
 
 
 # ==========================================
@@ -263,6 +513,14 @@ def calculate_one_rep_max(weight: float, reps: int) -> float:
     return weight / (1.0278 - 0.0278 * reps)
 
 
+def normalize_exercise_key(exercise: str) -> str:
+    """
+    Ключ упражнения для личных рекордов:
+    без лишних пробелов и без учёта регистра ("Bench  press" == "bench press").
+    """
+    return " ".join(exercise.split()).casefold()
+
+
 def ensure_aware_datetime(dt: datetime) -> datetime:
     """Преобразует naive datetime в aware (UTC)"""
     if dt.tzinfo is None:
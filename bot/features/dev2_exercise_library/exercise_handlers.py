@@ -16,7 +16,6 @@ from aiogram.types import (
 )
 
 from localization.utils import t
-from bot.features.dev1_workout_tracking.services import get_lang
 
 from .exercise_db import ExerciseDatabase
 
@@ -170,18 +169,16 @@ def create_inline_keyboard(items: List[str], prefix: str, lang: str, translation
 
 # Command handlers
 @exercise_router.message(Command("exercise"))
-async def cmd_exercise(message: Message, state: FSMContext):
+async def cmd_exercise(message: Message, state: FSMContext, lang: str):
     """Handle /exercise command - start exercise selection"""
-    lang = get_lang(message.from_user.id)
     await state.clear()
     await state.update_data(lang=lang)
     await start_exercise_selection(message, state)
 
 
 @exercise_router.message(Command("exercise_stats"))
-async def cmd_exercise_stats(message: Message):
+async def cmd_exercise_stats(message: Message, lang: str):
     """Handle /exercise_stats command - show database statistics"""
-    lang = get_lang(message.from_user.id)
     stats = db.get_database_stats()
 
     await message.answer(
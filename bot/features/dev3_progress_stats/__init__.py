@@ -10,22 +10,8 @@ This module provides comprehensive workout statistics including:
 - Personalized training recommendations
 
 All data is stored in the unified database (bot/core/models.py).
-"""
-
-from .stats_handlers import stats_router
-from .utils_funcs import (
-    one_rep_max,
-    calculate_volume,
-    compute_weekly_volume,
-    compute_muscle_group_stats,
-    group_muscle_volume_by_week
-)
 
-__all__ = [
-    'stats_router',
-    'one_rep_max',
-    'calculate_volume',
-    'compute_weekly_volume',
-    'compute_muscle_group_stats',
-    'group_muscle_volume_by_week'
-]
\ No newline at end of file
+Nothing is imported here: the chart worker processes import charts.py from
+this package and must not pull in aiogram, the database or the handlers.
+Import from the modules directly (stats_handlers.stats_router, utils_funcs, ...).
+"""
@@ -0,0 +1,157 @@
+"""
+Chart cache - Dev3 Feature
+
+Content-addressed: the key is a hash of (user, chart type, aggregated input
+data, lang), so a chart is re-rendered only when its data actually changed.
+
+Two tiers:
+- memory: LRU (core TTLCache) with the PNG and, after the first upload,
+  the Telegram file_id - repeat views send the file_id, no re-upload
+- disk (optional, CHART_CACHE_DIR): PNGs survive restarts and memory eviction
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from bot.core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Settings (can be overridden from .env)
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "256"))
+CHART_CACHE_TTL = float(os.getenv("CHART_CACHE_TTL", "86400"))
+CHART_CACHE_DIR = os.getenv("CHART_CACHE_DIR") or None
+
+# Expired files are swept from the disk tier every N writes
+DISK_PRUNE_EVERY = 100
+
+
+@dataclass(slots=True)
+class CachedChart:
+    """PNG bytes and/or the file_id Telegram gave us for them"""
+    png: bytes | None = None
+    file_id: str | None = None
+
+
+class ChartCache:
+    """
+    Usage:
+        key = chart_cache.make_key(user_id, "heat_map", data, lang)
+        cached = await chart_cache.get(key)
+        ...
+        await chart_cache.put(key, png)
+        chart_cache.set_file_id(key, file_id)
+    """
+
+    def __init__(self, maxsize: int = CHART_CACHE_SIZE, ttl: float = CHART_CACHE_TTL,
+                 disk_dir: str | Path | None = CHART_CACHE_DIR):
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        # Metrics (memory hits/misses are in self.memory.stats())
+        self.disk_hits = 0
+        self.file_id_hits = 0
+        self._disk_writes = 0
+
+    @staticmethod
+    def make_key(user_id: int, chart_type: str, data, lang: str) -> str:
+        """Fingerprint of everything that affects the rendered chart"""
+        payload = json.dumps([user_id, chart_type, data, lang], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str) -> CachedChart | None:
+        """Memory first, then the disk tier (promoted back into memory)"""
+        cached = self.memory.get(key)
+        if cached is not None:
+            if cached.file_id:
+                self.file_id_hits += 1
+            return cached
+
+        if self.disk_dir is None:
+            return None
+
+        png = await asyncio.to_thread(self._read_disk, key)
+        if png is None:
+            return None
+
+        self.disk_hits += 1
+        cached = CachedChart(png=png)
+        self.memory.set(key, cached)
+        return cached
+
+    async def put(self, key: str, png: bytes):
+        """Store a freshly rendered PNG"""
+        self.memory.set(key, CachedChart(png=png))
+
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._write_disk, key, png)
+            self._disk_writes += 1
+            if self._disk_writes % DISK_PRUNE_EVERY == 0:
+                await asyncio.to_thread(self.prune_disk)
+
+    def set_file_id(self, key: str, file_id: str):
+        """
+        Remember the uploaded file_id. The PNG is dropped from memory -
+        Telegram already has it (and the disk tier keeps a copy if enabled).
+        """
+        self.memory.set(key, CachedChart(file_id=file_id))
+
+    def forget_file_id(self, key: str):
+        """file_id was rejected by Telegram - fall back to the PNG next time"""
+        self.memory.pop(key)
+
+    def prune_disk(self) -> int:
+        """Delete expired PNGs from the disk tier"""
+        if self.disk_dir is None:
+            return 0
+        removed = 0
+        expire_before = time.time() - self.ttl
+        for path in self.disk_dir.glob("*.png"):
+            try:
+                if path.stat().st_mtime < expire_before:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def _read_disk(self, key: str) -> bytes | None:
+        path = self.disk_dir / f"{key}.png"
+        try:
+            if path.stat().st_mtime < time.time() - self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def _write_disk(self, key: str, png: bytes):
+        # Write + rename so a concurrent reader never sees a partial file
+        path = self.disk_dir / f"{key}.png"
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            tmp_path.write_bytes(png)
+            tmp_path.replace(path)
+        except OSError as e:
+            logger.warning(f"⚠️ Chart cache disk write failed: {e}")
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            **self.memory.stats(),
+            "file_id_hits": self.file_id_hits,
+            "disk_enabled": self.disk_dir is not None,
+            "disk_hits": self.disk_hits,
+        }
+
+
+# Shared instance used by the stats handlers
+chart_cache = ChartCache()
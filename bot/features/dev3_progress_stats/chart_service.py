@@ -0,0 +1,205 @@
+"""
+Chart rendering service - Dev3 Feature
+
+Runs the renderers from charts.py in a pool of worker processes so that
+matplotlib never blocks the event loop. Handlers just `await render(...)`.
+
+- workers are pre-warmed at startup (matplotlib imported, Agg loaded); the
+  bot process itself never imports the analytics stack
+- the number of queued + running jobs is bounded; extra requests are rejected
+- every job has a timeout; a timed-out job that already started still counts
+  against the limit until its worker is free again
+- every failure reaches the caller as a ChartServiceError (queue full, timeout,
+  dead worker, renderer error), so handlers can always answer the user
+- queue depth, latency and failure counters are exposed through stats()
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import sys
+import time
+import types
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from . import charts
+
+logger = logging.getLogger(__name__)
+
+# Settings (can be overridden from .env)
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))
+CHART_QUEUE_SIZE = int(os.getenv("CHART_QUEUE_SIZE", "16"))
+CHART_TIMEOUT = float(os.getenv("CHART_TIMEOUT", "20"))
+
+
+class ChartServiceError(Exception):
+    """Base error for chart rendering"""
+
+
+class ChartQueueFull(ChartServiceError):
+    """Too many charts are already queued"""
+
+
+class ChartTimeout(ChartServiceError):
+    """A chart took longer than the per-job timeout"""
+
+
+class ChartWorkerDied(ChartServiceError):
+    """A worker process died (e.g. OOM kill); the pool is recreated on the next request"""
+
+
+class ChartRenderError(ChartServiceError):
+    """The renderer raised an exception (logged with its traceback)"""
+
+
+@contextmanager
+def _main_module_hidden():
+    """
+    forkserver and spawn workers re-run the parent's main module (as __mp_main__)
+    before their first job; for the bot that is bot.main with aiogram and every
+    feature. The renderers only need charts.py, so workers are started without it.
+    """
+    main_module = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main_module
+
+
+class ChartRenderService:
+    """
+    Process pool for chart rendering.
+
+    Usage:
+        service = ChartRenderService(workers=2)
+        await service.start()
+        png = await service.render(charts.render_volume, weeks, volumes)
+        await service.stop()
+    """
+
+    def __init__(self, workers: int = CHART_WORKERS, max_queue: int = CHART_QUEUE_SIZE,
+                 timeout: float = CHART_TIMEOUT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor: ProcessPoolExecutor | None = None
+        self._inflight: set[Future] = set()     # jobs submitted to the pool and not finished yet
+
+        # Metrics
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.total_render_time = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    @property
+    def queue_depth(self) -> int:
+        """Queued + running jobs, including timed-out ones still occupying a worker"""
+        return len(self._inflight)
+
+    async def start(self):
+        """Create the pool and pre-warm every worker"""
+        if self._executor is not None:
+            return
+
+        # Not fork: the bot process runs threads (database, asyncio.to_thread), and forking it
+        # can copy a held lock into the worker - especially on a restart after a worker died.
+        # The forkserver process imports charts.py (stdlib only, the dev3 package root imports
+        # nothing) and forks the workers from there; spawn is the fallback where it is missing
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        if context.get_start_method() == "forkserver":
+            context.set_forkserver_preload([charts.__name__])
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=charts.warm_up
+        )
+
+        # One job per worker forces every process to start now rather than on the first request.
+        # The pool starts a process per submit while none is idle, so all of them start here
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        with _main_module_hidden():
+            warm_ups = [loop.run_in_executor(self._executor, charts.warm_up) for _ in range(self.workers)]
+        await asyncio.gather(*warm_ups)
+        logger.info(f"📈 Chart workers ready: {self.workers} in {time.perf_counter() - started:.2f}s")
+
+    async def stop(self):
+        """Shut the pool down (pending jobs are cancelled)"""
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def render(self, renderer: Callable[..., Any], *args) -> Any:
+        """
+        Run `renderer(*args)` in a worker and return its result.
+
+        Raises:
+            ChartQueueFull: queue limit reached
+            ChartTimeout: the job did not finish within `timeout` seconds
+            ChartWorkerDied: the worker process died; the pool is recreated
+            ChartRenderError: the renderer raised an exception
+        """
+        if self._executor is None:
+            await self.start()
+
+        if self.queue_depth >= self.max_queue:
+            self.rejected += 1
+            raise ChartQueueFull(f"{self.queue_depth} charts already queued")
+
+        started = time.perf_counter()
+        try:
+            job = self._executor.submit(renderer, *args)
+            self._inflight.add(job)
+            job.add_done_callback(self._inflight.discard)
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            # On timeout a queued job is cancelled; a started one stays in _inflight until its worker is done
+            result = await asyncio.wait_for(asyncio.wrap_future(job), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise ChartTimeout(f"{getattr(renderer, '__name__', renderer)} took longer than {self.timeout}s")
+        except BrokenProcessPool as e:
+            # A worker died (e.g. OOM kill) - recreate the pool for the next request
+            self.failed += 1
+            logger.error("❌ Chart worker pool broken, restarting")
+            await self.stop()
+            raise ChartWorkerDied(f"{getattr(renderer, '__name__', renderer)}: chart worker died") from e
+        except Exception as e:
+            # A bug or bad input in the renderer - the user gets the generic "chart unavailable"
+            self.failed += 1
+            logger.exception(f"❌ Chart {getattr(renderer, '__name__', renderer)} failed")
+            raise ChartRenderError(f"{getattr(renderer, '__name__', renderer)} failed: {e!r}") from e
+
+        self.completed += 1
+        self.total_render_time += time.perf_counter() - started
+        return result
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "avg_render_time": self.total_render_time / self.completed if self.completed else 0.0,
+        }
+
+
+# Shared instance used by the stats handlers, started/stopped from bot/main.py
+chart_service = ChartRenderService()
@@ -0,0 +1,147 @@
+"""
+Chart renderers for statistics - Dev3 Feature
+
+Pure functions: plain data in, PNG bytes out (rendered into memory, never to disk).
+They run inside the chart worker processes (see chart_service.py), so they
+must not touch the bot, the database or any module-level state.
+
+matplotlib and numpy are imported inside the functions, not at module level:
+the bot process imports this module only to pass the renderers to the pool,
+so the analytics stack is loaded by the workers alone.
+"""
+import calendar
+from datetime import datetime, timedelta
+from io import BytesIO
+
+
+def _figure(**kwargs):
+    """New matplotlib Figure, loading matplotlib with the Agg backend on first use"""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    return Figure(**kwargs)
+
+
+def warm_up() -> None:
+    """
+    Worker initializer: imports matplotlib and renders a tiny figure so the
+    font cache and Agg canvas are loaded before the first real request.
+    """
+    fig = _figure(figsize=(1, 1))
+    fig.add_subplot().plot([0, 1], [0, 1])
+    fig.canvas.draw()
+
+
+def _to_png(fig) -> bytes:
+    """Render a figure into an in-memory PNG"""
+    buffer = BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def _rotate_x_labels(ax) -> None:
+    """Same as plt.xticks(rotation=45, ha="right", fontsize=10) for one axes"""
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment("right")
+        label.set_fontsize(10)
+
+
+def render_best_lift(weeks: list[str], weights: list[float]) -> bytes:
+    """Best weight per week as a line chart"""
+    dates = [datetime.fromisoformat(w) for w in weeks]
+
+    fig = _figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+    ax.plot(dates, weights, marker="o", linestyle="-", color="blue")
+    _rotate_x_labels(ax)
+    ax.set_title("Best Lift Progression")
+    ax.set_xlabel("Week")
+    ax.set_ylabel("Max Weight (kg)")
+    fig.tight_layout()
+
+    return _to_png(fig)
+
+
+def render_volume(weeks: list[str], volumes: list[float]) -> bytes:
+    """Weekly volume: line for up to two weeks, bars otherwise"""
+    dates = [datetime.fromisoformat(w) for w in weeks]
+
+    import matplotlib.dates as mdates
+
+    fig = _figure(figsize=(10, 6))
+    ax = fig.add_subplot()
+
+    if len(dates) <= 2:
+        ax.plot(dates, volumes, marker="o", linestyle="-")
+        ax.set_xlim(dates[0] - timedelta(days=1), dates[-1] + timedelta(days=1))
+    else:
+        ax.bar(dates, volumes, width=5)
+
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+    _rotate_x_labels(ax)
+    ax.set_title("Volume Progression")
+    ax.set_xlabel("Week")
+    ax.set_ylabel("Volume")
+    fig.tight_layout()
+
+    return _to_png(fig)
+
+
+def render_muscle_distribution(muscle_volume: dict[str, float]) -> bytes:
+    """Share of the day's volume per muscle group as a pie chart"""
+    labels = list(muscle_volume.keys())
+    sizes = list(muscle_volume.values())
+    explode = [0.1 if i == max(sizes) else 0 for i in sizes]
+
+    fig = _figure(figsize=(10, 8))
+    ax = fig.add_subplot()
+    ax.pie(sizes, explode=explode, labels=labels, autopct="%1.1f%%", shadow=True, startangle=90)
+    ax.axis("equal")
+
+    return _to_png(fig)
+
+
+def render_heat_map(heatmap_data: dict[int, list[int]]) -> bytes:
+    """
+    Workout counts per month (rows) and week of month (columns).
+
+    A 12x4 grid drawn with imshow and annotated cell by cell - the same
+    picture sns.heatmap gave, without loading pandas and seaborn in the worker.
+    """
+    import numpy as np
+    from matplotlib import colormaps
+
+    months = sorted(heatmap_data)
+    counts = np.array([heatmap_data[m] for m in months], dtype=int).reshape(len(months), 4)
+    cmap = colormaps["YlOrRd"]
+    vmin, vmax = int(counts.min()), int(counts.max())
+
+    fig = _figure(figsize=(10, 8))
+    ax = fig.add_subplot()
+    image = ax.imshow(counts, cmap=cmap, vmin=vmin, vmax=vmax, aspect="auto", interpolation="nearest")
+    fig.colorbar(image, ax=ax)
+
+    # Dark text on light cells, white on dark ones (seaborn's luminance rule)
+    rgb = cmap(image.norm(counts))[..., :3]
+    linear = np.where(rgb <= 0.03928, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    luminance = linear @ np.array([0.2126, 0.7152, 0.0722])
+    for row, col in np.ndindex(counts.shape):
+        ax.text(
+            col, row, str(counts[row, col]),
+            ha="center", va="center",
+            color=".15" if luminance[row, col] > 0.408 else "w"
+        )
+
+    ax.set_xticks(range(4), ["Week 1", "Week 2", "Week 3", "Week 4"])
+    ax.set_yticks(range(len(months)), [calendar.month_abbr[m] for m in months])
+    ax.tick_params(length=0)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    ax.set_title("Workout Frequency per Month/Week")
+    ax.set_xlabel("Week of Month")
+    ax.set_ylabel("Month")
+
+    return _to_png(fig)
@@ -2,17 +2,11 @@
 Statistics and Progress Tracking Handlers - Dev3 Feature
 Integrated with unified database structure
 """
-import calendar
-import os
 from collections import defaultdict
 from datetime import datetime, timezone, timedelta
-from pathlib import Path
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import pandas as pd
-import seaborn as sns
 
 from aiogram import Router, F
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import StatesGroup, State
@@ -24,32 +18,30 @@ from aiogram.types import (
     InlineKeyboardButton,
     ReplyKeyboardRemove,
     CallbackQuery,
-    FSInputFile
+    BufferedInputFile
 )
+from sqlalchemy import select
 
 from localization.utils import t
-from bot.features.dev1_workout_tracking.services import get_lang
 
-from bot.core.database import SessionLocal
+from bot.core.database import get_async_session
 from bot.core.models import Workout
-from .muscle_groups import exercise_to_muscle
+from . import charts
+from .chart_cache import chart_cache
+from .chart_service import chart_service, ChartServiceError
 from .utils_funcs import (
-    one_rep_max,
-    calculate_volume,
     compute_weekly_volume,
     compute_muscle_group_stats,
+    get_daily_workout_counts,
+    get_muscle_volume_for_day,
+    get_weekly_best_weight,
+    get_best_one_rep_max,
     group_muscle_volume_by_week
 )
 
 # Router for statistics feature
 stats_router = Router()
 
-# Define the graphs directory path
-GRAPHS_DIR = Path(__file__).parent.parent.parent.parent / "data" / "graphs"
-
-# Ensure the graphs directory exists
-GRAPHS_DIR.mkdir(parents=True, exist_ok=True)
-
 
 # ============================================================================
 # FSM States
@@ -72,14 +64,61 @@ class StatsForm(StatesGroup):
     recommendations_state = State()
 
 
+# ============================================================================
+# Chart delivery
+# ============================================================================
+
+async def send_chart(
+    message: Message,
+    user_id: int,
+    lang: str,
+    renderer,
+    *args,
+    filename: str,
+    caption: str | None = None
+) -> bool:
+    """
+    Send a chart as a photo reply to `message`, rendering it only if needed:
+    cached file_id -> cached PNG -> render in the chart worker pool.
+
+    Returns:
+        False if the chart could not be rendered (the user is told so)
+    """
+    key = chart_cache.make_key(user_id, renderer.__name__, args, lang)
+    cached = await chart_cache.get(key)
+
+    if cached is not None and cached.file_id:
+        try:
+            await message.answer_photo(cached.file_id, caption=caption)
+            return True
+        except TelegramBadRequest:
+            # file_id no longer valid - upload again
+            chart_cache.forget_file_id(key)
+            cached = await chart_cache.get(key)
+
+    if cached is not None and cached.png:
+        png = cached.png
+    else:
+        try:
+            png = await chart_service.render(renderer, *args)
+        except ChartServiceError:
+            await message.answer(t("stats_chart_unavailable", lang))
+            return False
+        await chart_cache.put(key, png)
+
+    sent = await message.answer_photo(BufferedInputFile(png, filename=filename), caption=caption)
+    if sent.photo:
+        chart_cache.set_file_id(key, sent.photo[-1].file_id)
+    return True
+
+
 # ============================================================================
 # Main Statistics Command
 # ============================================================================
 
 @stats_router.message(Command("statistics"))
-async def stats_command(message: Message, state: FSMContext):
+async def stats_command(message: Message, state: FSMContext, lang: str):
     """Main entry point for statistics"""
-    lang = get_lang(message.from_user.id)
     await state.set_state(StatsForm.choice_type)
     await state.update_data(lang=lang)
 
@@ -131,27 +170,30 @@ async def process_time_period(message: Message, state: FSMContext):
     user_id = message.from_user.id
     now = datetime.now(timezone.utc)
 
-    with SessionLocal() as session:
-        query = session.query(Workout).filter(Workout.user_id == user_id)
+    # Plain column tuples - no ORM objects for a read-only listing
+    query = select(
+        Workout.created_at, Workout.exercise, Workout.sets, Workout.reps, Workout.weight
+    ).filter(Workout.user_id == user_id)
 
-        # Check both English and Russian button text
-        if time_period in [t("stats_btn_today", "en"), t("stats_btn_today", "ru")]:
-            start = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
-            query = query.filter(Workout.created_at >= start, Workout.created_at <= now)
-        elif time_period in [t("stats_btn_week", "en"), t("stats_btn_week", "ru")]:
-            start = now - timedelta(days=7)
-            query = query.filter(Workout.created_at >= start, Workout.created_at <= now)
+    # Check both English and Russian button text
+    if time_period in [t("stats_btn_today", "en"), t("stats_btn_today", "ru")]:
+        start = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+        query = query.filter(Workout.created_at >= start, Workout.created_at <= now)
+    elif time_period in [t("stats_btn_week", "en"), t("stats_btn_week", "ru")]:
+        start = now - timedelta(days=7)
+        query = query.filter(Workout.created_at >= start, Workout.created_at <= now)
 
-        results = query.order_by(Workout.created_at.desc()).all()
+    async with get_async_session() as session:
+        results = (await session.execute(query.order_by(Workout.created_at.desc()))).all()
 
-        if not results:
-            await message.answer(t("stats_no_workouts", lang))
-        else:
-            text = "\n".join(
-                f"{w.created_at:%d-%m %H:%M} — {w.exercise} {w.sets}x{w.reps}x{w.weight} kg"
-                for w in results
-            )
-            await message.answer(t("stats_your_workouts", lang, workouts=text))
+    if not results:
+        await message.answer(t("stats_no_workouts", lang))
+    else:
+        text = "\n".join(
+            f"{created_at:%d-%m %H:%M} — {exercise} {sets}x{reps}x{weight} kg"
+            for created_at, exercise, sets, reps, weight in results
+        )
+        await message.answer(t("stats_your_workouts", lang, workouts=text))
 
     await state.set_state(StatsForm.choice_type)
     await message.answer(
@@ -221,41 +263,29 @@ async def process_best_lift_exercise_choice(message: Message, state: FSMContext)
     await state.update_data(exercise=exercise)
     user_id = message.from_user.id
 
-    with SessionLocal() as session:
-        results = (
-            session.query(Workout)
-            .filter(Workout.user_id == user_id, Workout.exercise.ilike(exercise))
-            .order_by(Workout.created_at.asc())
-            .all()
-        )
-
-        if not results:
-            await message.answer(t("stats_no_data_exercise", lang, exercise=exercise))
-            await state.clear()
-            return
+    async with get_async_session() as session:
+        weekly_max = await get_weekly_best_weight(user_id=user_id, session=session, exercise=exercise)
 
-        weekly_max = defaultdict(int)
-        for w in results:
-            week_start = (w.created_at - timedelta(days=w.created_at.weekday())).date()
-            weekly_max[week_start] = max(weekly_max[week_start], w.weight)
-
-        lines = []
-        for week_start, max_weight in weekly_max.items():
-            week_str = week_start.strftime("%Y-%m-%d")
-            lines.append(t("stats_week_result", lang, week=week_str, weight=max_weight))
+    if not weekly_max:
+        await message.answer(t("stats_no_data_exercise", lang, exercise=exercise))
+        await state.clear()
+        return
 
-        text = "\n".join(lines)
-        await message.answer(t("stats_weekly_progression", lang, progression=text))
+    lines = []
+    for week_str, max_weight in weekly_max.items():
+        lines.append(t("stats_week_result", lang, week=week_str, weight=max_weight))
 
-        await state.update_data(weekly_max={str(k): v for k, v in weekly_max.items()})
-        await state.set_state(StatsForm.best_lift_action)
+    text = "\n".join(lines)
+    await message.answer(t("stats_weekly_progression", lang, progression=text))
 
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[
-            [InlineKeyboardButton(text=t("stats_btn_graph", lang), callback_data="graph")],
-            [InlineKeyboardButton(text=t("stats_btn_orm", lang), callback_data="orm")],
-            [InlineKeyboardButton(text=t("stats_btn_back", lang), callback_data="Back")],
-        ])
-        await message.answer(t("stats_choose_option", lang), reply_markup=keyboard)
+    await state.update_data(weekly_max=weekly_max)
+    await state.set_state(StatsForm.best_lift_action)
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text=t("stats_btn_graph", lang), callback_data="graph")],
+        [InlineKeyboardButton(text=t("stats_btn_orm", lang), callback_data="orm")],
+        [InlineKeyboardButton(text=t("stats_btn_back", lang), callback_data="Back")],
+    ])
+    await message.answer(t("stats_choose_option", lang), reply_markup=keyboard)
 
 
 @stats_router.callback_query(F.data.in_(["graph", "orm", "Back"]))
@@ -268,7 +298,7 @@ async def graph_or_ORM(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
     if choice == "graph":
-        weekly_max = {datetime.fromisoformat(k): v for k, v in data.get("weekly_max", {}).items()}
+        weekly_max = data.get("weekly_max", {})
         weeks = list(weekly_max.keys())
         weights = list(weekly_max.values())
 
@@ -276,20 +306,13 @@ async def graph_or_ORM(callback: CallbackQuery, state: FSMContext):
             await callback.message.answer(t("stats_no_weekly_data", lang))
             return
 
-        plt.figure(figsize=(10, 6))
-        plt.plot(weeks, weights, marker="o", linestyle="-", color="blue")
-        plt.xticks(rotation=45, ha="right", fontsize=10)
-        plt.title("Best Lift Progression")
-        plt.xlabel("Week")
-        plt.ylabel("Max Weight (kg)")
-        plt.tight_layout()
-
-        progress_path = GRAPHS_DIR / "progress.png"
-        plt.savefig(progress_path)
-        plt.close()
-
-        photo = FSInputFile(progress_path)
-        await callback.message.answer_photo(photo, caption=t("stats_graph_caption", lang))
+        sent = await send_chart(
+            callback.message, callback.from_user.id, lang,
+            charts.render_best_lift, weeks, weights,
+            filename="progress.png", caption=t("stats_graph_caption", lang)
+        )
+        if not sent:
+            return
 
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
             [InlineKeyboardButton(text=t("stats_btn_graph", lang), callback_data="graph")],
@@ -302,22 +325,15 @@ async def graph_or_ORM(callback: CallbackQuery, state: FSMContext):
         user_id = callback.from_user.id
         exercise_choice = data.get("exercise")
 
-        with SessionLocal() as session:
-            results = (
-                session.query(Workout)
-                .filter(Workout.user_id == user_id, Workout.exercise.ilike(exercise_choice))
-                .order_by(Workout.weight.desc())
-                .all()
-            )
+        async with get_async_session() as session:
+            best_lift = await get_best_one_rep_max(user_id=user_id, session=session, exercise=exercise_choice)
 
-            if results:
-                best_set = [one_rep_max(r.weight, r.reps) for r in results]
-                best_lift = max(best_set)
-                await callback.message.answer(
-                    t("stats_orm_result", lang, exercise=exercise_choice, weight=f"{best_lift:.1f}")
-                )
-            else:
-                await callback.message.answer(t("stats_no_data_exercise", lang, exercise=exercise_choice))
+        if best_lift is not None:
+            await callback.message.answer(
+                t("stats_orm_result", lang, exercise=exercise_choice, weight=f"{best_lift:.1f}")
+            )
+        else:
+            await callback.message.answer(t("stats_no_data_exercise", lang, exercise=exercise_choice))
 
         await state.clear()
 
@@ -348,30 +364,22 @@ async def process_volume(message: Message, state: FSMContext):
     await state.set_state(StatsForm.volume_state)
     user_id = message.from_user.id
 
-    with SessionLocal() as session:
-        results = session.query(Workout).filter(Workout.user_id == user_id).all()
+    async with get_async_session() as session:
+        weekly_volume = await compute_weekly_volume(user_id=user_id, session=session)
 
-        weekly_volume = defaultdict(int)
-        for w in results:
-            week_start = (w.created_at - timedelta(days=w.created_at.weekday())).date()
-            weekly_volume[week_start] += calculate_volume(w.sets, w.reps, w.weight)
+    await state.update_data(weekly_volume=weekly_volume)
 
-        await state.update_data(
-            weekly_volume={str(k): v for k, v in weekly_volume.items()}
-        )
+    lines = []
+    for week_str, volume in weekly_volume.items():
+        lines.append(t("stats_volume_week", lang, week=week_str, volume=volume))
 
-        lines = []
-        for week_start, volume in weekly_volume.items():
-            week_str = week_start.strftime("%Y-%m-%d")
-            lines.append(t("stats_volume_week", lang, week=week_str, volume=volume))
-
-        text = "\n".join(lines)
-        await message.answer(
-            t("stats_weekly_progression", lang, progression=text),
-            reply_markup=ReplyKeyboardRemove()
-        )
-        await message.answer(t("stats_type_chart", lang))
-        await state.set_state(StatsForm.chart_state)
+    text = "\n".join(lines)
+    await message.answer(
+        t("stats_weekly_progression", lang, progression=text),
+        reply_markup=ReplyKeyboardRemove()
+    )
+    await message.answer(t("stats_type_chart", lang))
+    await state.set_state(StatsForm.chart_state)
 
 
 @stats_router.message(StatsForm.chart_state)
@@ -380,32 +388,18 @@ async def process_chart(message: Message, state: FSMContext):
     data = await state.get_data()
     lang = data.get('lang', 'en')
 
-    data_for_chart = {datetime.fromisoformat(k): v for k, v in data.get("weekly_volume", {}).items()}
+    data_for_chart = data.get("weekly_volume", {})
     weeks = list(data_for_chart.keys())
     volumes = list(data_for_chart.values())
 
-    plt.figure(figsize=(10, 6))
-
-    if len(weeks) <= 2:
-        plt.plot(weeks, volumes, marker="o", linestyle="-")
-        plt.xlim(weeks[0] - pd.Timedelta(days=1), weeks[-1] + pd.Timedelta(days=1))
+    if not weeks:
+        await message.answer(t("stats_no_weekly_data", lang))
     else:
-        plt.bar(weeks, volumes, width=5)
-
-    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m-%d"))
-    plt.gca().xaxis.set_major_locator(mdates.AutoDateLocator())
-    plt.xticks(rotation=45, ha="right", fontsize=10)
-    plt.title("Volume Progression")
-    plt.xlabel("Week")
-    plt.ylabel("Volume")
-    plt.tight_layout()
-
-    volume_path = GRAPHS_DIR / "volume_progress.png"
-    plt.savefig(volume_path)
-    plt.close()
-
-    photo = FSInputFile(volume_path)
-    await message.answer_photo(photo, caption=t("stats_volume_caption", lang))
+        await send_chart(
+            message, message.from_user.id, lang,
+            charts.render_volume, weeks, volumes,
+            filename="volume_progress.png", caption=t("stats_volume_caption", lang)
+        )
 
     await state.set_state(StatsForm.choice_type)
     await message.answer(
@@ -434,36 +428,26 @@ async def process_muscle_grp_distribution(message: Message, state: FSMContext):
     await message.answer(t("stats_muscle_menu", lang), reply_markup=ReplyKeyboardRemove())
     user_id = message.from_user.id
 
-    with SessionLocal() as session:
-        results = (
-            session.query(Workout)
-            .filter(Workout.user_id == user_id)
-            .order_by(Workout.created_at.desc())
-            .all()
-        )
+    async with get_async_session() as session:
+        workouts_by_date = await get_daily_workout_counts(user_id=user_id, session=session)
 
-        if not results:
-            await message.answer(t("stats_no_workouts", lang))
-            return
+    if not workouts_by_date:
+        await message.answer(t("stats_no_workouts", lang))
+        return
 
-        workouts_by_date = defaultdict(list)
-        for w in results:
-            workout_date = w.created_at.date()
-            workouts_by_date[workout_date].append(w)
-
-        keyboard = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text=f"{date:%d-%m-%Y} — {len(workouts_by_date[date])} {t('stats_exercises', lang)}",
-                        callback_data=f"workout_{date}"
-                    )
-                ]
-                for date in sorted(workouts_by_date.keys(), reverse=True)
+    keyboard = InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text=f"{date:%d-%m-%Y} — {count} {t('stats_exercises', lang)}",
+                    callback_data=f"workout_{date}"
+                )
             ]
-        )
+            for date, count in workouts_by_date.items()
+        ]
+    )
 
-        await message.answer(t("stats_select_workout_date", lang), reply_markup=keyboard)
+    await message.answer(t("stats_select_workout_date", lang), reply_markup=keyboard)
 
 
 @stats_router.callback_query(lambda c: c.data.startswith("workout_"))
@@ -475,36 +459,21 @@ async def workout_selected(callback_query: CallbackQuery, state: FSMContext):
     date_str = callback_query.data.split("_")[1]
     workout_date = datetime.strptime(date_str, "%Y-%m-%d").date()
 
-    with SessionLocal() as session:
-        workouts = (
-            session.query(Workout)
-            .filter(
-                Workout.user_id == callback_query.from_user.id,
-                Workout.created_at >= workout_date,
-                Workout.created_at < workout_date + timedelta(days=1),
-            )
-            .all()
+    async with get_async_session() as session:
+        muscle_volume = await get_muscle_volume_for_day(
+            user_id=callback_query.from_user.id,
+            session=session,
+            day=workout_date
         )
 
-        muscle_volume = defaultdict(int)
-        for w in workouts:
-            volume = w.sets * w.reps * w.weight
-            muscle = exercise_to_muscle.get(w.exercise, "Other")
-            muscle_volume[muscle] += volume
-
-        labels = list(muscle_volume.keys())
-        sizes = list(muscle_volume.values())
-        explode = [0.1 if i == max(sizes) else 0 for i in sizes]
-
-        fig, ax = plt.subplots(figsize=(10, 8))
-        ax.pie(sizes, explode=explode, labels=labels, autopct="%1.1f%%", shadow=True, startangle=90)
-        ax.axis("equal")
-
-        muscle_path = GRAPHS_DIR / "muscle_distribution.png"
-        plt.savefig(muscle_path)
-        plt.close(fig)
-
-        await callback_query.message.answer_photo(photo=FSInputFile(muscle_path))
+    if not muscle_volume:
+        await callback_query.message.answer(t("stats_no_workouts", lang))
+    else:
+        await send_chart(
+            callback_query.message, callback_query.from_user.id, lang,
+            charts.render_muscle_distribution, muscle_volume,
+            filename="muscle_distribution.png"
+        )
 
         await state.set_state(StatsForm.choice_type)
         await callback_query.message.answer(
@@ -532,36 +501,22 @@ async def process_heat_map(message: Message, state: FSMContext):
     await state.set_state(StatsForm.heat_map_state)
     user_id = message.from_user.id
 
-    with SessionLocal() as session:
-        workouts = session.query(Workout).filter(Workout.user_id == user_id).all()
+    async with get_async_session() as session:
+        workout_counts = await get_daily_workout_counts(user_id=user_id, session=session)
 
+    if workout_counts:
         heatmap_data = defaultdict(lambda: [0, 0, 0, 0])
-        for w in workouts:
-            month = w.created_at.month
-            week_of_month = min((w.created_at.day - 1) // 7, 3)
-            heatmap_data[month][week_of_month] += 1
-
-        df = pd.DataFrame.from_dict(
-            heatmap_data,
-            orient="index",
-            columns=["Week 1", "Week 2", "Week 3", "Week 4"]
+        for day, count in workout_counts.items():
+            week_of_month = min((day.day - 1) // 7, 3)
+            heatmap_data[day.month][week_of_month] += count
+
+        await send_chart(
+            message, user_id, lang,
+            charts.render_heat_map, dict(heatmap_data),
+            filename="heatmap.png", caption=t("stats_heatmap_caption", lang)
         )
-
-        df = df.sort_index()
-        df.index = df.index.map(lambda m: calendar.month_abbr[m])
-
-        plt.figure(figsize=(10, 8))
-        sns.heatmap(df, annot=True, cmap="YlOrRd", cbar=True, fmt="d")
-        plt.title("Workout Frequency per Month/Week")
-        plt.xlabel("Week of Month")
-        plt.ylabel("Month")
-
-        heatmap_path = GRAPHS_DIR / "heatmap.png"
-        plt.savefig(heatmap_path)
-        plt.close()
-
-        photo = FSInputFile(heatmap_path)
-        await message.answer_photo(photo, caption=t("stats_heatmap_caption", lang))
+    else:
+        await message.answer(t("stats_no_workouts", lang))
 
     await state.clear()
 
@@ -579,7 +534,7 @@ async def process_recommendations(message: Message, state: FSMContext):
     await state.set_state(StatsForm.recommendations_state)
     user_id = message.from_user.id
 
-    with SessionLocal() as session:
+    async with get_async_session() as session:
         overall_weekly_data = await compute_weekly_volume(user_id=user_id, session=session)
         overall_muscle_group_data = await compute_muscle_group_stats(
             user_id=user_id,
@@ -2,8 +2,12 @@
 Utility functions for statistics calculations - Dev3 Feature
 """
 from collections import defaultdict
-from datetime import datetime, timedelta
-from bot.core.models import Workout
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.core.models import Workout, WorkoutDailyStat
 from .muscle_groups import exercise_to_muscle
 
 
@@ -44,59 +48,183 @@ def calculate_volume(sets: int, reps: int, weight: float) -> float:
     return sets * reps * weight
 
 
-async def compute_weekly_volume(user_id: int, session) -> dict:
+def one_rep_max_sql(weight, reps):
+    """
+    SQL expression for the Brzycki 1RM (same formula as one_rep_max).
+    Sets with 1 or 37+ reps count as their weight instead of raising.
+    """
+    return case(
+        ((reps == 1) | (reps > 36), weight),
+        else_=weight * 36.0 / (37 - reps)
+    )
+
+
+# Monday of the week: SQLite 'weekday 0' jumps to the next Sunday (or stays), then -6 days
+def _week_start(column):
+    return func.date(column, "weekday 0", "-6 days")
+
+
+# ============================================================================
+# Aggregates
+# Every function reads the daily rollup (workout_daily_stats) first and falls
+# back to GROUP BY over the raw workouts when the rollup has nothing for the
+# user. Older history is copied into the rollup at startup
+# (dev1 services.ensure_derived_tables), so it is never only partly covered.
+# All queries return plain tuples - no ORM objects are built.
+# ============================================================================
+
+async def compute_weekly_volume(user_id: int, session: AsyncSession) -> dict:
     """
     Compute total weekly training volume for a user
     
     Args:
         user_id: Telegram user ID
-        session: SQLAlchemy session
+        session: SQLAlchemy async session
         
     Returns:
         Dictionary mapping week start dates (as strings) to total volume
     """
-    weekly_volume = defaultdict(int)
-    
-    results = session.query(Workout).filter(Workout.user_id == user_id).all()
-    
-    for w in results:
-        # Get Monday of the week
-        week_start = (w.created_at - timedelta(days=w.created_at.weekday())).date()
-        weekly_volume[week_start] += calculate_volume(w.sets, w.reps, w.weight)
-    
-    return {str(k): v for k, v in weekly_volume.items()}
+    week_start = _week_start(WorkoutDailyStat.day)
+    result = await session.execute(
+        select(week_start, func.sum(WorkoutDailyStat.volume))
+        .filter(WorkoutDailyStat.user_id == user_id)
+        .group_by(week_start)
+        .order_by(week_start)
+    )
+    weekly_volume = {week: volume for week, volume in result}
+    if weekly_volume:
+        return weekly_volume
+
+    week_start = _week_start(Workout.created_at)
+    result = await session.execute(
+        select(week_start, func.sum(Workout.sets * Workout.reps * Workout.weight))
+        .filter(Workout.user_id == user_id)
+        .group_by(week_start)
+        .order_by(week_start)
+    )
+    return {week: volume for week, volume in result}
 
 
-async def compute_muscle_group_stats(user_id: int, session, current_time: datetime) -> dict:
+async def compute_muscle_group_stats(user_id: int, session: AsyncSession, current_time: datetime) -> dict:
     """
     Compute volume per muscle group per day
     
     Args:
         user_id: Telegram user ID
-        session: SQLAlchemy session
+        session: SQLAlchemy async session
         current_time: Current datetime for filtering
         
     Returns:
         Nested dictionary: {muscle_group: {date: volume}}
     """
-    workouts = (
-        session.query(Workout)
+    muscle_volume = defaultdict(lambda: defaultdict(int))
+
+    result = await session.execute(
+        select(WorkoutDailyStat.muscle_group, WorkoutDailyStat.day, WorkoutDailyStat.volume)
+        .filter(
+            WorkoutDailyStat.user_id == user_id,
+            WorkoutDailyStat.day <= current_time.date()
+        )
+    )
+    for muscle, day, volume in result:
+        muscle_volume[muscle][day] += volume
+
+    if not muscle_volume:
+        day = func.date(Workout.created_at)
+        result = await session.execute(
+            select(day, Workout.exercise, func.sum(Workout.sets * Workout.reps * Workout.weight))
+            .filter(Workout.user_id == user_id, Workout.created_at <= current_time)
+            .group_by(day, Workout.exercise)
+        )
+        for day_str, exercise, volume in result:
+            muscle = exercise_to_muscle.get(exercise, "Other")
+            muscle_volume[muscle][date.fromisoformat(day_str)] += volume
+
+    return {m: dict(dates) for m, dates in muscle_volume.items()}
+
+
+async def get_daily_workout_counts(user_id: int, session: AsyncSession) -> dict:
+    """
+    Number of logged exercises per training day
+    
+    Returns:
+        Dictionary {date: count}, newest first
+    """
+    result = await session.execute(
+        select(WorkoutDailyStat.day, func.sum(WorkoutDailyStat.entry_count))
+        .filter(WorkoutDailyStat.user_id == user_id)
+        .group_by(WorkoutDailyStat.day)
+        .order_by(WorkoutDailyStat.day.desc())
+    )
+    counts = {day: count for day, count in result}
+    if counts:
+        return counts
+
+    day = func.date(Workout.created_at)
+    result = await session.execute(
+        select(day, func.count())
+        .filter(Workout.user_id == user_id)
+        .group_by(day)
+        .order_by(day.desc())
+    )
+    return {date.fromisoformat(day_str): count for day_str, count in result}
+
+
+async def get_muscle_volume_for_day(user_id: int, session: AsyncSession, day: date) -> dict:
+    """
+    Volume per muscle group for a single day
+    
+    Returns:
+        Dictionary {muscle_group: volume}
+    """
+    result = await session.execute(
+        select(WorkoutDailyStat.muscle_group, WorkoutDailyStat.volume)
+        .filter(WorkoutDailyStat.user_id == user_id, WorkoutDailyStat.day == day)
+    )
+    muscle_volume = {muscle: volume for muscle, volume in result}
+    if muscle_volume:
+        return muscle_volume
+
+    start = datetime.combine(day, datetime.min.time())
+    result = await session.execute(
+        select(Workout.exercise, func.sum(Workout.sets * Workout.reps * Workout.weight))
         .filter(
             Workout.user_id == user_id,
-            Workout.created_at <= current_time
+            Workout.created_at >= start,
+            Workout.created_at < start + timedelta(days=1)
         )
-        .all()
+        .group_by(Workout.exercise)
     )
+    muscle_volume = defaultdict(int)
+    for exercise, volume in result:
+        muscle_volume[exercise_to_muscle.get(exercise, "Other")] += volume
+    return dict(muscle_volume)
 
-    muscle_volume = defaultdict(lambda: defaultdict(int))
+
+async def get_weekly_best_weight(user_id: int, session: AsyncSession, exercise: str) -> dict:
+    """
+    Heaviest weight per week for one exercise (case-insensitive name match)
     
-    for w in workouts:
-        date = w.created_at.date()
-        volume = w.sets * w.reps * w.weight
-        muscle = exercise_to_muscle.get(w.exercise, "Other")
-        muscle_volume[muscle][date] += volume
+    Returns:
+        Dictionary {week_start (str): max weight}, oldest first
+    """
+    week_start = _week_start(Workout.created_at)
+    result = await session.execute(
+        select(week_start, func.max(Workout.weight))
+        .filter(Workout.user_id == user_id, Workout.exercise.ilike(exercise))
+        .group_by(week_start)
+        .order_by(week_start)
+    )
+    return {week: weight for week, weight in result}
 
-    return {m: dict(dates) for m, dates in muscle_volume.items()}
+
+async def get_best_one_rep_max(user_id: int, session: AsyncSession, exercise: str) -> float | None:
+    """Best estimated 1RM for one exercise, or None if it was never logged"""
+    result = await session.execute(
+        select(func.max(one_rep_max_sql(Workout.weight, Workout.reps)))
+        .filter(Workout.user_id == user_id, Workout.exercise.ilike(exercise))
+    )
+    return result.scalar()
 
 
 def group_muscle_volume_by_week(muscle_volumes: dict) -> dict:
@@ -8,7 +8,6 @@ from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
 from localization.utils import t
-from bot.features.dev1_workout_tracking.services import get_lang
 
 from .services import (
     save_custom_routine,
@@ -115,9 +114,8 @@ PRESET_ROUTINES = {
 # ============================================================================
 
 @routine_router.message(Command("routines"))
-async def show_routines(message: Message, state: FSMContext):
+async def show_routines(message: Message, state: FSMContext, lang: str):
     """Show routine level selection"""
-    lang = get_lang(message.from_user.id)
     await state.update_data(lang=lang)
 
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -133,9 +131,8 @@ async def show_routines(message: Message, state: FSMContext):
 
 
 @routine_router.message(Command("custom_routines"))
-async def custom_routines(message: Message, state: FSMContext):
+async def custom_routines(message: Message, state: FSMContext, lang: str):
     """Show custom routine management"""
-    lang = get_lang(message.from_user.id)
     await state.update_data(lang=lang)
 
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -2,22 +2,21 @@
 Handlers for timer functionality.
 Rest timers between sets and custom timer presets.
 """
-import asyncio
-from datetime import datetime
-from aiogram import Router, F
+from aiogram import Bot, Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 
 from localization.utils import t
-from bot.features.dev1_workout_tracking.services import get_lang
 
+from bot.core.outbox import Priority, outbox
 from .states import TimerPresetForm
 from .keyboards import (
     build_timer_keyboard,
     presets_menu_keyboard,
     preset_list_keyboard
 )
+from .timer_service import RestTimer, TimerSettings, get_timer_settings, rest_timers, timer_settings
 from .services import (
     add_timer_preset,
     get_user_timer_presets,
@@ -27,62 +26,28 @@ from .services import (
     parse_time_string,
     format_time_display
 )
-from bot.features.dev1_workout_tracking.services import get_or_create_user
 
 router = Router(name="timer")
 
 
-# ==========================================
-# TIMER CLASS
-# ==========================================
-
-class Timer:
-    """Simple timer class for tracking time"""
-    def __init__(self, duration_seconds: int):
-        self.duration = duration_seconds
-        self.start_time = None
-        self.task = None
-        self.message_id = None  # Store message ID for updating
-
-    def start(self):
-        self.start_time = datetime.now()
-
-    def remaining_seconds(self) -> int:
-        if not self.start_time:
-            return self.duration
-        elapsed = (datetime.now() - self.start_time).total_seconds()
-        return max(0, self.duration - int(elapsed))
-
-
-# In-memory storage for active timers and user settings
-active_timers: dict[int, Timer] = {}
-timer_settings: dict[int, dict[str, int]] = {}
-
-
 # ==========================================
 # HELPER FUNCTIONS
 # ==========================================
 
 async def refresh_timer_message(callback: CallbackQuery, user_id: int, lang: str):
     """Refresh the timer configuration message"""
-    settings = timer_settings.get(user_id, {"hours": 0, "minutes": 0, "seconds": 0})
+    settings = timer_settings.peek(user_id) or TimerSettings()
     await callback.message.edit_text(
         t("timer_configure", lang),
         reply_markup=build_timer_keyboard(
-            settings["hours"],
-            settings["minutes"],
-            settings["seconds"],
+            settings.hours,
+            settings.minutes,
+            settings.seconds,
             lang
         )
     )
 
 
-def init_timer_settings(user_id: int):
-    """Initialize timer settings for user if not exists"""
-    if user_id not in timer_settings:
-        timer_settings[user_id] = {"hours": 0, "minutes": 0, "seconds": 0}
-
-
 def build_stop_timer_keyboard(lang: str) -> InlineKeyboardMarkup:
     """Build keyboard with Stop Timer button"""
     return InlineKeyboardMarkup(inline_keyboard=[
@@ -90,34 +55,52 @@ def build_stop_timer_keyboard(lang: str) -> InlineKeyboardMarkup:
     ])
 
 
+async def notify_timer_completed(bot: Bot, timer: RestTimer):
+    """Called by rest_timers when a timer runs out (also for timers restored after a restart)"""
+    timer_settings.pop(timer.user_id)
+    lang = timer.lang
+
+    # Try to remove the stop button from the timer message
+    try:
+        if timer.message_id:
+            await outbox.submit(
+                timer.chat_id,
+                lambda: bot.edit_message_reply_markup(
+                    chat_id=timer.chat_id,
+                    message_id=timer.message_id,
+                    reply_markup=None
+                ),
+                Priority.TIMER
+            )
+    except Exception:
+        pass  # Message might be deleted or inaccessible
+
+    # Sent through the outbox, ahead of queued reminders
+    await outbox.send_message(
+        bot, timer.chat_id, t("timer_completed", lang),
+        priority=Priority.TIMER,
+        reply_markup=build_timer_keyboard(0, 0, 0, lang)
+    )
+
+
 # ==========================================
 # COMMAND HANDLERS
 # ==========================================
 
 @router.message(Command("timer"))
-async def cmd_timer(message: Message, state: FSMContext):
+async def cmd_timer(message: Message, state: FSMContext, lang: str):
     """Start timer interface"""
-    lang = get_lang(message.from_user.id)
     await state.update_data(lang=lang)
 
     user_id = message.from_user.id
-
-    # Ensure user exists in database
-    get_or_create_user(
-        telegram_id=user_id,
-        username=message.from_user.username,
-        first_name=message.from_user.first_name,
-        last_name=message.from_user.last_name
-    )
-
-    init_timer_settings(user_id)
+    settings = get_timer_settings(user_id)
 
     await message.answer(
         t("timer_configure", lang),
         reply_markup=build_timer_keyboard(
-            timer_settings[user_id]["hours"],
-            timer_settings[user_id]["minutes"],
-            timer_settings[user_id]["seconds"],
+            settings.hours,
+            settings.minutes,
+            settings.seconds,
             lang
         )
     )
@@ -134,9 +117,9 @@ async def add_hour(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    init_timer_settings(user_id)
+    settings = get_timer_settings(user_id)
 
-    timer_settings[user_id]["hours"] += 1
+    settings.hours += 1
     await refresh_timer_message(callback, user_id, lang)
     await callback.answer(t("timer_add_hour_msg", lang))
 
@@ -148,13 +131,13 @@ async def add_minute(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    init_timer_settings(user_id)
+    settings = get_timer_settings(user_id)
 
-    if timer_settings[user_id]["minutes"] < 59:
-        timer_settings[user_id]["minutes"] += 1
+    if settings.minutes < 59:
+        settings.minutes += 1
     else:
-        timer_settings[user_id]["minutes"] = 0
-        timer_settings[user_id]["hours"] += 1
+        settings.minutes = 0
+        settings.hours += 1
 
     await refresh_timer_message(callback, user_id, lang)
     await callback.answer(t("timer_add_minute_msg", lang))
@@ -167,17 +150,17 @@ async def add_second(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    init_timer_settings(user_id)
+    settings = get_timer_settings(user_id)
 
-    if timer_settings[user_id]["seconds"] < 59:
-        timer_settings[user_id]["seconds"] += 1
+    if settings.seconds < 59:
+        settings.seconds += 1
     else:
-        timer_settings[user_id]["seconds"] = 0
-        if timer_settings[user_id]["minutes"] < 59:
-            timer_settings[user_id]["minutes"] += 1
+        settings.seconds = 0
+        if settings.minutes < 59:
+            settings.minutes += 1
         else:
-            timer_settings[user_id]["minutes"] = 0
-            timer_settings[user_id]["hours"] += 1
+            settings.minutes = 0
+            settings.hours += 1
 
     await refresh_timer_message(callback, user_id, lang)
     await callback.answer(t("timer_add_second_msg", lang))
@@ -190,10 +173,10 @@ async def sub_hour(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    init_timer_settings(user_id)
+    settings = get_timer_settings(user_id)
 
-    if timer_settings[user_id]["hours"] > 0:
-        timer_settings[user_id]["hours"] -= 1
+    if settings.hours > 0:
+        settings.hours -= 1
 
     await refresh_timer_message(callback, user_id, lang)
     await callback.answer(t("timer_sub_hour_msg", lang))
@@ -206,13 +189,13 @@ async def sub_minute(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    init_timer_settings(user_id)
+    settings = get_timer_settings(user_id)
 
-    if timer_settings[user_id]["minutes"] > 0:
-        timer_settings[user_id]["minutes"] -= 1
-    elif timer_settings[user_id]["hours"] > 0:
-        timer_settings[user_id]["hours"] -= 1
-        timer_settings[user_id]["minutes"] = 59
+    if settings.minutes > 0:
+        settings.minutes -= 1
+    elif settings.hours > 0:
+        settings.hours -= 1
+        settings.minutes = 59
 
     await refresh_timer_message(callback, user_id, lang)
     await callback.answer(t("timer_sub_minute_msg", lang))
@@ -225,17 +208,17 @@ async def sub_second(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    init_timer_settings(user_id)
-
-    if timer_settings[user_id]["seconds"] > 0:
-        timer_settings[user_id]["seconds"] -= 1
-    elif timer_settings[user_id]["minutes"] > 0:
-        timer_settings[user_id]["minutes"] -= 1
-        timer_settings[user_id]["seconds"] = 59
-    elif timer_settings[user_id]["hours"] > 0:
-        timer_settings[user_id]["hours"] -= 1
-        timer_settings[user_id]["minutes"] = 59
-        timer_settings[user_id]["seconds"] = 59
+    settings = get_timer_settings(user_id)
+
+    if settings.seconds > 0:
+        settings.seconds -= 1
+    elif settings.minutes > 0:
+        settings.minutes -= 1
+        settings.seconds = 59
+    elif settings.hours > 0:
+        settings.hours -= 1
+        settings.minutes = 59
+        settings.seconds = 59
 
     await refresh_timer_message(callback, user_id, lang)
     await callback.answer(t("timer_sub_second_msg", lang))
@@ -252,54 +235,23 @@ async def start_timer(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    init_timer_settings(user_id)
-
-    settings = timer_settings[user_id]
-    total_seconds = settings["hours"] * 3600 + settings["minutes"] * 60 + settings["seconds"]
+    settings = get_timer_settings(user_id)
+    total_seconds = settings.hours * 3600 + settings.minutes * 60 + settings.seconds
 
     if total_seconds <= 0:
         await callback.answer(t("timer_not_set", lang), show_alert=True)
         return
 
-    timer = Timer(total_seconds)
-    timer.start()
-    active_timers[user_id] = timer
-
-    async def notify():
-        try:
-            await asyncio.sleep(total_seconds)
-            if user_id in active_timers and active_timers[user_id] == timer:
-                del active_timers[user_id]
-                timer_settings[user_id] = {"hours": 0, "minutes": 0, "seconds": 0}
-
-                # Try to remove the stop button from the timer message
-                try:
-                    if timer.message_id:
-                        await callback.bot.edit_message_reply_markup(
-                            chat_id=callback.message.chat.id,
-                            message_id=timer.message_id,
-                            reply_markup=None
-                        )
-                except Exception:
-                    pass  # Message might be deleted or inaccessible
-
-                await callback.message.answer(
-                    t("timer_completed", lang),
-                    reply_markup=build_timer_keyboard(0, 0, 0, lang)
-                )
-        except asyncio.CancelledError:
-            pass
-
-    timer.task = asyncio.create_task(notify())
-
-    time_str = format_time_display(settings["hours"], settings["minutes"], settings["seconds"])
+    timer = await rest_timers.start_timer(user_id, callback.message.chat.id, lang, total_seconds)
+
+    time_str = format_time_display(settings.hours, settings.minutes, settings.seconds)
     sent_message = await callback.message.answer(
         t("timer_started", lang, time=time_str),
         reply_markup=build_stop_timer_keyboard(lang)
     )
 
-    # Store message ID for later reference
-    timer.message_id = sent_message.message_id
+    # Store message ID so the stop button can be removed when the timer ends
+    await rest_timers.set_message_id(timer, sent_message.message_id)
 
     await callback.answer()
 
@@ -311,19 +263,15 @@ async def stop_active_timer(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    timer = active_timers.get(user_id)
+
+    # Cancel the timer
+    timer = await rest_timers.stop_timer(user_id)
 
     if not timer:
         await callback.answer(t("timer_no_active", lang), show_alert=True)
         return
 
-    # Cancel the timer task
-    if timer.task:
-        timer.task.cancel()
-
-    # Remove from active timers
-    del active_timers[user_id]
-    timer_settings[user_id] = {"hours": 0, "minutes": 0, "seconds": 0}
+    timer_settings.pop(user_id)
 
     # Remove the stop button
     await callback.message.edit_reply_markup(reply_markup=None)
@@ -343,15 +291,12 @@ async def stop_timer(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    timer = active_timers.get(user_id)
+    timer = await rest_timers.stop_timer(user_id)
 
     if not timer:
         await callback.answer(t("timer_no_active", lang), show_alert=True)
         return
 
-    if timer.task:
-        timer.task.cancel()
-
     # Try to remove the stop button from the timer message
     try:
         if timer.message_id:
@@ -363,9 +308,7 @@ async def stop_timer(callback: CallbackQuery, state: FSMContext):
     except Exception:
         pass  # Message might be deleted or inaccessible
 
-    del active_timers[user_id]
-
-    timer_settings[user_id] = {"hours": 0, "minutes": 0, "seconds": 0}
+    timer_settings.pop(user_id)
     await callback.message.answer(
         t("timer_stopped_new", lang),
         reply_markup=build_timer_keyboard(0, 0, 0, lang)
@@ -397,7 +340,7 @@ async def go_main(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    init_timer_settings(user_id)
+    get_timer_settings(user_id)
     await refresh_timer_message(callback, user_id, lang)
     await callback.answer()
 
@@ -453,11 +396,11 @@ async def process_preset_time(message: Message, state: FSMContext):
 
     if replace_id:
         # Update existing preset
-        preset = update_timer_preset(replace_id, name, hours, minutes, seconds)
+        preset = await update_timer_preset(replace_id, name, hours, minutes, seconds)
         action_text = t("timer_preset_updated", lang)
     else:
         # Create new preset
-        preset = add_timer_preset(user_id, name, hours, minutes, seconds)
+        preset = await add_timer_preset(user_id, name, hours, minutes, seconds)
         action_text = t("timer_preset_added", lang)
 
     await state.clear()
@@ -481,7 +424,7 @@ async def preset_list(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    presets = get_user_timer_presets(user_id)
+    presets = await get_user_timer_presets(user_id)
 
     if not presets:
         await callback.answer(t("timer_no_presets", lang), show_alert=True)
@@ -489,7 +432,7 @@ async def preset_list(callback: CallbackQuery, state: FSMContext):
 
     await callback.message.edit_text(
         t("timer_your_presets", lang),
-        reply_markup=preset_list_keyboard(user_id, "load", lang)
+        reply_markup=await preset_list_keyboard(user_id, "load", lang)
     )
     await callback.answer()
 
@@ -502,7 +445,7 @@ async def preset_load(callback: CallbackQuery, state: FSMContext):
 
     user_id = callback.from_user.id
     preset_id = int(callback.data.split("_")[-1])
-    preset = get_timer_preset_by_id(preset_id)
+    preset = await get_timer_preset_by_id(preset_id)
 
     if not preset:
         await callback.answer(t("timer_preset_not_found", lang), show_alert=True)
@@ -514,11 +457,7 @@ async def preset_load(callback: CallbackQuery, state: FSMContext):
         return
 
     # Load preset into settings
-    timer_settings[user_id] = {
-        "hours": preset.hours,
-        "minutes": preset.minutes,
-        "seconds": preset.seconds
-    }
+    timer_settings.set(user_id, TimerSettings(preset.hours, preset.minutes, preset.seconds))
 
     await callback.message.edit_text(
         t("timer_preset_loaded", lang, name=preset.name),
@@ -538,7 +477,7 @@ async def preset_replace_menu(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    presets = get_user_timer_presets(user_id)
+    presets = await get_user_timer_presets(user_id)
 
     if not presets:
         await callback.answer(t("timer_no_presets_replace", lang), show_alert=True)
@@ -546,7 +485,7 @@ async def preset_replace_menu(callback: CallbackQuery, state: FSMContext):
 
     await callback.message.edit_text(
         t("timer_select_preset_replace", lang),
-        reply_markup=preset_list_keyboard(user_id, "replace", lang)
+        reply_markup=await preset_list_keyboard(user_id, "replace", lang)
     )
     await callback.answer()
 
@@ -575,7 +514,7 @@ async def preset_delete_menu(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    presets = get_user_timer_presets(user_id)
+    presets = await get_user_timer_presets(user_id)
 
     if not presets:
         await callback.answer(t("timer_no_presets_delete", lang), show_alert=True)
@@ -583,7 +522,7 @@ async def preset_delete_menu(callback: CallbackQuery, state: FSMContext):
 
     await callback.message.edit_text(
         t("timer_select_preset_delete", lang),
-        reply_markup=preset_list_keyboard(user_id, "delete", lang)
+        reply_markup=await preset_list_keyboard(user_id, "delete", lang)
     )
     await callback.answer()
 
@@ -598,12 +537,12 @@ async def preset_delete_confirm(callback: CallbackQuery, state: FSMContext):
     preset_id = int(callback.data.split("_")[-1])
 
     # Verify ownership before deletion
-    preset = get_timer_preset_by_id(preset_id)
+    preset = await get_timer_preset_by_id(preset_id)
     if not preset or preset.user_id != user_id:
         await callback.answer(t("timer_access_denied", lang), show_alert=True)
         return
 
-    delete_timer_preset(preset_id)
+    await delete_timer_preset(preset_id)
     await callback.message.edit_text(
         t("timer_preset_deleted", lang),
         reply_markup=presets_menu_keyboard(lang)
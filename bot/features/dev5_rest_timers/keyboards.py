@@ -45,9 +45,9 @@ def presets_menu_keyboard(lang: str = "en") -> InlineKeyboardMarkup:
     ])
 
 
-def preset_list_keyboard(telegram_id: int, action: str = "load", lang: str = "en") -> InlineKeyboardMarkup:
+async def preset_list_keyboard(telegram_id: int, action: str = "load", lang: str = "en") -> InlineKeyboardMarkup:
     """Build keyboard with list of user's presets"""
-    presets = get_user_timer_presets(telegram_id)
+    presets = await get_user_timer_presets(telegram_id)
     buttons = []
 
     for preset in presets:
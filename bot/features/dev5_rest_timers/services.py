@@ -4,18 +4,19 @@ All database operations for timers.
 """
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import select
 
 from localization.utils import t
 
 from bot.core.models import TimerPreset, User
-from bot.core.database import get_session
+from bot.core.database import get_async_session
 
 
 # ==========================================
 # TIMER PRESETS CRUD
 # ==========================================
 
-def add_timer_preset(
+async def add_timer_preset(
     telegram_id: int,
     name: str,
     hours: int,
@@ -23,7 +24,7 @@ def add_timer_preset(
     seconds: int
 ) -> TimerPreset:
     """Create a new timer preset"""
-    with get_session() as session:
+    async with get_async_session() as session:
         preset = TimerPreset(
             user_id=telegram_id,
             name=name,
@@ -32,46 +33,40 @@ def add_timer_preset(
             seconds=seconds
         )
         session.add(preset)
-        session.commit()
-        session.refresh(preset)
+        await session.commit()
+        await session.refresh(preset)
         return preset
 
 
-def get_user_timer_presets(telegram_id: int) -> list[TimerPreset]:
+async def get_user_timer_presets(telegram_id: int) -> list[TimerPreset]:
     """Get all timer presets for a user"""
-    with get_session() as session:
-        presets = (
-            session.query(TimerPreset)
+    async with get_async_session() as session:
+        result = await session.execute(
+            select(TimerPreset)
             .filter(TimerPreset.user_id == telegram_id)
             .order_by(TimerPreset.created_at.desc())
-            .all()
         )
-        return presets
+        return list(result.scalars().all())
 
 
-def get_timer_preset_by_id(preset_id: int) -> Optional[TimerPreset]:
+async def get_timer_preset_by_id(preset_id: int) -> Optional[TimerPreset]:
     """Get a specific timer preset by ID"""
-    with get_session() as session:
-        preset = (
-            session.query(TimerPreset)
-            .filter(TimerPreset.timer_preset_id == preset_id)
-            .first()
-        )
-        return preset
+    async with get_async_session() as session:
+        return await session.get(TimerPreset, preset_id)
 
 
-def delete_timer_preset(preset_id: int) -> bool:
+async def delete_timer_preset(preset_id: int) -> bool:
     """Delete a timer preset"""
-    with get_session() as session:
-        preset = session.query(TimerPreset).filter(TimerPreset.timer_preset_id == preset_id).first()
+    async with get_async_session() as session:
+        preset = await session.get(TimerPreset, preset_id)
         if preset:
-            session.delete(preset)
-            session.commit()
+            await session.delete(preset)
+            await session.commit()
             return True
         return False
 
 
-def update_timer_preset(
+async def update_timer_preset(
     preset_id: int,
     name: str,
     hours: int,
@@ -79,15 +74,15 @@ def update_timer_preset(
     seconds: int
 ) -> Optional[TimerPreset]:
     """Update an existing timer preset"""
-    with get_session() as session:
-        preset = session.query(TimerPreset).filter(TimerPreset.timer_preset_id == preset_id).first()
+    async with get_async_session() as session:
+        preset = await session.get(TimerPreset, preset_id)
         if preset:
             preset.name = name
             preset.hours = hours
             preset.minutes = minutes
             preset.seconds = seconds
-            session.commit()
-            session.refresh(preset)
+            await session.commit()
+            await session.refresh(preset)
             return preset
         return None
 
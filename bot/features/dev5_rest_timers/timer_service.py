@@ -0,0 +1,259 @@
+"""
+Rest timer service - Dev5 Feature
+
+All running rest timers share one timing wheel (1 s resolution, see
+timer_wheel.py) and one ticker task instead of an asyncio.sleep() task each.
+Running timers are also stored in the running_timers table, so after a restart
+they are loaded back and still complete on time; timers that ran out while the
+bot was down complete right after startup.
+
+The time a user is picking in the timer menu (TimerSettings) lives in a bounded
+TTL cache: users who leave the menu open are forgotten after TIMER_SETTINGS_TTL
+seconds of inactivity, and at most TIMER_SETTINGS_SIZE users are kept.
+
+Usage:
+    await rest_timers.start(on_expire)          # async on_expire(timer)
+    timer = await rest_timers.start_timer(user_id, chat_id, lang, seconds)
+    await rest_timers.stop_timer(user_id)
+    await rest_timers.stop()
+    settings = get_timer_settings(user_id)     # picked time, kept alive while in use
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, select, tuple_, update
+
+from bot.core.cache import TTLCache
+from bot.core.database import get_async_session
+from bot.core.models import RunningTimer
+from .timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+# Timer menu settings (can be overridden from .env)
+TIMER_SETTINGS_SIZE = int(os.getenv("TIMER_SETTINGS_SIZE", "10000"))
+TIMER_SETTINGS_TTL = float(os.getenv("TIMER_SETTINGS_TTL", "3600"))
+
+
+class TimerSettings:
+    """Time picked in the timer menu, before the timer is started"""
+
+    __slots__ = ("hours", "minutes", "seconds")
+
+    def __init__(self, hours: int = 0, minutes: int = 0, seconds: int = 0):
+        self.hours = hours
+        self.minutes = minutes
+        self.seconds = seconds
+
+
+# user_id -> TimerSettings; a missing entry means 00:00:00
+timer_settings = TTLCache(maxsize=TIMER_SETTINGS_SIZE, ttl=TIMER_SETTINGS_TTL)
+
+
+def get_timer_settings(user_id: int) -> TimerSettings:
+    """Return the user's settings (created if missing) and restart their idle TTL"""
+    settings = timer_settings.get(user_id)
+    if settings is None:
+        settings = TimerSettings()
+    timer_settings.set(user_id, settings)
+    return settings
+
+
+class RestTimer:
+    """A running rest timer"""
+
+    __slots__ = ("user_id", "chat_id", "message_id", "lang", "duration", "ends_at")
+
+    def __init__(self, user_id: int, chat_id: int, lang: str, duration: int, ends_at: float,
+                 message_id: int | None = None):
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.message_id = message_id    # "Timer started" message with the stop button
+        self.lang = lang
+        self.duration = duration
+        self.ends_at = ends_at          # Unix timestamp
+
+    def remaining_seconds(self) -> int:
+        return max(0, int(self.ends_at - time.time()))
+
+    def stored_ends_at(self) -> datetime:
+        """ends_at as stored in running_timers; together with user_id it identifies this run"""
+        return datetime.fromtimestamp(self.ends_at, timezone.utc)
+
+
+class RestTimerService:
+    """Timing wheel + SQLite persistence for running rest timers"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._wheel = TimerWheel(int(clock()))
+        self._timers: dict[int, RestTimer] = {}
+        self._on_expire: Callable[[RestTimer], Awaitable[None]] | None = None
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def get(self, user_id: int) -> RestTimer | None:
+        return self._timers.get(user_id)
+
+    # ------------------------------------------------------------------
+    # Timers
+    # ------------------------------------------------------------------
+
+    async def start_timer(self, user_id: int, chat_id: int, lang: str, duration: int) -> RestTimer:
+        """Start (or restart) the user's timer and store it"""
+        timer = RestTimer(user_id, chat_id, lang, duration, self._clock() + duration)
+
+        # Stored before it is scheduled: the row must exist before the timer can expire and delete it
+        async with get_async_session() as session:
+            await session.merge(RunningTimer(
+                user_id=user_id,
+                chat_id=chat_id,
+                message_id=None,
+                lang=lang,
+                duration=duration,
+                ends_at=timer.stored_ends_at()
+            ))
+        self._add(timer)
+        return timer
+
+    async def set_message_id(self, timer: RestTimer, message_id: int):
+        """Remember the message with the stop button (removed when the timer ends)"""
+        timer.message_id = message_id
+        async with get_async_session() as session:
+            await session.execute(
+                update(RunningTimer)
+                .where(RunningTimer.user_id == timer.user_id, RunningTimer.ends_at == timer.stored_ends_at())
+                .values(message_id=message_id)
+            )
+
+    async def stop_timer(self, user_id: int) -> RestTimer | None:
+        """Cancel the user's timer; returns it, or None if nothing was running"""
+        timer = self._timers.pop(user_id, None)
+        if timer is None:
+            return None
+        self._wheel.cancel(user_id)
+
+        async with get_async_session() as session:
+            await session.execute(
+                delete(RunningTimer)
+                .where(RunningTimer.user_id == user_id, RunningTimer.ends_at == timer.stored_ends_at())
+            )
+        return timer
+
+    def _add(self, timer: RestTimer):
+        self._timers[timer.user_id] = timer
+        # Round up: a timer never ends before its full duration
+        self._wheel.schedule(timer.user_id, -int(-timer.ends_at // 1))
+        self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Ticker
+    # ------------------------------------------------------------------
+
+    async def start(self, on_expire: Callable[[RestTimer], Awaitable[None]]):
+        """Load stored timers and start ticking; `on_expire(timer)` is awaited for each finished timer"""
+        if self._task is not None:
+            return
+        self._on_expire = on_expire
+
+        async with get_async_session() as session:
+            result = await session.execute(select(RunningTimer))
+            for row in result.scalars():
+                ends_at = row.ends_at if row.ends_at.tzinfo else row.ends_at.replace(tzinfo=timezone.utc)
+                self._add(RestTimer(
+                    row.user_id, row.chat_id, row.lang or "en", row.duration,
+                    ends_at.timestamp(), row.message_id
+                ))
+
+        self._task = asyncio.create_task(self._run(), name="rest-timers")
+        logger.info(f"⏱️ Rest timers started, {len(self._timers)} restored")
+
+    async def stop(self):
+        """Stop ticking; timers stay stored and resume on the next start"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        await asyncio.gather(task, *self._inflight, return_exceptions=True)
+
+    async def _run(self):
+        # Not `while True`: wait_for() swallows the cancel from stop() when the wakeup is set at the same moment
+        while self._task is not None:
+            self._wakeup.clear()
+            expired = self._wheel.advance(int(self._clock()))
+            if expired:
+                await self._expire(expired)
+
+            next_tick = self._wheel.next_deadline()
+            timeout = None if next_tick is None else max(0.0, next_tick - self._clock())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _expire(self, user_ids: list[int]):
+        timers = [timer for timer in (self._timers.pop(user_id, None) for user_id in user_ids) if timer]
+
+        # Matched on (user_id, ends_at), so a timer the user has restarted meanwhile keeps its row
+        keys = [(timer.user_id, timer.stored_ends_at()) for timer in timers]
+        try:
+            async with get_async_session() as session:
+                for i in range(0, len(keys), 500):
+                    await session.execute(
+                        delete(RunningTimer)
+                        .where(tuple_(RunningTimer.user_id, RunningTimer.ends_at).in_(keys[i:i + 500]))
+                    )
+        except Exception as e:
+            logger.error(f"❌ Could not delete finished timers: {e}")
+
+        for timer in timers:
+            task = asyncio.create_task(self._notify(timer))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _notify(self, timer: RestTimer):
+        try:
+            await self._on_expire(timer)
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"❌ Timer completion for user {timer.user_id} failed: {e}")
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            "running": self.running,
+            "timers": len(self._timers),
+            "inflight": len(self._inflight),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+# Shared instance used by the timer handlers, started/stopped from bot/main.py
+rest_timers = RestTimerService()
+
+
+def timer_state_stats() -> dict:
+    """Gauges of live per-user timer state for monitoring (expired settings are dropped first)"""
+    timer_settings.expire()
+    return {
+        "settings": timer_settings.stats(),
+        "running_timers": len(rest_timers),
+    }
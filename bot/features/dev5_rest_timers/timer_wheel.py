@@ -0,0 +1,140 @@
+"""
+Hierarchical timing wheel for rest timers.
+
+Four levels of 64 slots: level 0 holds timers due within the current 64 s
+(one slot per second), level 1 within the current ~68 min (one slot per 64 s),
+level 2 within ~3 days, level 3 within ~194 days; anything later waits in an
+overflow map. Advancing one tick expires a single level-0 slot, and every
+64**L ticks the next level-L slot is cascaded down. Scheduling and cancelling
+are O(1) no matter how many timers are running.
+
+The wheel only knows integer ticks (seconds) and hashable keys; the rest timer
+service maps keys to users and ticks to Unix time.
+"""
+from typing import Hashable
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+SLOT_MASK = SLOTS - 1
+LEVELS = 4
+
+
+class TimerWheel:
+    """
+    Usage:
+        wheel = TimerWheel(now_tick=int(time.time()))
+        wheel.schedule("user:1", deadline_tick)
+        expired = wheel.advance(int(time.time()))   # keys whose deadline passed
+        wheel.cancel("user:1")
+    """
+
+    def __init__(self, now_tick: int = 0):
+        self.now = now_tick
+        # levels[level][slot] -> {key: deadline}
+        self._levels: list[list[dict[Hashable, int]]] = [[{} for _ in range(SLOTS)] for _ in range(LEVELS)]
+        self._overflow: dict[Hashable, int] = {}
+        self._ready: dict[Hashable, int] = {}           # already due, returned by the next advance()
+        self._where: dict[Hashable, dict[Hashable, int]] = {}   # key -> the dict holding it
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def deadline(self, key: Hashable) -> int | None:
+        bucket = self._where.get(key)
+        return None if bucket is None else bucket[key]
+
+    def schedule(self, key: Hashable, deadline: int):
+        """Add a timer, replacing an existing one with the same key"""
+        self.cancel(key)
+        self._place(key, deadline)
+
+    def cancel(self, key: Hashable) -> bool:
+        """Remove a timer; False if it was not scheduled"""
+        bucket = self._where.pop(key, None)
+        if bucket is None:
+            return False
+        del bucket[key]
+        return True
+
+    def next_deadline(self) -> int | None:
+        """Earliest tick at which advance() may return something (None if empty)"""
+        if not self._where:
+            return None
+        if self._ready:
+            return self.now
+        for level in range(LEVELS):
+            shift = SLOT_BITS * level
+            current = (self.now >> shift) & SLOT_MASK
+            for offset in range(1, SLOTS):
+                slot = self._levels[level][(current + offset) & SLOT_MASK]
+                if slot:
+                    # Lower levels are exact; a cascade tick is a safe lower bound for higher ones
+                    return min(slot.values()) if level == 0 else ((self.now >> shift) + offset) << shift
+        return ((self.now >> (SLOT_BITS * LEVELS)) + 1) << (SLOT_BITS * LEVELS)
+
+    def advance(self, to_tick: int) -> list[Hashable]:
+        """Move the wheel to `to_tick` and return the keys that expired on the way"""
+        expired = list(self._ready)
+        for key in self._ready:
+            del self._where[key]
+        self._ready.clear()
+
+        while self.now < to_tick:
+            self.now += 1
+            now = self.now
+
+            # Cascade from the top so timers fall through to level 0 before it is read
+            for level in range(LEVELS - 1, 0, -1):
+                shift = SLOT_BITS * level
+                if now & ((1 << shift) - 1) == 0:
+                    if level == LEVELS - 1 and self._overflow:
+                        self._cascade(self._overflow)
+                    self._cascade(self._levels[level][(now >> shift) & SLOT_MASK])
+
+            slot = self._levels[0][now & SLOT_MASK]
+            if slot:
+                for key in slot:
+                    del self._where[key]
+                expired.extend(slot)
+                slot.clear()
+
+            expired.extend(self._take_ready())
+
+            # Nothing left below: jump straight to the next cascade boundary
+            if not self._where:
+                self.now = to_tick
+        return expired
+
+    def _take_ready(self) -> list[Hashable]:
+        if not self._ready:
+            return []
+        keys = list(self._ready)
+        for key in keys:
+            del self._where[key]
+        self._ready.clear()
+        return keys
+
+    def _cascade(self, bucket: dict[Hashable, int]):
+        items = list(bucket.items())
+        bucket.clear()
+        for key, deadline in items:
+            del self._where[key]
+            self._place(key, deadline)
+
+    def _place(self, key: Hashable, deadline: int):
+        if deadline <= self.now:
+            bucket = self._ready
+        else:
+            for level in range(LEVELS):
+                shift = SLOT_BITS * level
+                # Same period of the level above: the slot is still ahead of the cursor
+                if deadline >> (shift + SLOT_BITS) == self.now >> (shift + SLOT_BITS):
+                    bucket = self._levels[level][(deadline >> shift) & SLOT_MASK]
+                    break
+            else:
+                bucket = self._overflow
+        bucket[key] = deadline
+        self._where[key] = bucket
@@ -0,0 +1,214 @@
+"""
+Local food database - Dev7 Feature
+
+An offline copy of USDA FoodData Central (built by import_foods.py) in its
+own SQLite file, with an FTS5 index on food names. Searches are answered
+locally in milliseconds; NutritionBot only calls the USDA API when the file
+is missing or has no match.
+
+The file is only ever replaced as a whole (build() writes a temporary file
+and renames it), and every lookup opens its own read-only connection, so a
+re-import never disturbs a running bot.
+"""
+import asyncio
+import logging
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent.parent.parent.parent
+
+# Settings (can be overridden from .env)
+FOOD_DB_PATH = Path(os.getenv("FOOD_DB_PATH") or ROOT_DIR / "data" / "foods.db")
+
+# Per-100 g values stored for every food, same units as NutritionBot.extract_nutrition_data()
+NUTRIENT_COLUMNS = ("calories", "protein", "carbs", "fat", "fiber", "sodium")
+
+SCHEMA = """
+CREATE TABLE foods (
+    fdc_id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    data_type TEXT,
+    calories REAL NOT NULL DEFAULT 0,
+    protein REAL NOT NULL DEFAULT 0,
+    carbs REAL NOT NULL DEFAULT 0,
+    fat REAL NOT NULL DEFAULT 0,
+    fiber REAL,
+    sodium REAL
+);
+CREATE VIRTUAL TABLE foods_fts USING fts5(
+    description,
+    content='foods',
+    content_rowid='fdc_id',
+    tokenize='porter unicode61'
+);
+"""
+
+_WORD = re.compile(r"\w+")
+
+
+def fts_query(query: str) -> str | None:
+    """Every word of the query as a quoted prefix term ("chick" finds "chicken")"""
+    words = _WORD.findall(query.casefold())
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def build(path: Path, foods: Iterable[tuple], batch_size: int = 5000) -> int:
+    """
+    Create the database at `path` from (fdc_id, description, data_type,
+    calories, protein, carbs, fat, fiber, sodium) rows, replacing any
+    existing file. Returns the number of foods stored.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(SCHEMA)
+
+        count = 0
+        batch = []
+        insert = f"INSERT OR REPLACE INTO foods VALUES ({', '.join('?' * 9)})"
+        for row in foods:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.executemany(insert, batch)
+                count += len(batch)
+                batch.clear()
+        conn.executemany(insert, batch)
+        count += len(batch)
+
+        # External-content index: built once from the foods table, then compacted
+        conn.execute("INSERT INTO foods_fts(foods_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO foods_fts(foods_fts) VALUES ('optimize')")
+        conn.commit()
+    finally:
+        conn.close()
+
+    tmp_path.replace(path)
+    return count
+
+
+class LocalFoodDatabase:
+    """
+    Usage:
+        foods = await local_foods.search("chicken breast", 5)    # None = not available
+        food_data = await local_foods.get_food(fdc_id)
+    """
+
+    def __init__(self, path: Path = FOOD_DB_PATH):
+        self.path = Path(path)
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @property
+    def available(self) -> bool:
+        return self.path.exists()
+
+    async def search(self, query: str, limit: int = 5) -> list[dict] | None:
+        """
+        Best matches as USDA-style search hits ({"fdcId", "description"}).
+        None if the database is missing or unreadable (the caller falls back to the API).
+        """
+        match = fts_query(query)
+        if match is None or not self.available:
+            return None
+        try:
+            rows = await asyncio.to_thread(self._search, match, limit)
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Local food search failed: {e}")
+            return None
+
+        if rows:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return [{"fdcId": fdc_id, "description": description} for fdc_id, description in rows]
+
+    async def get_food(self, fdc_id: int) -> dict | None:
+        """Nutrition data in the NutritionBot.get_food_details() format, None if unknown"""
+        if not self.available:
+            return None
+        try:
+            row = await asyncio.to_thread(self._get_food, fdc_id)
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Local food lookup failed: {e}")
+            return None
+        if row is None:
+            return None
+        return {"fdc_id": row[0], "name": row[1], **dict(zip(NUTRIENT_COLUMNS, row[2:]))}
+
+    async def get_foods(self, fdc_ids: list[int]) -> dict[int, dict]:
+        """Several foods at once, keyed by fdc_id (unknown ones are left out)"""
+        if not fdc_ids or not self.available:
+            return {}
+        try:
+            rows = await asyncio.to_thread(self._get_foods, fdc_ids)
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Local food lookup failed: {e}")
+            return {}
+        return {row[0]: {"fdc_id": row[0], "name": row[1], **dict(zip(NUTRIENT_COLUMNS, row[2:]))} for row in rows}
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+
+    def _search(self, match: str, limit: int) -> list[tuple[int, str]]:
+        conn = self._connect()
+        try:
+            # Best bm25 score first; among equal scores the shorter (more generic) name wins
+            return conn.execute(
+                """
+                SELECT foods.fdc_id, foods.description
+                FROM foods_fts JOIN foods ON foods.fdc_id = foods_fts.rowid
+                WHERE foods_fts MATCH ?
+                ORDER BY bm25(foods_fts), length(foods.description)
+                LIMIT ?
+                """,
+                (match, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def _get_food(self, fdc_id: int) -> tuple | None:
+        rows = self._get_foods([fdc_id])
+        return rows[0] if rows else None
+
+    def _get_foods(self, fdc_ids: list[int]) -> list[tuple]:
+        conn = self._connect()
+        try:
+            return conn.execute(
+                f"SELECT fdc_id, description, {', '.join(NUTRIENT_COLUMNS)} FROM foods "
+                f"WHERE fdc_id IN ({', '.join('?' * len(fdc_ids))})",
+                fdc_ids
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            "available": self.available,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+
+# Shared instance used by NutritionBot
+local_foods = LocalFoodDatabase()
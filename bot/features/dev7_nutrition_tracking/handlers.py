@@ -9,7 +9,6 @@ from aiogram.fsm.context import FSMContext
 from datetime import date
 
 from localization.utils import t
-from bot.features.dev1_workout_tracking.services import get_lang
 
 from .services import nutrition_bot
 from .states import NutritionStates
@@ -27,16 +26,10 @@ from .keyboards import (
 router = Router()
 
 @router.message(Command("nutrition"))
-async def nutrition_start(message: Message, state: FSMContext):
+async def nutrition_start(message: Message, state: FSMContext, lang: str):
     """Handle /nutrition command"""
-    lang = get_lang(message.from_user.id)
     await state.update_data(lang=lang)
 
-    user_id = message.from_user.id
-    username = message.from_user.username
-
-    nutrition_bot.db.ensure_user_exists(user_id, username)
-
     keyboard = create_main_menu()
     await message.answer(t("nutrition_welcome", lang), parse_mode="HTML", reply_markup=keyboard)
 
@@ -112,6 +105,8 @@ async def handle_food_search(message: Message, state: FSMContext):
         return
 
     keyboard = create_food_results_keyboard(foods)
+    # The user is about to pick one of the shown foods: load their details now, in one request
+    nutrition_bot.prefetch_food_details([food.get('fdcId') for food in foods[:5]])
     await searching_msg.edit_text(
         t("nutrition_search_results", lang, query=query),
         parse_mode="HTML",
@@ -178,7 +173,7 @@ async def handle_portion_input(message: Message, state: FSMContext):
         fat = food_data['fat'] * multiplier
 
         user_id = message.from_user.id
-        nutrition_bot.db.log_meal(
+        await nutrition_bot.db.log_meal(
             user_id, meal_type, food_data['fdc_id'], food_data['name'],
             portion_grams, calories, protein, carbs, fat
         )
@@ -218,8 +213,8 @@ async def daily_summary_callback(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    intake = nutrition_bot.db.get_daily_intake(user_id)
-    goals = nutrition_bot.db.get_user_goals(user_id)
+    intake = await nutrition_bot.db.get_daily_intake(user_id)
+    goals = await nutrition_bot.db.get_user_goals(user_id)
 
     response = t("nutrition_daily_summary_header", lang, date=date.today().strftime('%B %d, %Y'))
     response += "\n\n" + t("nutrition_todays_intake", lang,
@@ -268,7 +263,7 @@ async def set_goals_callback(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    current_goals = nutrition_bot.db.get_user_goals(user_id)
+    current_goals = await nutrition_bot.db.get_user_goals(user_id)
 
     if current_goals:
         response = t("nutrition_current_goals", lang,
@@ -389,7 +384,7 @@ async def handle_goal_fat(message: Message, state: FSMContext):
 
         user_id = message.from_user.id
 
-        nutrition_bot.db.set_user_goals(
+        await nutrition_bot.db.set_user_goals(
             user_id,
             data['goal_calories'],
             data['goal_protein'],
@@ -571,7 +566,7 @@ async def handle_calculator_goal_type(callback: CallbackQuery, state: FSMContext
     )
 
     user_id = callback.from_user.id
-    nutrition_bot.db.set_user_goals(
+    await nutrition_bot.db.set_user_goals(
         user_id,
         goals['calories'],
         goals['protein'],
@@ -620,7 +615,7 @@ async def view_meals_callback(callback: CallbackQuery, state: FSMContext):
     lang = data.get('lang', 'en')
 
     user_id = callback.from_user.id
-    meals = nutrition_bot.db.get_daily_meals(user_id)
+    meals = await nutrition_bot.db.get_daily_meals(user_id)
 
     if not meals:
         keyboard = InlineKeyboardMarkup(inline_keyboard=[
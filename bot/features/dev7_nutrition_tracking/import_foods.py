@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import a USDA FoodData Central dump into the local food database (food_db.py).
+
+Accepts the downloads from https://fdc.nal.usda.gov/download-datasets:
+- CSV: a directory with food.csv and food_nutrient.csv
+- JSON: e.g. FoodData_Central_sr_legacy_food_json_*.json
+
+Several dumps can be imported at once (SR Legacy + Foundation). Only the
+data types the bot searches are kept unless --data-types says otherwise.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .food_db import FOOD_DB_PATH, build
+
+logger = logging.getLogger(__name__)
+
+# USDA nutrient id -> (column, factor); same nutrients as NutritionBot.extract_nutrition_data()
+NUTRIENTS = {
+    1008: ("calories", 1),      # Energy (kcal)
+    1003: ("protein", 1),
+    1005: ("carbs", 1),
+    1004: ("fat", 1),
+    1079: ("fiber", 1),
+    1093: ("sodium", 0.001),    # mg -> g
+}
+COLUMNS = ("calories", "protein", "carbs", "fat", "fiber", "sodium")
+
+# data_type in the CSV dump -> dataType in the API / JSON dump
+CSV_DATA_TYPES = {
+    "foundation_food": "Foundation",
+    "sr_legacy_food": "SR Legacy",
+    "survey_fndds_food": "Survey (FNDDS)",
+    "branded_food": "Branded",
+}
+DEFAULT_DATA_TYPES = ("Foundation", "SR Legacy")
+
+
+def _row(fdc_id: int, description: str, data_type: str, values: dict[str, float]) -> tuple:
+    return (fdc_id, description, data_type, *(values.get(column, 0) for column in COLUMNS))
+
+
+def read_csv_dump(directory: Path, data_types: set[str]) -> Iterator[tuple]:
+    """Rows from food.csv + food_nutrient.csv (streamed, only wanted foods are kept in memory)"""
+    foods: dict[int, tuple[str, str]] = {}
+    with open(directory / "food.csv", newline="", encoding="utf-8") as f:
+        for record in csv.DictReader(f):
+            data_type = CSV_DATA_TYPES.get(record["data_type"], record["data_type"])
+            if data_type in data_types:
+                foods[int(record["fdc_id"])] = (record["description"], data_type)
+
+    values: dict[int, dict[str, float]] = {}
+    with open(directory / "food_nutrient.csv", newline="", encoding="utf-8") as f:
+        for record in csv.DictReader(f):
+            nutrient = NUTRIENTS.get(int(record["nutrient_id"]))
+            fdc_id = int(record["fdc_id"])
+            if nutrient is None or fdc_id not in foods or not record["amount"]:
+                continue
+            column, factor = nutrient
+            values.setdefault(fdc_id, {})[column] = float(record["amount"]) * factor
+
+    for fdc_id, (description, data_type) in foods.items():
+        yield _row(fdc_id, description, data_type, values.get(fdc_id, {}))
+
+
+def read_json_dump(path: Path, data_types: set[str]) -> Iterator[tuple]:
+    """Rows from a JSON dump ({"SRLegacyFoods": [...]}, {"FoundationFoods": [...]}, ...)"""
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+
+    for items in document.values():
+        if not isinstance(items, list):
+            continue
+        for item in items:
+            if item.get("dataType") not in data_types:
+                continue
+            values = {}
+            for nutrient in item.get("foodNutrients", []):
+                mapped = NUTRIENTS.get(nutrient.get("nutrient", {}).get("id"))
+                if mapped and nutrient.get("amount") is not None:
+                    column, factor = mapped
+                    values[column] = nutrient["amount"] * factor
+            yield _row(item["fdcId"], item.get("description", "Unknown food"), item["dataType"], values)
+
+
+def read_dumps(paths: Iterable[Path], data_types: set[str]) -> Iterator[tuple]:
+    for path in paths:
+        logger.info(f"📦 Reading {path}...")
+        if path.is_dir():
+            yield from read_csv_dump(path, data_types)
+        else:
+            yield from read_json_dump(path, data_types)
+
+
+def import_foods(paths: list[Path], output: Path | None = None,
+                 data_types: Iterable[str] = DEFAULT_DATA_TYPES) -> int:
+    """Build the local food database from the dumps; returns the number of foods stored"""
+    output = output or FOOD_DB_PATH
+    count = build(output, read_dumps(paths, set(data_types)))
+    logger.info(f"✅ Stored {count} foods in {output}")
+    return count
+
+
+# ============================================================================
+# STANDALONE SCRIPT EXECUTION
+# ============================================================================
+
+if __name__ == "__main__":
+    """
+    Run manually:
+    python -m bot.features.dev7_nutrition_tracking.import_foods FoodData_Central_sr_legacy_food_csv_2018-04/
+    """
+    ROOT_DIR = Path(__file__).parent.parent.parent.parent
+    sys.path.insert(0, str(ROOT_DIR))
+    sys.path.insert(0, str(ROOT_DIR / "bot"))
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("dumps", nargs="+", type=Path, help="CSV dump directories and/or JSON dump files")
+    parser.add_argument("--output", type=Path, help="database file (default: FOOD_DB_PATH)")
+    parser.add_argument("--data-types", default=",".join(DEFAULT_DATA_TYPES),
+                        help="comma-separated dataType values to keep")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = import_foods(args.dumps, args.output, [t.strip() for t in args.data_types.split(",")])
+    print(f"\n🥗 Local food database ready: {count} foods")
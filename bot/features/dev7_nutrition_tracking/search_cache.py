@@ -0,0 +1,156 @@
+"""
+Food search cache - Dev7 Feature
+
+USDA search results keyed by the normalized query and page size, so
+"Chicken  Breast" and "chicken breast" typed by hundreds of users share one
+entry and one API call.
+
+Two tiers, both expiring after FOOD_SEARCH_CACHE_TTL:
+- memory: LRU (core TTLCache)
+- database: food_search_cache table, survives restarts and memory eviction
+
+Concurrent misses for the same query share one in-flight request (core
+SingleFlight). Failed requests are not cached; empty result lists are.
+"""
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, select
+
+from bot.core.cache import SingleFlight, TTLCache
+from bot.core.database import get_async_session
+from bot.core.models import FoodSearchCache
+
+logger = logging.getLogger(__name__)
+
+# Settings (can be overridden from .env)
+FOOD_SEARCH_CACHE_SIZE = int(os.getenv("FOOD_SEARCH_CACHE_SIZE", "1000"))
+FOOD_SEARCH_CACHE_TTL = float(os.getenv("FOOD_SEARCH_CACHE_TTL", "604800"))    # USDA data changes rarely
+
+# Expired rows are swept from the database tier every N writes
+DB_PRUNE_EVERY = 100
+
+# Fields of a USDA search hit that the results keyboard uses
+RESULT_FIELDS = ("fdcId", "description")
+
+
+def normalize_query(query: str) -> str:
+    """Case-insensitive, whitespace-collapsed form of a search query"""
+    return " ".join(query.casefold().split())
+
+
+class SearchCache:
+    """
+    Usage:
+        foods = await search_cache.get_or_fetch(query, 5, lambda normalized: usda_search(normalized, 5))
+    """
+
+    def __init__(self, maxsize: int = FOOD_SEARCH_CACHE_SIZE, ttl: float = FOOD_SEARCH_CACHE_TTL):
+        self.ttl = ttl
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.flights = SingleFlight()
+
+        # Metrics (memory hits/misses are in self.memory.stats())
+        self.db_hits = 0
+        self.api_calls = 0
+        self.api_errors = 0
+        self._db_writes = 0
+
+    @staticmethod
+    def make_key(query: str, limit: int) -> str:
+        return f"{limit}:{normalize_query(query)}"
+
+    async def get_or_fetch(self, query: str, limit: int,
+                           fetch: Callable[[str], Awaitable[list[dict] | None]]) -> list[dict]:
+        """
+        Cached results for `query`, else `fetch(normalized_query)`.
+        `fetch` returns the USDA hits, or None if the request failed.
+        """
+        key = self.make_key(query, limit)
+        foods = self.memory.get(key)
+        if foods is not None:
+            return foods
+        return await self.flights.do(key, lambda: self._load(key, normalize_query(query), fetch))
+
+    async def _load(self, key: str, query: str,
+                    fetch: Callable[[str], Awaitable[list[dict] | None]]) -> list[dict]:
+        cached = await self._read_db(key)
+        if cached is not None:
+            foods, expires_in = cached
+            self.db_hits += 1
+            self.memory.set(key, foods, ttl=expires_in)
+            return foods
+
+        self.api_calls += 1
+        hits = await fetch(query)
+        if hits is None:
+            self.api_errors += 1
+            return []
+
+        foods = [{field: hit.get(field) for field in RESULT_FIELDS} for hit in hits]
+        self.memory.set(key, foods)
+        await self._write_db(key, foods)
+        return foods
+
+    async def _read_db(self, key: str) -> tuple[list[dict], float] | None:
+        """Stored results and their remaining TTL in seconds, None if missing or expired"""
+        try:
+            async with get_async_session() as session:
+                result = await session.execute(
+                    select(FoodSearchCache.results, FoodSearchCache.cached_at)
+                    .where(FoodSearchCache.query_key == key)
+                )
+                row = result.first()
+        except Exception as e:
+            logger.warning(f"⚠️ Food search cache read failed: {e}")
+            return None
+
+        if row is None:
+            return None
+        cached_at = row.cached_at if row.cached_at.tzinfo else row.cached_at.replace(tzinfo=timezone.utc)
+        expires_in = self.ttl - (datetime.now(timezone.utc) - cached_at).total_seconds()
+        if expires_in <= 0:
+            return None
+        return row.results, expires_in
+
+    async def _write_db(self, key: str, foods: list[dict]):
+        try:
+            async with get_async_session() as session:
+                await session.merge(FoodSearchCache(
+                    query_key=key,
+                    results=foods,
+                    cached_at=datetime.now(timezone.utc)
+                ))
+            self._db_writes += 1
+            if self._db_writes % DB_PRUNE_EVERY == 0:
+                await self.prune_db()
+        except Exception as e:
+            logger.warning(f"⚠️ Food search cache write failed: {e}")
+
+    async def prune_db(self) -> int:
+        """Delete expired rows from the database tier"""
+        expire_before = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+        async with get_async_session() as session:
+            result = await session.execute(
+                delete(FoodSearchCache).where(FoodSearchCache.cached_at < expire_before)
+            )
+        return result.rowcount
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        lookups = self.memory.hits + self.memory.misses
+        return {
+            **self.memory.stats(),
+            "db_hits": self.db_hits,
+            "api_calls": self.api_calls,
+            "api_errors": self.api_errors,
+            "coalesced": self.flights.shared,
+            # Share of searches answered without a USDA request
+            "total_hit_rate": 1 - self.api_calls / lookups if lookups else 0.0,
+        }
+
+
+# Shared instance used by NutritionBot.search_food()
+search_cache = SearchCache()
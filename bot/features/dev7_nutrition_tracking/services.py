@@ -1,16 +1,33 @@
-import aiohttp
+import asyncio
 import logging
-from datetime import date
-from typing import Dict, List, Optional
-from sqlalchemy import func
-from bot.core.database import get_session
+import os
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from bot.core.database import get_async_session
 from bot.core.models import User, NutritionGoal, FoodCache, NutritionMeal
+from bot.core.cache import CachedUser, SingleFlight, TTLCache, user_cache
+from bot.core.http import http_client
+from .food_db import local_foods
+from .search_cache import search_cache
 
 logger = logging.getLogger(__name__)
 
-# USDA API Configuration
-USDA_API_KEY = "3X3lZVkwbI7csqXUY0fOxkKm1bdBN8OeJSwZX74y"
-USDA_BASE_URL = "https://api.nal.usda.gov/fdc/v1"
+# USDA API Configuration (can be overridden from .env)
+USDA_API_KEY = os.getenv("USDA_API_KEY") or "3X3lZVkwbI7csqXUY0fOxkKm1bdBN8OeJSwZX74y"
+USDA_BASE_URL = os.getenv("USDA_BASE_URL") or "https://api.nal.usda.gov/fdc/v1"
+
+# Food details cache: hot memory tier in front of the food_cache table.
+# Rows older than FOOD_STALE_AFTER are still served, and refreshed from USDA in the background.
+FOOD_CACHE_SIZE = int(os.getenv("FOOD_CACHE_SIZE", "2000"))
+FOOD_CACHE_TTL = float(os.getenv("FOOD_CACHE_TTL", "3600"))
+FOOD_STALE_AFTER = float(os.getenv("FOOD_STALE_AFTER", "2592000"))        # 30 days
+FOOD_REFRESH_RETRY = float(os.getenv("FOOD_REFRESH_RETRY", "300"))       # after a failed refresh
+
+# Nutrient numbers (not ids) requested from POST /foods: kcal, protein, carbs, fat, fiber, sodium
+BATCH_NUTRIENT_NUMBERS = [208, 203, 205, 204, 291, 307]
 
 
 class NutritionCalculator:
@@ -90,10 +107,14 @@ class NutritionDatabase:
     """Database operations for nutrition tracking"""
     
     @staticmethod
-    def ensure_user_exists(telegram_id: int, username: str = None):
+    async def ensure_user_exists(telegram_id: int, username: str = None):
         """Ensure user exists in database"""
-        with get_session() as session:
-            user = session.query(User).filter_by(telegram_id=telegram_id).first()
+        if user_cache.get(telegram_id) is not None:
+            return
+
+        async with get_async_session() as session:
+            result = await session.execute(select(User).filter_by(telegram_id=telegram_id))
+            user = result.scalars().first()
             if not user:
                 user = User(
                     user_id=telegram_id,
@@ -101,15 +122,17 @@ class NutritionDatabase:
                     username=username
                 )
                 session.add(user)
-                session.commit()
+                await session.commit()
+            user_cache.set(telegram_id, CachedUser.from_model(user))
     
     @staticmethod
-    def set_user_goals(user_id: int, calories: float, protein: float, 
-                      carbs: float, fat: float, bmr: float = None, 
-                      tdee: float = None, goal_type: str = None):
+    async def set_user_goals(user_id: int, calories: float, protein: float, 
+                            carbs: float, fat: float, bmr: float = None, 
+                            tdee: float = None, goal_type: str = None):
         """Set or update user's nutrition goals"""
-        with get_session() as session:
-            goal = session.query(NutritionGoal).filter_by(user_id=user_id).first()
+        async with get_async_session() as session:
+            result = await session.execute(select(NutritionGoal).filter_by(user_id=user_id))
+            goal = result.scalars().first()
             
             if goal:
                 # Update existing goal
@@ -134,13 +157,14 @@ class NutritionDatabase:
                 )
                 session.add(goal)
             
-            session.commit()
+            await session.commit()
     
     @staticmethod
-    def get_user_goals(user_id: int) -> Optional[Dict]:
+    async def get_user_goals(user_id: int) -> Optional[Dict]:
         """Get user's nutrition goals"""
-        with get_session() as session:
-            goal = session.query(NutritionGoal).filter_by(user_id=user_id).first()
+        async with get_async_session() as session:
+            result = await session.execute(select(NutritionGoal).filter_by(user_id=user_id))
+            goal = result.scalars().first()
             
             if goal:
                 return {
@@ -155,44 +179,64 @@ class NutritionDatabase:
             return None
     
     @staticmethod
-    def cache_food(food_data: dict):
-        """Cache food data in database"""
-        with get_session() as session:
-            food = session.query(FoodCache).filter_by(fdc_id=food_data['fdc_id']).first()
-            
-            if food:
-                # Update existing cache
-                food.name = food_data['name']
-                food.calories_per_100g = food_data.get('calories', 0)
-                food.protein_per_100g = food_data.get('protein', 0)
-                food.carbs_per_100g = food_data.get('carbs', 0)
-                food.fat_per_100g = food_data.get('fat', 0)
-                food.fiber_per_100g = food_data.get('fiber')
-                food.sodium_per_100g = food_data.get('sodium')
-            else:
-                # Create new cache entry
-                food = FoodCache(
-                    fdc_id=food_data['fdc_id'],
-                    name=food_data['name'],
-                    calories_per_100g=food_data.get('calories', 0),
-                    protein_per_100g=food_data.get('protein', 0),
-                    carbs_per_100g=food_data.get('carbs', 0),
-                    fat_per_100g=food_data.get('fat', 0),
-                    fiber_per_100g=food_data.get('fiber'),
-                    sodium_per_100g=food_data.get('sodium')
-                )
-                session.add(food)
-            
-            session.commit()
+    async def cache_food(food_data: dict):
+        """Cache food data in database (UPSERT: a concurrent refresh of the same food can't collide)"""
+        await NutritionDatabase.cache_foods([food_data])
     
     @staticmethod
-    def get_cached_food(fdc_id: int) -> Optional[Dict]:
+    async def get_cached_food(fdc_id: int) -> Optional[Dict]:
         """Get cached food data"""
-        with get_session() as session:
-            food = session.query(FoodCache).filter_by(fdc_id=fdc_id).first()
+        entry = await NutritionDatabase.get_cached_food_entry(fdc_id)
+        return entry[0] if entry else None
+    
+    @staticmethod
+    async def cache_foods(foods: List[Dict]):
+        """Cache several foods with one UPSERT"""
+        if not foods:
+            return
+        now = datetime.now(timezone.utc)
+        stmt = sqlite_insert(FoodCache).values([
+            {
+                'fdc_id': food_data['fdc_id'],
+                'name': food_data['name'],
+                'calories_per_100g': food_data.get('calories', 0),
+                'protein_per_100g': food_data.get('protein', 0),
+                'carbs_per_100g': food_data.get('carbs', 0),
+                'fat_per_100g': food_data.get('fat', 0),
+                'fiber_per_100g': food_data.get('fiber'),
+                'sodium_per_100g': food_data.get('sodium'),
+                'cached_at': now
+            }
+            for food_data in foods
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['fdc_id'],
+            set_={
+                column: stmt.excluded[column]
+                for column in ('name', 'calories_per_100g', 'protein_per_100g', 'carbs_per_100g',
+                               'fat_per_100g', 'fiber_per_100g', 'sodium_per_100g', 'cached_at')
+            }
+        )
+        async with get_async_session() as session:
+            await session.execute(stmt)
+    
+    @staticmethod
+    async def get_cached_food_entry(fdc_id: int) -> Optional[Tuple[Dict, datetime]]:
+        """Get cached food data and when it was fetched from USDA"""
+        entries = await NutritionDatabase.get_cached_food_entries([fdc_id])
+        return entries.get(fdc_id)
+    
+    @staticmethod
+    async def get_cached_food_entries(fdc_ids: List[int]) -> Dict[int, Tuple[Dict, datetime]]:
+        """Get cached food data and fetch times for several foods (missing ones are left out)"""
+        async with get_async_session() as session:
+            result = await session.execute(select(FoodCache).where(FoodCache.fdc_id.in_(fdc_ids)))
+            foods = result.scalars().all()
             
-            if food:
-                return {
+            entries = {}
+            for food in foods:
+                cached_at = food.cached_at if food.cached_at.tzinfo else food.cached_at.replace(tzinfo=timezone.utc)
+                entries[food.fdc_id] = ({
                     'fdc_id': food.fdc_id,
                     'name': food.name,
                     'calories': food.calories_per_100g,
@@ -201,17 +245,18 @@ class NutritionDatabase:
                     'fat': food.fat_per_100g,
                     'fiber': food.fiber_per_100g,
                     'sodium': food.sodium_per_100g
-                }
-            return None
+                }, cached_at)
+            return entries
     
     @staticmethod
-    def log_meal(user_id: int, meal_type: str, fdc_id: int, food_name: str,
-                 portion_grams: float, calories: float, protein: float, 
-                 carbs: float, fat: float):
+    async def log_meal(user_id: int, meal_type: str, fdc_id: int, food_name: str,
+                       portion_grams: float, calories: float, protein: float, 
+                       carbs: float, fat: float):
         """Log a meal entry"""
-        with get_session() as session:
+        async with get_async_session() as session:
             # Get the food_cache_id for this fdc_id
-            food_cache = session.query(FoodCache).filter_by(fdc_id=fdc_id).first()
+            result = await session.execute(select(FoodCache).filter_by(fdc_id=fdc_id))
+            food_cache = result.scalars().first()
             
             if not food_cache:
                 logger.error(f"FoodCache not found for fdc_id {fdc_id}")
@@ -231,24 +276,27 @@ class NutritionDatabase:
                 fat=fat
             )
             session.add(meal)
-            session.commit()
+            await session.commit()
     
     @staticmethod
-    def get_daily_intake(user_id: int, target_date: date = None) -> Dict:
+    async def get_daily_intake(user_id: int, target_date: date = None) -> Dict:
         """Get user's total daily intake"""
         if target_date is None:
             target_date = date.today()
         
-        with get_session() as session:
-            result = session.query(
-                func.sum(NutritionMeal.calories).label('calories'),
-                func.sum(NutritionMeal.protein).label('protein'),
-                func.sum(NutritionMeal.carbs).label('carbs'),
-                func.sum(NutritionMeal.fat).label('fat')
-            ).filter(
-                NutritionMeal.user_id == user_id,
-                NutritionMeal.date == target_date
-            ).first()
+        async with get_async_session() as session:
+            result = await session.execute(
+                select(
+                    func.sum(NutritionMeal.calories).label('calories'),
+                    func.sum(NutritionMeal.protein).label('protein'),
+                    func.sum(NutritionMeal.carbs).label('carbs'),
+                    func.sum(NutritionMeal.fat).label('fat')
+                ).filter(
+                    NutritionMeal.user_id == user_id,
+                    NutritionMeal.date == target_date
+                )
+            )
+            result = result.first()
             
             return {
                 'calories': result.calories or 0,
@@ -258,16 +306,19 @@ class NutritionDatabase:
             }
     
     @staticmethod
-    def get_daily_meals(user_id: int, target_date: date = None) -> List[Dict]:
+    async def get_daily_meals(user_id: int, target_date: date = None) -> List[Dict]:
         """Get user's meals for a specific date"""
         if target_date is None:
             target_date = date.today()
         
-        with get_session() as session:
-            meals = session.query(NutritionMeal).filter(
-                NutritionMeal.user_id == user_id,
-                NutritionMeal.date == target_date
-            ).order_by(NutritionMeal.logged_at.desc()).all()
+        async with get_async_session() as session:
+            result = await session.execute(
+                select(NutritionMeal).filter(
+                    NutritionMeal.user_id == user_id,
+                    NutritionMeal.date == target_date
+                ).order_by(NutritionMeal.logged_at.desc())
+            )
+            meals = result.scalars().all()
             
             return [
                 {
@@ -284,28 +335,54 @@ class NutritionDatabase:
             ]
 
 
+class CachedFood:
+    """Hot-tier entry for one food: its data, when USDA returned it and when a refresh may be tried"""
+    
+    __slots__ = ("data", "cached_at", "refresh_at")
+    
+    def __init__(self, data: Dict, cached_at: float):
+        self.data = data
+        self.cached_at = cached_at
+        self.refresh_at = cached_at + FOOD_STALE_AFTER
+
+
 class NutritionBot:
     """Main nutrition bot service with USDA API integration"""
     
     def __init__(self):
-        self.session = None
         self.db = NutritionDatabase()
         self.calculator = NutritionCalculator()
+        
+        # fdc_id -> CachedFood, in front of the food_cache table
+        self.food_memory = TTLCache(maxsize=FOOD_CACHE_SIZE, ttl=FOOD_CACHE_TTL)
+        self.food_flights = SingleFlight()
+        self._prefetches: dict[int, asyncio.Task] = {}      # fdc_id -> batch prefetch in flight
+        self._background: set[asyncio.Task] = set()
+        
+        # Metrics (memory hits/misses are in self.food_memory.stats())
+        self.food_db_hits = 0
+        self.food_api_calls = 0
+        self.food_prefetched = 0
+        self.food_batch_calls = 0
+        self.food_refreshes = 0
+        self.food_refresh_failures = 0
     
-    async def ensure_session(self):
-        """Ensure aiohttp session exists"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
-    
-    async def close_session(self):
-        """Close aiohttp session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
+    async def close(self):
+        """Cancel background refreshes and prefetches (called on shutdown, HTTP is closed by http_client)"""
+        tasks = list(self._background)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
     
     async def search_food(self, query: str, limit: int = 5):
-        """Search for food using USDA API"""
-        await self.ensure_session()
-        
+        """Search for food: local food database first, then the (cached) USDA API"""
+        foods = await local_foods.search(query, limit)
+        if foods:
+            return foods
+        return await search_cache.get_or_fetch(query, limit, lambda normalized: self.search_usda(normalized, limit))
+    
+    async def search_usda(self, query: str, limit: int = 5) -> Optional[List[Dict]]:
+        """Search for food using USDA API (None if the request failed)"""
         url = f"{USDA_BASE_URL}/foods/search"
         params = {
             "api_key": USDA_API_KEY,
@@ -315,45 +392,159 @@ class NutritionBot:
         }
         
         try:
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('foods', [])
-                else:
-                    logger.error(f"API request failed with status {response.status}")
-                    return []
+            status, data = await http_client.request_json("GET", url, params=params)
+            if status == 200:
+                return data.get('foods', [])
+            else:
+                logger.error(f"API request failed with status {status}")
+                return None
         except Exception as e:
             logger.error(f"Error searching food: {e}")
-            return []
+            return None
     
     async def get_food_details(self, fdc_id: int):
-        """Get detailed food information"""
-        # First check cache
-        cached = self.db.get_cached_food(fdc_id)
+        """
+        Get detailed food information: memory, then the food_cache table, the local
+        food database and finally USDA.
+        Stale entries are returned right away and refreshed in the background.
+        """
+        entry = self.food_memory.get(fdc_id)
+        if entry is None and fdc_id in self._prefetches:
+            # Selected while the search results are still being prefetched
+            await asyncio.shield(self._prefetches[fdc_id])
+            entry = self.food_memory.peek(fdc_id)
+        if entry is None:
+            # Concurrent selections of the same food share one lookup (and one insert)
+            entry = await self.food_flights.do(fdc_id, lambda: self._load_food(fdc_id))
+            if entry is None:
+                return None
+        
+        now = time.time()
+        if now >= entry.refresh_at and fdc_id not in self.food_flights:
+            entry.refresh_at = now + FOOD_REFRESH_RETRY
+            task = asyncio.create_task(self.food_flights.do(fdc_id, lambda: self._refresh_food(fdc_id)))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+        
+        return entry.data
+    
+    def prefetch_food_details(self, fdc_ids: List[int]):
+        """
+        Load details of the displayed search results in the background, so the
+        user's selection is a cache hit: one database query, one local database
+        query and one batched USDA request (POST /foods) for whatever is left.
+        """
+        fdc_ids = [
+            fdc_id for fdc_id in dict.fromkeys(fdc_ids)
+            if fdc_id is not None and self.food_memory.peek(fdc_id) is None
+            and fdc_id not in self._prefetches and fdc_id not in self.food_flights
+        ]
+        if not fdc_ids:
+            return
+        
+        task = asyncio.create_task(self._prefetch_foods(fdc_ids))
+        for fdc_id in fdc_ids:
+            self._prefetches[fdc_id] = task
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+    
+    async def _prefetch_foods(self, fdc_ids: List[int]):
+        try:
+            cached = await self.db.get_cached_food_entries(fdc_ids)
+            for fdc_id, (food_data, cached_at) in cached.items():
+                self.food_memory.set(fdc_id, CachedFood(food_data, cached_at.timestamp()))
+            missing = [fdc_id for fdc_id in fdc_ids if fdc_id not in cached]
+            
+            fetched = list((await local_foods.get_foods(missing)).values())
+            found = {food_data['fdc_id'] for food_data in fetched}
+            remaining = [fdc_id for fdc_id in missing if fdc_id not in found]
+            if remaining:
+                fetched.extend(await self.fetch_foods_usda(remaining) or [])
+            
+            if fetched:
+                # Meals reference food_cache rows, so store before serving from memory
+                await self.db.cache_foods(fetched)
+                now = time.time()
+                for food_data in fetched:
+                    self.food_memory.set(food_data['fdc_id'], CachedFood(food_data, now))
+                self.food_prefetched += len(fetched)
+        except Exception as e:
+            logger.warning(f"⚠️ Food details prefetch failed: {e}")
+        finally:
+            for fdc_id in fdc_ids:
+                self._prefetches.pop(fdc_id, None)
+    
+    async def fetch_foods_usda(self, fdc_ids: List[int]) -> Optional[List[Dict]]:
+        """Nutrition data for several foods in one USDA request (None if it failed)"""
+        self.food_batch_calls += 1
+        
+        url = f"{USDA_BASE_URL}/foods"
+        params = {"api_key": USDA_API_KEY}
+        payload = {
+            "fdcIds": fdc_ids,
+            "format": "full",
+            "nutrients": BATCH_NUTRIENT_NUMBERS
+        }
+        
+        try:
+            status, data = await http_client.request_json("POST", url, params=params, json=payload)
+            if status == 200:
+                return [self.extract_nutrition_data(food) for food in data if food.get('fdcId')]
+            else:
+                logger.error(f"API request failed with status {status}")
+                return None
+        except Exception as e:
+            logger.error(f"Error getting food details: {e}")
+            return None
+    
+    async def _load_food(self, fdc_id: int) -> Optional[CachedFood]:
+        cached = await self.db.get_cached_food_entry(fdc_id)
         if cached:
-            return cached
+            self.food_db_hits += 1
+            food_data, cached_at = cached
+            entry = CachedFood(food_data, cached_at.timestamp())
+            self.food_memory.set(fdc_id, entry)
+            return entry
         
-        await self.ensure_session()
+        # Foods found in the local database; stored in food_cache too, meals reference it
+        food_data = await local_foods.get_food(fdc_id)
+        if food_data:
+            await self.db.cache_food(food_data)
+            entry = CachedFood(food_data, time.time())
+            self.food_memory.set(fdc_id, entry)
+            return entry
+        
+        return await self._fetch_food(fdc_id)
+    
+    async def _refresh_food(self, fdc_id: int) -> Optional[CachedFood]:
+        self.food_refreshes += 1
+        entry = await self._fetch_food(fdc_id)
+        if entry is None:
+            self.food_refresh_failures += 1
+        return entry
+    
+    async def _fetch_food(self, fdc_id: int) -> Optional[CachedFood]:
+        """Fetch a food from USDA and store it in both cache tiers"""
+        self.food_api_calls += 1
         
-        # If not cached, fetch from API
         url = f"{USDA_BASE_URL}/food/{fdc_id}"
         params = {"api_key": USDA_API_KEY}
         
         try:
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    # Extract and format nutrition data
-                    food_data = self.extract_nutrition_data(data)
-                    
-                    # Cache the food data
-                    self.db.cache_food(food_data)
-                    
-                    return food_data
-                else:
-                    logger.error(f"API request failed with status {response.status}")
-                    return None
+            status, data = await http_client.request_json("GET", url, params=params)
+            if status == 200:
+                # Extract and format nutrition data
+                food_data = self.extract_nutrition_data(data)
+                
+                # Cache the food data
+                await self.db.cache_food(food_data)
+                
+                entry = CachedFood(food_data, time.time())
+                self.food_memory.set(fdc_id, entry)
+                return entry
+            else:
+                logger.error(f"API request failed with status {status}")
+                return None
         except Exception as e:
             logger.error(f"Error getting food details: {e}")
             return None
@@ -391,6 +582,23 @@ class NutritionBot:
                 food_data['sodium'] = value / 1000  # Convert mg to g
         
         return food_data
+    
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            "local": local_foods.stats(),
+            "search": search_cache.stats(),
+            "details": {
+                **self.food_memory.stats(),
+                "db_hits": self.food_db_hits,
+                "api_calls": self.food_api_calls,
+                "coalesced": self.food_flights.shared,
+                "prefetched": self.food_prefetched,
+                "batch_calls": self.food_batch_calls,
+                "refreshes": self.food_refreshes,
+                "refresh_failures": self.food_refresh_failures,
+            },
+        }
 
 
 # Global instance
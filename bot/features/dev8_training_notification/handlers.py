@@ -3,7 +3,6 @@ Handlers for training notifications feature.
 All database operations integrated via services module.
 """
 import re
-import asyncio
 from datetime import time
 from aiogram import Router, F
 from aiogram.filters import Command
@@ -11,8 +10,8 @@ from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
 
 from localization.utils import t
-from bot.features.dev1_workout_tracking.services import get_lang
 
+from bot.core.cache import CachedUser
 from .keyboards import (
     create_main_keyboard,
     create_change_keyboard,
@@ -28,7 +27,6 @@ from .services import (
     update_training,
     delete_training,
     get_notification_count,
-    reminder_loop,
     load_schedules_from_db,
     get_schedules,
     add_schedule,
@@ -46,15 +44,14 @@ MAX_NOTIFICATIONS = 5
 
 
 @router.message(Command("notification"))
-async def notification_start(message: Message, state: FSMContext):
+async def notification_start(message: Message, state: FSMContext, lang: str):
     """Handle /notification command"""
-    lang = get_lang(message.from_user.id)
     await state.update_data(lang=lang)
 
     chat_id = message.from_user.id
 
     # Load existing schedules from unified database
-    load_schedules_from_db(message.bot, chat_id)
+    await load_schedules_from_db(chat_id)
 
     await state.clear()
     await state.update_data(lang=lang)
@@ -297,7 +294,7 @@ async def handle_delete_num(callback: CallbackQuery, state: FSMContext):
     time_str = f"{train_time.hour:02}:{train_time.minute:02}"
 
     # Delete from database and memory
-    delete_training(chat_id, num)
+    await delete_training(chat_id, num)
     delete_schedule(chat_id, num)
 
     await state.clear()
@@ -396,7 +393,7 @@ async def handle_time_input(message: Message, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith('notif_add_reminder_') | F.data.startswith('notif_replace_reminder_'))
-async def handle_reminder_selection(callback: CallbackQuery, state: FSMContext):
+async def handle_reminder_selection(callback: CallbackQuery, state: FSMContext, user: CachedUser):
     """Handle reminder time selection"""
     data = await state.get_data()
     lang = data.get('lang', 'en')
@@ -420,12 +417,12 @@ async def handle_reminder_selection(callback: CallbackQuery, state: FSMContext):
         return
 
     reminder_minutes = int(reminder_type)
-    await finalize_training(callback.from_user.id, callback.message, state, reminder_minutes)
+    await finalize_training(callback.from_user.id, callback.message, state, reminder_minutes, user.timezone_offset)
     await callback.answer()
 
 
 @router.message(NotificationStates.waiting_for_custom_reminder)
-async def handle_custom_reminder_input(message: Message, state: FSMContext):
+async def handle_custom_reminder_input(message: Message, state: FSMContext, user: CachedUser):
     """Handle custom reminder time input"""
     data = await state.get_data()
     lang = data.get('lang', 'en')
@@ -441,11 +438,12 @@ async def handle_custom_reminder_input(message: Message, state: FSMContext):
         )
         return
 
-    await finalize_training(message.from_user.id, message, state, reminder_minutes)
+    await finalize_training(message.from_user.id, message, state, reminder_minutes, user.timezone_offset)
 
 
-async def finalize_training(chat_id: int, message_obj, state: FSMContext, reminder_minutes: int):
-    """Finalize training addition or replacement"""
+async def finalize_training(chat_id: int, message_obj, state: FSMContext, reminder_minutes: int,
+                            utc_offset: int = 0):
+    """Finalize training addition or replacement (times are in the user's timezone)"""
     data = await state.get_data()
     lang = data.get('lang', 'en')
 
@@ -464,7 +462,7 @@ async def finalize_training(chat_id: int, message_obj, state: FSMContext, remind
 
     if action == 'add':
         # Check if user has reached maximum notifications
-        current_count = get_notification_count(chat_id)
+        current_count = await get_notification_count(chat_id)
 
         if current_count >= MAX_NOTIFICATIONS:
             schedules = get_schedules(chat_id)
@@ -481,9 +479,9 @@ async def finalize_training(chat_id: int, message_obj, state: FSMContext, remind
             return
 
         # Save to unified database
-        success = save_training(chat_id, weekday, train_time, reminder_minutes)
+        notification_id = await save_training(chat_id, weekday, train_time, reminder_minutes, utc_offset)
 
-        if not success:
+        if notification_id is None:
             await message_obj.answer(
                 t("notif_error_saving", lang),
                 reply_markup=create_main_keyboard(lang),
@@ -493,11 +491,8 @@ async def finalize_training(chat_id: int, message_obj, state: FSMContext, remind
             await state.update_data(lang=lang)
             return
 
-        # Create background task
-        task = asyncio.create_task(
-            reminder_loop(message_obj.bot, chat_id, weekday, train_time, reminder_minutes)
-        )
-        add_schedule(chat_id, weekday, train_time, reminder_minutes, task)
+        # Register the reminder
+        add_schedule(chat_id, weekday, train_time, reminder_minutes, notification_id, utc_offset)
 
         await message_obj.answer(
             t("notif_add_success", lang,
@@ -523,7 +518,7 @@ async def finalize_training(chat_id: int, message_obj, state: FSMContext, remind
             return
 
         # Update in unified database
-        success = update_training(chat_id, num, weekday, train_time, reminder_minutes)
+        success = await update_training(chat_id, num, weekday, train_time, reminder_minutes, utc_offset)
 
         if not success:
             await message_obj.answer(
@@ -535,11 +530,8 @@ async def finalize_training(chat_id: int, message_obj, state: FSMContext, remind
             await state.update_data(lang=lang)
             return
 
-        # Create new background task
-        task = asyncio.create_task(
-            reminder_loop(message_obj.bot, chat_id, weekday, train_time, reminder_minutes)
-        )
-        update_schedule(chat_id, num, weekday, train_time, reminder_minutes, task)
+        # Reschedule the reminder
+        update_schedule(chat_id, num, weekday, train_time, reminder_minutes, utc_offset)
 
         await message_obj.answer(
             t("notif_replace_success", lang,
@@ -0,0 +1,261 @@
+"""
+Reminder scheduler - Dev8 Feature
+
+One dispatcher task for every training reminder instead of one sleeping task
+per (user, weekday).
+
+Reminders are weekly and users have a fixed UTC offset (User.timezone_offset,
+in hours), so every reminder fires at the same UTC minute of the week, every
+week. Reminders are grouped into buckets by that minute (at most 7 * 24 * 60
+of them) and only the buckets go into a min-heap ordered by next fire time:
+
+- add / cancel / reschedule touch one bucket set: O(1), plus one heap push
+  (O(log buckets)) when a bucket becomes non-empty
+- the dispatcher sleeps until the earliest bucket is due (or until an earlier
+  bucket appears), hands the whole bucket to the callback in one call and
+  pushes the bucket back exactly one week later - no per-reminder date math
+  and no per-reminder lookups
+"""
+import asyncio
+import heapq
+import logging
+import time
+from datetime import time as dtime
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+WEEK_MINUTES = 7 * 24 * 60
+WEEK_SECONDS = WEEK_MINUTES * 60
+# 1970-01-05 00:00 UTC, a Monday: UTC weeks are counted from here
+EPOCH_MONDAY = 4 * 24 * 3600
+
+
+def week_minute(weekday: int, train_time: dtime, reminder_minutes: int, utc_offset: int = 0) -> int:
+    """
+    UTC minute of the week (0 = Monday 00:00 UTC) at which the reminder fires.
+
+    Args:
+        weekday: 0=Monday ... 6=Sunday, in the user's local time
+        train_time: training start time, in the user's local time
+        reminder_minutes: how long before the training to remind
+        utc_offset: User.timezone_offset, hours east of UTC
+    """
+    local = weekday * 1440 + train_time.hour * 60 + train_time.minute - reminder_minutes
+    return (local - utc_offset * 60) % WEEK_MINUTES
+
+
+def next_fire_at(minute_of_week: int, now: float) -> float:
+    """Unix timestamp of the first occurrence of `minute_of_week` strictly after `now`"""
+    week_start = EPOCH_MONDAY + (now - EPOCH_MONDAY) // WEEK_SECONDS * WEEK_SECONDS
+    fire_at = week_start + minute_of_week * 60
+    if fire_at <= now:
+        fire_at += WEEK_SECONDS
+    return fire_at
+
+
+class Reminder:
+    """One weekly training reminder registered in the scheduler"""
+
+    __slots__ = ("chat_id", "weekday", "train_time", "reminder_minutes", "utc_offset",
+                 "week_minute", "notification_id", "cancelled")
+
+    def __init__(self, chat_id: int, weekday: int, train_time: dtime, reminder_minutes: int,
+                 utc_offset: int = 0, notification_id: int | None = None):
+        self.chat_id = chat_id
+        self.weekday = weekday
+        self.train_time = train_time
+        self.reminder_minutes = reminder_minutes
+        self.utc_offset = utc_offset
+        self.week_minute = week_minute(weekday, train_time, reminder_minutes, utc_offset)
+        self.notification_id = notification_id      # training_notifications row, if stored
+        self.cancelled = False
+
+    def __repr__(self) -> str:
+        return (f"Reminder(chat_id={self.chat_id}, weekday={self.weekday}, train_time={self.train_time}, "
+                f"reminder_minutes={self.reminder_minutes}, utc_offset={self.utc_offset})")
+
+
+ReminderCallback = Callable[[list[Reminder], float], Awaitable[None]]
+
+
+class ReminderScheduler:
+    """
+    Heap of minute-of-week buckets served by a single dispatcher task.
+
+    Usage:
+        scheduler = ReminderScheduler()
+        await scheduler.start(send_reminders)   # async callback(reminders, next_fire_at)
+        reminder = scheduler.add(chat_id, 0, time(18, 0), 30, utc_offset=3)
+        scheduler.cancel(reminder)
+        await scheduler.stop()
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._buckets: dict[int, set[Reminder]] = {}    # week minute -> reminders
+        self._heap: list[tuple[float, int]] = []         # (fire_at, week minute), one per bucket
+        self._due: list[Reminder] = []                   # missed reminders to send right away
+        self._size = 0
+        self._callback: ReminderCallback | None = None
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._inflight: set[asyncio.Task] = set()
+
+        # Metrics
+        self.fired = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def __len__(self) -> int:
+        """Number of active (not cancelled) reminders"""
+        return self._size
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def add(self, chat_id: int, weekday: int, train_time: dtime, reminder_minutes: int,
+            utc_offset: int = 0, notification_id: int | None = None,
+            fire_at: float | None = None) -> Reminder:
+        """
+        Register a weekly reminder.
+        A `fire_at` in the past (a reminder missed while the bot was down) is also sent right away.
+        """
+        reminder = Reminder(chat_id, weekday, train_time, reminder_minutes, utc_offset, notification_id)
+        now = self._clock()
+
+        bucket = self._buckets.get(reminder.week_minute)
+        if bucket is None:
+            bucket = self._buckets[reminder.week_minute] = set()
+            self._push_bucket(reminder.week_minute, next_fire_at(reminder.week_minute, now))
+        bucket.add(reminder)
+        self._size += 1
+
+        if fire_at is not None and fire_at <= now:
+            self._due.append(reminder)
+            self._wakeup.set()
+        return reminder
+
+    def cancel(self, reminder: Reminder):
+        """Remove a reminder; an emptied bucket is dropped when it comes due"""
+        if reminder.cancelled:
+            return
+        reminder.cancelled = True
+        bucket = self._buckets.get(reminder.week_minute)
+        if bucket is not None and reminder in bucket:
+            bucket.discard(reminder)
+            self._size -= 1
+
+    def reschedule(self, reminder: Reminder, weekday: int, train_time: dtime, reminder_minutes: int,
+                   utc_offset: int | None = None) -> Reminder:
+        """Replace a reminder with a new schedule for the same chat"""
+        self.cancel(reminder)
+        return self.add(
+            reminder.chat_id, weekday, train_time, reminder_minutes,
+            utc_offset=reminder.utc_offset if utc_offset is None else utc_offset,
+            notification_id=reminder.notification_id
+        )
+
+    def next_fire_at(self, reminder: Reminder) -> float:
+        """Next regular fire time of a reminder (Unix timestamp)"""
+        return next_fire_at(reminder.week_minute, self._clock())
+
+    def _push_bucket(self, minute: int, fire_at: float):
+        heapq.heappush(self._heap, (fire_at, minute))
+        # Only an earlier head changes how long the dispatcher has to sleep
+        if self._heap[0][1] == minute:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Dispatcher
+    # ------------------------------------------------------------------
+
+    async def start(self, callback: ReminderCallback):
+        """
+        Start the dispatcher.
+        `callback(reminders, next_fire_at)` is awaited once per due bucket with
+        the bucket's reminders and the time they fire next.
+        """
+        if self._task is not None:
+            return
+        self._callback = callback
+        self._task = asyncio.create_task(self._run(), name="reminder-scheduler")
+        logger.info(f"⏰ Reminder scheduler started with {len(self)} reminders in {len(self._buckets)} buckets")
+
+    async def stop(self):
+        """Stop the dispatcher and cancel reminders that are being sent"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        for inflight in list(self._inflight):
+            inflight.cancel()
+        await asyncio.gather(task, *self._inflight, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = self._clock()
+
+            # Missed reminders may sit in different buckets: one call per reminder
+            due, self._due = self._due, []
+            for reminder in due:
+                if not reminder.cancelled:
+                    self._fire([reminder], self.next_fire_at(reminder))
+
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, minute = heapq.heappop(self._heap)
+                bucket = self._buckets.get(minute)
+                if not bucket:
+                    self._buckets.pop(minute, None)
+                    continue
+
+                next_at = fire_at + WEEK_SECONDS
+                if next_at <= now:      # the process was suspended for over a week
+                    next_at = next_fire_at(minute, now)
+                heapq.heappush(self._heap, (next_at, minute))
+                self._fire(list(bucket), next_at)
+                await asyncio.sleep(0)
+
+            timeout = self._heap[0][0] - self._clock() if self._heap else None
+            if self._due or (timeout is not None and timeout <= 0):
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _fire(self, reminders: list[Reminder], next_at: float):
+        task = asyncio.create_task(self._deliver(reminders, next_at))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _deliver(self, reminders: list[Reminder], next_at: float):
+        try:
+            await self._callback(reminders, next_at)
+            self.fired += len(reminders)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += len(reminders)
+            logger.error(f"❌ Sending {len(reminders)} reminders failed: {e}")
+
+    def stats(self) -> dict:
+        """Counters for monitoring"""
+        return {
+            "running": self.running,
+            "reminders": len(self),
+            "buckets": len(self._buckets),
+            "inflight": len(self._inflight),
+            "next_fire_in": self._heap[0][0] - self._clock() if self._heap else None,
+            "fired": self.fired,
+            "failed": self.failed,
+        }
+
+
+# Shared instance used by the notification handlers, started/stopped from bot/main.py
+reminder_scheduler = ReminderScheduler()
@@ -3,58 +3,100 @@ Background services and database operations for training notifications.
 All database operations integrated here.
 """
 import asyncio
-from datetime import datetime, timedelta, time
+import logging
+import os
+import time as clock
+from datetime import datetime, time, timezone
 from typing import Dict, List, Tuple, Optional
 from aiogram import Bot
+from sqlalchemy import select, func, update
 
 from localization.utils import t
-from bot.core.database import get_session
-from bot.core.models import TrainingNotification
-
-# Store schedules: chat_id -> list of (weekday_int, time_obj, reminder_minutes, task)
+from bot.core.cache import user_cache
+from bot.core.database import get_async_session
+from bot.core.models import TrainingNotification, User
+from bot.core.outbox import Priority, outbox
+from bot.features.dev1_workout_tracking.services import get_lang
+from .scheduler import Reminder, next_fire_at, reminder_scheduler, week_minute
+
+logger = logging.getLogger(__name__)
+
+# Settings (can be overridden from .env)
+# Rows read per page when reminders are restored at startup
+REMINDER_RESTORE_PAGE = int(os.getenv("REMINDER_RESTORE_PAGE", "1000"))
+# A reminder missed by at most this many seconds (bot was down) is still sent at startup
+REMINDER_MISFIRE_GRACE = float(os.getenv("REMINDER_MISFIRE_GRACE", "900"))
+
+# Store schedules: chat_id -> list of (weekday_int, time_obj, reminder_minutes, reminder)
 schedules: Dict[int, List[Tuple]] = {}
 
 
+# ============================================================================
+# NEXT FIRE TIME - stored as UTC in training_notifications.next_fire_at
+# ============================================================================
+
+def compute_next_fire_at(weekday: int, train_time: time, reminder_minutes: int, utc_offset: int = 0) -> datetime:
+    """Next reminder time for a training in the user's local time, as an aware UTC datetime"""
+    minute = week_minute(weekday, train_time, reminder_minutes, utc_offset)
+    return from_timestamp(next_fire_at(minute, clock.time()))
+
+
+def to_timestamp(value: datetime) -> float:
+    """Unix timestamp of a stored datetime (SQLite returns them naive, in UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def from_timestamp(value: float) -> datetime:
+    return datetime.fromtimestamp(value, timezone.utc)
+
+
 # ============================================================================
 # DATABASE OPERATIONS
 # ============================================================================
 
-def save_training(chat_id: int, weekday: int, train_time: time, reminder_minutes: int) -> bool:
+async def save_training(chat_id: int, weekday: int, train_time: time, reminder_minutes: int,
+                        utc_offset: int = 0) -> Optional[int]:
     """
     Save a new training notification to the database.
-    Returns True if successful, False otherwise.
+    Returns the new notification_id if successful, None otherwise.
     """
     try:
-        with get_session() as session:
+        async with get_async_session() as session:
             notification = TrainingNotification(
                 user_id=chat_id,
                 weekday=weekday,
                 hour=train_time.hour,
                 minute=train_time.minute,
-                reminder_minutes=reminder_minutes
+                reminder_minutes=reminder_minutes,
+                next_fire_at=compute_next_fire_at(weekday, train_time, reminder_minutes, utc_offset)
             )
             session.add(notification)
-        return True
+            await session.flush()
+            return notification.notification_id
     except Exception as e:
         print(f"Error saving training: {e}")
-        return False
+        return None
 
 
-def load_trainings(chat_id: int) -> List[Tuple[int, time, int]]:
+async def load_trainings(chat_id: int) -> List[Tuple[int, time, int]]:
     """
     Load all training notifications for a specific user.
     Returns list of (weekday, time, reminder_minutes) tuples.
     """
     try:
-        with get_session() as session:
-            notifications = session.query(TrainingNotification)\
-                .filter(TrainingNotification.user_id == chat_id)\
+        async with get_async_session() as session:
+            result = await session.execute(
+                select(TrainingNotification)
+                .filter(TrainingNotification.user_id == chat_id)
                 .order_by(
                     TrainingNotification.weekday,
                     TrainingNotification.hour,
                     TrainingNotification.minute
-                )\
-                .all()
+                )
+            )
+            notifications = result.scalars().all()
 
             return [
                 (n.weekday, time(n.hour, n.minute), n.reminder_minutes)
@@ -65,21 +107,24 @@ def load_trainings(chat_id: int) -> List[Tuple[int, time, int]]:
         return []
 
 
-def update_training(chat_id: int, index: int, weekday: int, train_time: time, reminder_minutes: int) -> bool:
+async def update_training(chat_id: int, index: int, weekday: int, train_time: time, reminder_minutes: int,
+                          utc_offset: int = 0) -> bool:
     """
     Update an existing training notification.
     Returns True if successful, False otherwise.
     """
     try:
-        with get_session() as session:
-            notifications = session.query(TrainingNotification)\
-                .filter(TrainingNotification.user_id == chat_id)\
+        async with get_async_session() as session:
+            result = await session.execute(
+                select(TrainingNotification)
+                .filter(TrainingNotification.user_id == chat_id)
                 .order_by(
                     TrainingNotification.weekday,
                     TrainingNotification.hour,
                     TrainingNotification.minute
-                )\
-                .all()
+                )
+            )
+            notifications = result.scalars().all()
 
             if 0 <= index < len(notifications):
                 notification = notifications[index]
@@ -87,6 +132,7 @@ def update_training(chat_id: int, index: int, weekday: int, train_time: time, re
                 notification.hour = train_time.hour
                 notification.minute = train_time.minute
                 notification.reminder_minutes = reminder_minutes
+                notification.next_fire_at = compute_next_fire_at(weekday, train_time, reminder_minutes, utc_offset)
                 return True
             return False
     except Exception as e:
@@ -94,25 +140,27 @@ def update_training(chat_id: int, index: int, weekday: int, train_time: time, re
         return False
 
 
-def delete_training(chat_id: int, index: int) -> bool:
+async def delete_training(chat_id: int, index: int) -> bool:
     """
     Delete a training notification by index.
     Returns True if successful, False otherwise.
     """
     try:
-        with get_session() as session:
-            notifications = session.query(TrainingNotification)\
-                .filter(TrainingNotification.user_id == chat_id)\
+        async with get_async_session() as session:
+            result = await session.execute(
+                select(TrainingNotification)
+                .filter(TrainingNotification.user_id == chat_id)
                 .order_by(
                     TrainingNotification.weekday,
                     TrainingNotification.hour,
                     TrainingNotification.minute
-                )\
-                .all()
+                )
+            )
+            notifications = result.scalars().all()
 
             if 0 <= index < len(notifications):
                 notification = notifications[index]
-                session.delete(notification)
+                await session.delete(notification)
                 return True
             return False
     except Exception as e:
@@ -120,14 +168,15 @@ def delete_training(chat_id: int, index: int) -> bool:
         return False
 
 
-def get_notification_count(chat_id: int) -> int:
+async def get_notification_count(chat_id: int) -> int:
     """Get the total count of notifications for a user."""
     try:
-        with get_session() as session:
-            count = session.query(TrainingNotification)\
-                .filter(TrainingNotification.user_id == chat_id)\
-                .count()
-            return count
+        async with get_async_session() as session:
+            result = await session.execute(
+                select(func.count(TrainingNotification.notification_id))
+                .filter(TrainingNotification.user_id == chat_id)
+            )
+            return result.scalar_one()
     except Exception as e:
         print(f"Error getting notification count: {e}")
         return 0
@@ -137,159 +186,287 @@ def get_notification_count(chat_id: int) -> int:
 # HELPER FUNCTION - получение языка пользователя
 # ============================================================================
 
-def get_user_lang(chat_id: int) -> str:
+async def get_user_lang(chat_id: int) -> str:
     """
-    Get user's language from database.
+    Get user's language (served from the shared user cache).
     Returns 'en' by default if not found.
     """
     try:
-        from bot.features.dev1_workout_tracking.services import get_lang
-        return get_lang(chat_id)
+        return await get_lang(chat_id)
     except Exception:
         return "en"
 
 
 # ============================================================================
-# BACKGROUND TASK MANAGEMENT
+# REMINDER DELIVERY AND SCHEDULE MANAGEMENT
 # ============================================================================
 
-async def reminder_loop(bot: Bot, chat_id: int, weekday: int, train_time: time, reminder_minutes: int):
+async def get_user_langs(chat_ids: set[int]) -> Dict[int, str]:
     """
-    Background loop for sending reminders.
-    Runs continuously and sends notifications at the scheduled time.
+    Languages for many users at once: cached profiles first,
+    the rest with one query per 500 users. Missing users get 'en'.
     """
-    while True:
-        try:
-            now = datetime.now()
-            days_ahead = weekday - now.weekday()
-            if days_ahead < 0:
-                days_ahead += 7
-
-            next_train_dt = now + timedelta(days=days_ahead)
-            next_train_dt = next_train_dt.replace(
-                hour=train_time.hour,
-                minute=train_time.minute,
-                second=0,
-                microsecond=0
+    langs = {}
+    missing = []
+    for chat_id in chat_ids:
+        cached = user_cache.peek(chat_id)
+        if cached is not None:
+            langs[chat_id] = cached.language or "en"
+        else:
+            missing.append(chat_id)
+
+    try:
+        async with get_async_session() as session:
+            for i in range(0, len(missing), 500):
+                result = await session.execute(
+                    select(User.telegram_id, User.language)
+                    .where(User.telegram_id.in_(missing[i:i + 500]))
+                )
+                langs.update((telegram_id, language or "en") for telegram_id, language in result)
+    except Exception as e:
+        print(f"Error loading user languages: {e}")
+
+    return {chat_id: langs.get(chat_id, "en") for chat_id in chat_ids}
+
+
+def format_reminder_time(reminder_minutes: int, lang: str) -> str:
+    """"1 hour 30 minutes"-style text for the reminder message"""
+    # Format time string - используем переводы
+    if reminder_minutes >= 60:
+        hours = reminder_minutes // 60
+        mins = reminder_minutes % 60
+
+        if hours == 1:
+            time_str = t("notif_time_1hour", lang)
+        else:
+            time_str = t("notif_time_hours", lang, hours=hours)
+
+        if mins:
+            min_str = t("notif_time_minutes", lang, minutes=mins)
+            time_str = f"{time_str} {min_str}"
+    else:
+        time_str = t("notif_time_minutes", lang, minutes=reminder_minutes)
+    return time_str
+
+
+async def send_reminders(bot: Bot, reminders: List[Reminder], next_at: float):
+    """
+    Send a batch of training reminders that are due at the same time.
+    Called by the reminder scheduler; `next_at` is when they fire next.
+    """
+    langs = await get_user_langs({reminder.chat_id for reminder in reminders})
+
+    try:
+        # Send reminder messages through the rate-limited outbox
+        results = await asyncio.gather(*(
+            outbox.send_message(
+                bot, reminder.chat_id,
+                t("notif_reminder_message", langs[reminder.chat_id],
+                  time_str=format_reminder_time(reminder.reminder_minutes, langs[reminder.chat_id])),
+                priority=Priority.REMINDER
             )
+            for reminder in reminders
+        ), return_exceptions=True)
 
-            if next_train_dt <= now:
-                next_train_dt += timedelta(days=7)
+        failed = [result for result in results if isinstance(result, Exception)]
+        if failed:
+            logger.warning(f"⚠️ {len(failed)} of {len(reminders)} reminders not delivered: {failed[0]}")
+    finally:
+        await store_next_fire_at(reminders, next_at)
 
-            next_reminder_dt = next_train_dt - timedelta(minutes=reminder_minutes)
 
-            if next_reminder_dt <= now:
-                next_train_dt += timedelta(days=7)
-                next_reminder_dt = next_train_dt - timedelta(minutes=reminder_minutes)
+async def store_next_fire_at(reminders: List[Reminder], next_at: float):
+    """Persist the next fire time of sent reminders (one UPDATE per 500 rows) so a restart can reuse it"""
+    ids = [r.notification_id for r in reminders if r.notification_id is not None and not r.cancelled]
+    try:
+        async with get_async_session() as session:
+            for i in range(0, len(ids), 500):
+                await session.execute(
+                    update(TrainingNotification)
+                    .where(TrainingNotification.notification_id.in_(ids[i:i + 500]))
+                    .values(next_fire_at=from_timestamp(next_at))
+                )
+    except Exception as e:
+        print(f"Error storing next reminder time: {e}")
 
-            wait_seconds = (next_reminder_dt - now).total_seconds()
-            await asyncio.sleep(wait_seconds)
 
-            # Get user's language
-            lang = get_user_lang(chat_id)
+def _register_row(row, now: float, stale: list | None) -> Tuple:
+    """
+    Register one training_notifications row in the scheduler.
+    A stored next_fire_at missed by at most REMINDER_MISFIRE_GRACE is sent right away;
+    rows without a usable one are appended to `stale` with the recomputed time.
+    With `stale=None` the stored time is ignored and the next occurrence is scheduled.
+    """
+    notification_id, chat_id, weekday, hour, minute, reminder_minutes, stored_at, utc_offset = row
+    train_time = time(hour, minute)
+
+    fire_at = to_timestamp(stored_at) if stored_at is not None and stale is not None else None
+    usable = fire_at is not None and fire_at >= now - REMINDER_MISFIRE_GRACE
+    reminder = reminder_scheduler.add(
+        chat_id, weekday, train_time, reminder_minutes,
+        utc_offset=utc_offset, notification_id=notification_id,
+        fire_at=fire_at if usable else None
+    )
+
+    if stale is not None and not usable:
+        stale.append({
+            "notification_id": notification_id,
+            "next_fire_at": from_timestamp(reminder_scheduler.next_fire_at(reminder))
+        })
+    return weekday, train_time, reminder_minutes, reminder
+
+
+def _notification_rows():
+    return select(
+        TrainingNotification.notification_id,
+        TrainingNotification.user_id,
+        TrainingNotification.weekday,
+        TrainingNotification.hour,
+        TrainingNotification.minute,
+        TrainingNotification.reminder_minutes,
+        TrainingNotification.next_fire_at,
+        func.coalesce(User.timezone_offset, 0).label("timezone_offset")
+    ).outerjoin(User, User.telegram_id == TrainingNotification.user_id)
+
+
+def _sort_key(schedule: Tuple):
+    """Same order as load_trainings(), which the index-based operations rely on"""
+    weekday, train_time, _, reminder = schedule
+    return weekday, train_time, reminder.notification_id or 0
+
+
+async def restore_reminders(page_size: int = REMINDER_RESTORE_PAGE) -> int:
+    """
+    Register every stored training notification in the reminder scheduler.
+    Called once at startup, so reminders are sent without users opening /notification.
 
-            # Format time string - используем переводы
-            if reminder_minutes >= 60:
-                hours = reminder_minutes // 60
-                mins = reminder_minutes % 60
+    Rows are streamed in notification_id pages. The stored next_fire_at is reused;
+    only rows without one, or missed by more than REMINDER_MISFIRE_GRACE, are
+    recomputed and written back. Returns the number of restored reminders.
+    """
+    started = clock.perf_counter()
+    for chat_id in list(schedules):
+        cleanup_user_schedules(chat_id)
 
-                if hours == 1:
-                    time_str = t("notif_time_1hour", lang)
-                else:
-                    time_str = t("notif_time_hours", lang, hours=hours)
+    restored = 0
+    recomputed = 0
+    last_id = 0
+    now = clock.time()
 
-                if mins:
-                    min_str = t("notif_time_minutes", lang, minutes=mins)
-                    time_str = f"{time_str} {min_str}"
-            else:
-                time_str = t("notif_time_minutes", lang, minutes=reminder_minutes)
+    while True:
+        async with get_async_session() as session:
+            result = await session.execute(
+                _notification_rows()
+                .where(TrainingNotification.notification_id > last_id)
+                .order_by(TrainingNotification.notification_id)
+                .limit(page_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            stale = []
+            for row in rows:
+                schedules.setdefault(row.user_id, []).append(_register_row(row, now, stale))
+            if stale:
+                await session.execute(update(TrainingNotification), stale)
 
-            # Send reminder message
-            await bot.send_message(chat_id, t("notif_reminder_message", lang, time_str=time_str))
-            
-        except asyncio.CancelledError:
-            # Task was cancelled, exit gracefully
-            break
-        except Exception as e:
-            print(f"Error in reminder loop: {e}")
-            # Wait a bit before retrying to avoid rapid error loops
-            await asyncio.sleep(60)
+        restored += len(rows)
+        recomputed += len(stale)
+        last_id = rows[-1].notification_id
 
+    for user_schedules in schedules.values():
+        user_schedules.sort(key=_sort_key)
 
-def load_schedules_from_db(bot: Bot, chat_id: int):
+    logger.info(
+        f"⏰ Restored {restored} reminders ({recomputed} recomputed) "
+        f"in {clock.perf_counter() - started:.2f}s"
+    )
+    return restored
+
+
+async def load_schedules_from_db(chat_id: int):
     """
-    Load schedules from database and start background tasks.
+    Load schedules from database and register them in the reminder scheduler.
     Called when user starts /notification command.
+
+    The stored next_fire_at is not reused here: restore_reminders() already
+    handled missed reminders at startup, and a stored time that send_reminders()
+    has not advanced yet would send the same reminder twice.
     """
-    trainings = load_trainings(chat_id)
-    
-    if chat_id not in schedules:
-        schedules[chat_id] = []
-    
-    # Cancel existing tasks
-    for _, _, _, task in schedules[chat_id]:
-        task.cancel()
-    
-    schedules[chat_id] = []
-    
-    # Create new tasks for each training
-    for weekday, train_time, reminder_minutes in trainings:
-        task = asyncio.create_task(
-            reminder_loop(bot, chat_id, weekday, train_time, reminder_minutes)
+    async with get_async_session() as session:
+        result = await session.execute(
+            _notification_rows()
+            .where(TrainingNotification.user_id == chat_id)
+            .order_by(
+                TrainingNotification.weekday,
+                TrainingNotification.hour,
+                TrainingNotification.minute
+            )
         )
-        schedules[chat_id].append((weekday, train_time, reminder_minutes, task))
+        rows = result.all()
+
+        # Drop reminders registered earlier
+        for _, _, _, reminder in schedules.get(chat_id, []):
+            reminder_scheduler.cancel(reminder)
+
+        now = clock.time()
+        schedules[chat_id] = [_register_row(row, now, None) for row in rows]
 
 
 def get_schedules(chat_id: int) -> List[Tuple]:
     """
     Get in-memory schedules for a specific chat_id.
-    Returns list of (weekday, time, reminder_minutes, task) tuples.
+    Returns list of (weekday, time, reminder_minutes, reminder) tuples.
     """
     return schedules.get(chat_id, [])
 
 
-def add_schedule(chat_id: int, weekday: int, train_time: time, reminder_minutes: int, task):
+def add_schedule(chat_id: int, weekday: int, train_time: time, reminder_minutes: int,
+                 notification_id: Optional[int] = None, utc_offset: int = 0):
     """
-    Add a new schedule to in-memory storage.
+    Add a new schedule to in-memory storage and the reminder scheduler.
     Should be called after saving to database.
     """
+    reminder = reminder_scheduler.add(
+        chat_id, weekday, train_time, reminder_minutes,
+        utc_offset=utc_offset, notification_id=notification_id
+    )
     if chat_id not in schedules:
         schedules[chat_id] = []
-    schedules[chat_id].append((weekday, train_time, reminder_minutes, task))
+    schedules[chat_id].append((weekday, train_time, reminder_minutes, reminder))
 
 
-def update_schedule(chat_id: int, index: int, weekday: int, train_time: time, reminder_minutes: int, task):
+def update_schedule(chat_id: int, index: int, weekday: int, train_time: time, reminder_minutes: int,
+                    utc_offset: int = 0):
     """
-    Update an existing schedule in in-memory storage.
+    Update an existing schedule in in-memory storage and the reminder scheduler.
     Should be called after updating database.
     """
     if chat_id in schedules and 0 <= index < len(schedules[chat_id]):
-        # Cancel old task
-        old_task = schedules[chat_id][index][3]
-        old_task.cancel()
-        # Update with new data
-        schedules[chat_id][index] = (weekday, train_time, reminder_minutes, task)
+        old_reminder = schedules[chat_id][index][3]
+        reminder = reminder_scheduler.reschedule(
+            old_reminder, weekday, train_time, reminder_minutes, utc_offset=utc_offset
+        )
+        schedules[chat_id][index] = (weekday, train_time, reminder_minutes, reminder)
 
 
 def delete_schedule(chat_id: int, index: int):
     """
-    Delete a schedule from in-memory storage.
+    Delete a schedule from in-memory storage and the reminder scheduler.
     Should be called after deleting from database.
     """
     if chat_id in schedules and 0 <= index < len(schedules[chat_id]):
-        # Cancel the task
-        task = schedules[chat_id][index][3]
-        task.cancel()
-        # Remove from list
+        reminder_scheduler.cancel(schedules[chat_id][index][3])
         del schedules[chat_id][index]
 
 
 def cleanup_user_schedules(chat_id: int):
     """
-    Cancel all background tasks for a user.
+    Cancel all reminders for a user.
     Useful for cleanup when user is blocked or deleted.
     """
     if chat_id in schedules:
-        for _, _, _, task in schedules[chat_id]:
-            task.cancel()
-        del schedules[chat_id]
\ No newline at end of file
+        for _, _, _, reminder in schedules[chat_id]:
+            reminder_scheduler.cancel(reminder)
+        del schedules[chat_id]
@@ -109,6 +109,7 @@ Use /help to see all available commands!""",
 
 <b>🏋️ Workouts:</b>
 /log (e.g., BenchPress 3x10x50) - Log an exercise 
+   One exercise per line to log a whole session at once
 /today - Show today's workouts
 /check_training (e.g., 03.09.2025) - Check workouts by date
 /list_trainings - List training days by year
@@ -140,6 +141,7 @@ Use /help to see all available commands!""",
 
 <b>🏋️ Тренировки:</b>
 /log (например, BenchPress 3x10x50) - Записать упражнение
+   По одному упражнению на строку - записать всю тренировку сразу
 /today - Показать сегодняшние тренировки
 /check_training (например, 03.09.2025) - Проверить тренировки по дате
 /list_trainings - Список дней тренировок по году
@@ -174,6 +176,40 @@ Use /help to see all available commands!""",
         "ru": "💬 Вы написали: <i>{text}</i>\n\nИспользуйте /help для просмотра доступных команд."
     },
 
+# ========================================
+# WORKOUT TRACKING (dev1)
+# ========================================
+
+"batch_logged": {
+    "en": "✅ <b>Logged {count} exercises:</b>\n{workouts}",
+    "ru": "✅ <b>Записано упражнений: {count}</b>\n{workouts}"
+},
+"batch_new_records": {
+    "en": "<b>New records</b> (1RM, kg; previous in brackets):\n{records}",
+    "ru": "<b>Новые рекорды</b> (1ПМ, кг; в скобках предыдущий):\n{records}"
+},
+"batch_invalid_line": {
+    "en": "❌ Line {number} is invalid: <code>{line}</code>\n"
+          "Each line must look like <code>Exercise 3x10x50</code>, values greater than zero.\n"
+          "Nothing was saved.",
+    "ru": "❌ Ошибка в строке {number}: <code>{line}</code>\n"
+          "Каждая строка должна выглядеть как <code>Упражнение 3x10x50</code>, значения больше нуля.\n"
+          "Ничего не сохранено."
+},
+"batch_too_many_lines": {
+    "en": "❌ Too many lines. You can log up to {max} exercises at once.",
+    "ru": "❌ Слишком много строк. За раз можно записать до {max} упражнений."
+},
+
+# ========================================
+# PROGRESS STATISTICS (dev3)
+# ========================================
+
+"stats_chart_unavailable": {
+    "en": "⏳ Charts are busy right now, please try again in a minute.",
+    "ru": "⏳ Графики сейчас перегружены, попробуйте через минуту."
+},
+
 # Добавь эти переводы в localization/translations.py
 
 # ========================================
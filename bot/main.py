@@ -11,6 +11,7 @@ sys.path.insert(0, str(ROOT_DIR))
 
 import asyncio
 import logging
+from functools import partial
 from aiogram import Bot, Dispatcher, Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters import CommandStart, Command
@@ -18,16 +19,25 @@ from aiogram.filters import CommandStart, Command
 from localization.utils import t
 
 from bot.config import BOT_TOKEN
-from bot.core.database import init_db
+from bot.core.cache import CachedUser
+from bot.core.database import init_db, close_db
+from bot.core.http import http_client
+from bot.core.middlewares import UserMiddleware
+from bot.core.outbox import outbox
 from bot.features.dev1_workout_tracking.handlers import router as workout_router
-from bot.features.dev1_workout_tracking.services import get_or_create_user, get_lang, set_user_language
+from bot.features.dev1_workout_tracking.services import ensure_derived_tables, set_user_language
 from bot.features.dev2_exercise_library.exercise_handlers import exercise_router
 from bot.features.dev2_exercise_library.exercise_db import ExerciseDatabase
 from bot.features.dev3_progress_stats.stats_handlers import stats_router
+from bot.features.dev3_progress_stats.chart_service import chart_service
 from bot.features.dev4_custom_routines.handlers import routine_router
-from bot.features.dev5_rest_timers.handlers import router as timer_router
+from bot.features.dev5_rest_timers.handlers import router as timer_router, notify_timer_completed
+from bot.features.dev5_rest_timers.timer_service import rest_timers
 from bot.features.dev7_nutrition_tracking.handlers import router as nutrition_router
+from bot.features.dev7_nutrition_tracking.services import nutrition_bot
 from bot.features.dev8_training_notification.handlers import router as notification_router
+from bot.features.dev8_training_notification.scheduler import reminder_scheduler
+from bot.features.dev8_training_notification.services import restore_reminders, send_reminders
 
 
 # Configure logging
@@ -49,18 +59,9 @@ echo_router = Router()
 
 
 @main_router.message(CommandStart())
-async def on_start(m: Message):
+async def on_start(m: Message, user: CachedUser, lang: str):
     """Welcome message with language selection"""
-    # Create/get user on start
-    user = get_or_create_user(
-        telegram_id=m.from_user.id,
-        username=m.from_user.username,
-        first_name=m.from_user.first_name,
-        last_name=m.from_user.last_name
-    )
-
-    # Check if user has language set
-    lang = get_lang(m.from_user.id)
+    # User is created/updated by UserMiddleware before any handler runs
 
     # If language is not set (new user or default), show language selection
     if not user.language or user.language == "en":
@@ -87,7 +88,7 @@ async def set_language_callback(callback: CallbackQuery):
     user_id = callback.from_user.id
 
     # Save language to database
-    set_user_language(user_id, new_lang)
+    await set_user_language(user_id, new_lang)
 
     # Show welcome message in selected language
     await callback.message.delete()
@@ -102,10 +103,8 @@ async def show_welcome_message(m: Message, lang: str):
 
 
 @main_router.message(Command("language"))
-async def change_language(m: Message):
+async def change_language(m: Message, lang: str):
     """Change bot language"""
-    lang = get_lang(m.from_user.id)
-
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="🇬🇧 English", callback_data="set_lang_en")],
         [InlineKeyboardButton(text="🇷🇺 Русский", callback_data="set_lang_ru")]
@@ -119,22 +118,41 @@ async def change_language(m: Message):
 
 
 @main_router.message(Command("help"))
-async def on_help(m: Message):
+async def on_help(m: Message, lang: str):
     """List of all commands"""
-    lang = get_lang(m.from_user.id)
     help_text = t("main_help", lang)
     await m.answer(help_text, parse_mode="HTML")
 
 
 @echo_router.message(F.text)
-async def echo(m: Message):
+async def echo(m: Message, lang: str):
     """Echo handler for unprocessed messages"""
-    lang = get_lang(m.from_user.id)
     await m.answer(
         t("echo_message", lang, text=m.text)
     )
 
 
+async def on_startup():
+    """Start background services before polling begins"""
+    await http_client.start()
+    await chart_service.start()
+    await outbox.start()
+    await restore_reminders()
+    await reminder_scheduler.start(partial(send_reminders, bot))
+    await rest_timers.start(partial(notify_timer_completed, bot))
+
+
+async def on_shutdown():
+    """Stop background services and release pooled HTTP and database connections"""
+    await rest_timers.stop()
+    await reminder_scheduler.stop()
+    await outbox.stop()
+    await chart_service.stop()
+    await nutrition_bot.close()
+    await http_client.stop()
+    await close_db()
+
+
 async def main():
     """Main startup function"""
     try:
@@ -142,6 +160,15 @@ async def main():
         logger.info("🗄️ Initializing database...")
         init_db()
         
+        # Fill workout_daily_stats / personal_records from older history if they lag behind
+        if await ensure_derived_tables():
+            logger.info("📦 Rebuilt daily statistics and personal records from workout history")
+        
+        # Resolve the sender once per update (injects `user` and `lang`)
+        dp.update.outer_middleware(UserMiddleware())
+        dp.startup.register(on_startup)
+        dp.shutdown.register(on_shutdown)
+        
         # Auto-initialize exercises if database is empty
         logger.info("📚 Checking exercise database...")
         exercise_db = ExerciseDatabase()
@@ -0,0 +1,13 @@
+"""
+Shared test setup: the project root and bot/ on sys.path, the same way
+bot/main.py and the benchmarks set it up.
+
+Run from the project root:
+    python -m pytest -q
+"""
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(ROOT_DIR / "bot"))
@@ -0,0 +1,134 @@
+"""HttpClient (bot/core/http.py): retries on 429/5xx, Retry-After, giving up, full-jitter backoff"""
+import asyncio
+import socket
+import time
+from contextlib import asynccontextmanager
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from bot.core.http import HttpClient
+
+
+@asynccontextmanager
+async def stub_server(responses: list[tuple[int, dict]]):
+    """
+    Local server answering GET /search with the scripted (status, headers)
+    responses in order (the last one repeats). Yields (url, hits).
+    """
+    hits = []
+
+    async def handle(request: web.Request) -> web.Response:
+        status, headers = responses[min(len(hits), len(responses) - 1)]
+        hits.append(time.perf_counter())
+        if status == 200:
+            return web.json_response({"query": request.query.get("query")}, headers=headers)
+        return web.Response(status=status, headers=headers)
+
+    app = web.Application()
+    app.router.add_get("/search", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    try:
+        yield f"http://{host}:{port}/search", hits
+    finally:
+        await runner.cleanup()
+
+
+def make_client(**kwargs) -> HttpClient:
+    # backoff_base=0: retries without waiting unless the server sends Retry-After
+    options = {"max_retries": 3, "backoff_base": 0, "backoff_max": 5, "total_timeout": 5, "connect_timeout": 1}
+    return HttpClient(**{**options, **kwargs})
+
+
+def request(client: HttpClient, responses: list[tuple[int, dict]]):
+    """Run one request_json() against a stub server; returns (status, data, hits)"""
+    async def run():
+        async with stub_server(responses) as (url, hits):
+            try:
+                status, data = await client.request_json("GET", url, params={"query": "oats"})
+            finally:
+                await client.stop()
+        return status, data, hits
+    return asyncio.run(run())
+
+
+def test_success_is_not_retried():
+    client = make_client()
+    status, data, hits = request(client, [(200, {})])
+    assert (status, data) == (200, {"query": "oats"})
+    assert len(hits) == 1
+    assert (client.requests, client.retried, client.failed) == (1, 0, 0)
+
+
+@pytest.mark.parametrize("retry_status", [429, 500, 502, 503, 504])
+def test_retryable_status_is_retried_until_success(retry_status):
+    client = make_client()
+    status, data, hits = request(client, [(retry_status, {}), (retry_status, {}), (200, {})])
+    assert (status, data) == (200, {"query": "oats"})
+    assert len(hits) == 3
+    assert (client.requests, client.retried, client.failed) == (3, 2, 0)
+
+
+def test_other_errors_are_not_retried():
+    client = make_client()
+    status, data, hits = request(client, [(404, {}), (200, {})])
+    assert (status, data) == (404, None)
+    assert len(hits) == 1
+    assert client.failed == 1
+
+
+def test_gives_up_after_max_retries():
+    client = make_client(max_retries=2)
+    status, data, hits = request(client, [(503, {})])
+    assert (status, data) == (503, None)
+    assert len(hits) == 3                     # first attempt + 2 retries
+    assert (client.requests, client.retried, client.failed) == (3, 2, 1)
+
+
+def test_retry_after_is_honoured():
+    client = make_client()
+    status, _, hits = request(client, [(429, {"Retry-After": "0.3"}), (200, {})])
+    assert status == 200
+    assert hits[1] - hits[0] >= 0.25
+
+
+def test_retry_after_is_capped_by_backoff_max():
+    client = make_client(backoff_max=0.05)
+    started = time.perf_counter()
+    status, _, hits = request(client, [(503, {"Retry-After": "120"}), (200, {})])
+    assert status == 200
+    assert len(hits) == 2
+    assert time.perf_counter() - started < 5
+
+
+def test_network_error_is_raised_after_max_retries():
+    # A port nobody listens on: every attempt fails with a connection error
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    client = make_client(max_retries=2)
+
+    async def run():
+        try:
+            await client.request_json("GET", f"http://127.0.0.1:{port}/search")
+        finally:
+            await client.stop()
+
+    with pytest.raises(aiohttp.ClientError):
+        asyncio.run(run())
+    assert (client.requests, client.retried, client.failed) == (3, 2, 1)
+
+
+def test_backoff_is_full_jitter_capped_at_backoff_max():
+    client = make_client(backoff_base=0.5, backoff_max=3)
+    for attempt in range(1, 8):
+        cap = min(3, 0.5 * 2 ** attempt)
+        delays = [client._backoff(attempt) for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        assert max(delays) > cap / 2          # spread over the whole range, not a fixed delay
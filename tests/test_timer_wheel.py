@@ -0,0 +1,120 @@
+"""TimerWheel (dev5 rest timers): expiry ticks, cascading between levels, cancel, ordering"""
+import random
+
+import pytest
+
+from bot.features.dev5_rest_timers.timer_wheel import SLOTS, LEVELS, TimerWheel
+
+START = 1_700_000_123       # a Unix-time tick that is not aligned to any level boundary
+
+
+@pytest.mark.parametrize("delay", [
+    1, 5, SLOTS - 1,                    # level 0
+    SLOTS, SLOTS + 1, SLOTS ** 2 - 1,   # level 1
+    SLOTS ** 2, SLOTS ** 2 + 7,         # level 2
+    SLOTS ** 3 + 3,                     # level 3
+])
+def test_expires_exactly_at_deadline(delay):
+    wheel = TimerWheel(START)
+    wheel.schedule("t", START + delay)
+
+    # One big step to just before the deadline (crosses every cascade on the way), then one tick
+    assert wheel.advance(START + delay - 1) == []
+    assert "t" in wheel
+    assert wheel.advance(START + delay) == ["t"]
+    assert len(wheel) == 0
+
+
+def test_overflow_cascades_down_through_every_level():
+    boundary = 3 * SLOTS ** LEVELS      # the overflow map is cascaded when the top level wraps here
+    wheel = TimerWheel(boundary - 5)
+    wheel.schedule("far", boundary + SLOTS ** 2 + 10)     # beyond level 3's period: overflow
+
+    assert wheel.advance(boundary + SLOTS ** 2 + 9) == []
+    assert wheel.advance(boundary + SLOTS ** 2 + 10) == ["far"]
+
+
+def test_cascades_tick_by_tick():
+    wheel = TimerWheel(0)
+    deadlines = {"a": 63, "b": 64, "c": 65, "d": 4095, "e": 4096, "f": 4097, "g": 200}
+    for key, deadline in deadlines.items():
+        wheel.schedule(key, deadline)
+
+    fired = {}
+    for tick in range(1, 5000):
+        for key in wheel.advance(tick):
+            fired[key] = tick
+    assert fired == deadlines
+
+
+def test_cancel_after_cascade():
+    wheel = TimerWheel(0)
+    wheel.schedule("x", 130)        # level 1 at first
+    wheel.schedule("y", 131)
+    wheel.advance(128)              # slot 128..191 cascaded down to level 0
+    assert wheel.deadline("x") == 130
+
+    assert wheel.cancel("x") is True
+    assert wheel.cancel("x") is False
+    assert "x" not in wheel
+    assert wheel.advance(200) == ["y"]
+    assert len(wheel) == 0
+
+
+def test_cancel_in_overflow_and_unknown_key():
+    wheel = TimerWheel(0)
+    wheel.schedule("far", SLOTS ** LEVELS * 2)
+    assert wheel.cancel("far") is True
+    assert wheel.cancel("never") is False
+    assert wheel.advance(SLOTS ** LEVELS * 3) == []
+
+
+def test_schedule_replaces_existing_timer():
+    wheel = TimerWheel(0)
+    wheel.schedule("u", 10)
+    wheel.schedule("u", 300)        # restart: the old deadline must not fire
+    assert wheel.advance(299) == []
+    assert wheel.advance(300) == ["u"]
+
+
+def test_past_deadline_is_returned_by_next_advance():
+    wheel = TimerWheel(100)
+    wheel.schedule("late", 50)
+    assert wheel.next_deadline() == 100
+    assert wheel.advance(100) == ["late"]
+
+
+def test_due_timers_come_out_in_deadline_order():
+    wheel = TimerWheel(0)
+    for key, deadline in [("a", 10), ("b", 3), ("c", 70), ("d", 64), ("e", 5000), ("f", 4100)]:
+        wheel.schedule(key, deadline)
+    assert wheel.advance(6000) == ["b", "a", "d", "c", "f", "e"]
+
+
+def test_matches_a_sorted_list_under_random_load():
+    rng = random.Random(19)
+    wheel = TimerWheel(START)
+    pending = {}
+    for n in range(2000):
+        deadline = START + rng.randint(1, SLOTS ** 3)
+        wheel.schedule(n, deadline)
+        pending[n] = deadline
+    for n in rng.sample(sorted(pending), 300):
+        assert wheel.cancel(n)
+        del pending[n]
+
+    now = START
+    while pending:
+        next_tick = wheel.next_deadline()
+        assert next_tick is not None and next_tick <= min(pending.values())
+
+        now += rng.randint(1, SLOTS ** 2)
+        expired = wheel.advance(now)
+        due = [n for n, deadline in pending.items() if deadline <= now]
+        assert [pending[n] for n in expired] == sorted(pending[n] for n in expired)
+        assert sorted(expired) == sorted(due)
+        for n in expired:
+            del pending[n]
+
+    assert len(wheel) == 0
+    assert wheel.next_deadline() is None